@@ -1,10 +1,11 @@
 from abc import ABC
-from typing import List
+from typing import List, Optional
 from enum import Enum
 from abc import abstractmethod
 from pydantic import BaseModel
 from langchain_core.tools import StructuredTool
 from agent_hub.plan import AgentTask
+from agent_hub.config import AgentHubConfig, get_config
 
 
 class AgentInput(BaseModel, ABC):
@@ -18,13 +19,14 @@ class Agent(ABC):
     """
     as_tool : type[AgentInput] = None
     
-    def __init__(self, name: str, description: str, task: AgentTask):
+    def __init__(self, name: str, description: str, task: AgentTask, config: Optional[AgentHubConfig] = None):
         """
-        Initialize the agent with a name, description, and task.
+        Initialize the agent with a name, description, task and (optionally) the graph config.
         """
         self.name = name
         self.description = description
         self.task = task
+        self.config = config or get_config()
         self.as_tool = self.define_input_schema()
         
 
@@ -1,12 +1,39 @@
-from browser_use import Agent as BrowserAgent
+from browser_use import Agent as BrowserAgent, Browser, BrowserConfig
+from browser_use.browser.context import BrowserContext
 from agent_hub.agent import Agent as BaseAgent, AgentTask, AgentInput
 from pydantic import Field
-from agent_hub.llms import mistral_llm
-import nest_asyncio
-import asyncio
+from agent_hub.llms import new_llm, DEFAULT_LLMS
 from agent_hub.state import State
 from agent_hub.plan import TaskStatus
 import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Optional
+from agent_hub.config import AgentHubConfig
+from agent_hub.browser.pool import BrowserPool
+
+
+def playwright_browsers_path() -> Path:
+    """Directory where playwright stores its downloaded browsers."""
+    custom_path = os.getenv("PLAYWRIGHT_BROWSERS_PATH")
+    if custom_path == "0":
+        import playwright
+        return Path(playwright.__file__).parent / "driver" / "package" / ".local-browsers"
+    if custom_path:
+        return Path(custom_path)
+    if sys.platform == "win32":
+        return Path(os.getenv("LOCALAPPDATA", Path.home() / "AppData" / "Local")) / "ms-playwright"
+    if sys.platform == "darwin":
+        return Path.home() / "Library" / "Caches" / "ms-playwright"
+    return Path(os.getenv("XDG_CACHE_HOME", Path.home() / ".cache")) / "ms-playwright"
+
+
+def playwright_browsers_installed() -> bool:
+    """Whether a chromium build is already available to playwright."""
+    browsers_path = playwright_browsers_path()
+    return browsers_path.is_dir() and any(browsers_path.glob("chromium-*"))
+
 
 class BrowserUseInput(AgentInput):
     """Input schema for browser operations."""
@@ -15,7 +42,7 @@ class BrowserUseInput(AgentInput):
     )
 
 class BrowserUse(BaseAgent):
-    def __init__(self):
+    def __init__(self, config: Optional[AgentHubConfig] = None):
         description = """
     An agent that emulates human-like web browsing behavior for complex web interactions.
     
@@ -42,76 +69,101 @@ class BrowserUse(BaseAgent):
     is necessary for the task.
     """
         name = "BrowserUse"
-        nest_asyncio.apply()
         task = AgentTask.WEB_BROWSER
-        super().__init__(name, description, task)
+        super().__init__(name, description, task, config)
+        self.pool = BrowserPool(self.config.browser_pool, self._new_browser, self._new_context)
+        # the LLM driven by browser-use runs on the pool's loop: it gets an HTTP client of its own,
+        # the shared ones belong to the graph's loop
+        self._llm = None
+        self._llm_http_client = None
+        self.pool.on_close(self._close_llm)
+
+    def _new_browser(self) -> Browser:
+        pool_config = self.config.browser_pool
+        extra_chromium_args = [f"--js-flags=--max-old-space-size={pool_config.js_heap_mb}"] if pool_config.js_heap_mb else []
+        return Browser(config=BrowserConfig(headless=pool_config.headless, extra_chromium_args=extra_chromium_args))
+
+    @staticmethod
+    def _new_context(browser: Browser) -> BrowserContext:
+        return BrowserContext(browser=browser, config=browser.config.new_context_config)
 
     async def setup(self):
-        """Initialize the browser agent with Mistral LLM."""
+        """Make sure the playwright browser used by browser_use is installed, and launch the pooled browsers."""
         try:
-            # Install playwright browsers if not already installed
-            import subprocess
-            subprocess.run(["playwright", "install"], check=True)
+            if playwright_browsers_installed():
+                print("BrowserUse playwright browsers already installed")
+            else:
+                process = await asyncio.create_subprocess_exec("playwright", "install", "chromium")
+                if await process.wait() != 0:
+                    raise RuntimeError(f"playwright install failed with exit code {process.returncode}")
+            if self.config.browser_pool.warm_on_setup:
+                await asyncio.wrap_future(self.pool.submit(self.pool.start()))
             print("BrowserUse is ready")
         except Exception as e:
             print(f"Error during BrowserUse setup: {e}")
             raise e
 
+    def _pool_llm(self):
+        # only called on the pool's loop
+        if self._llm is None:
+            self._llm, self._llm_http_client = new_llm(*DEFAULT_LLMS["mistral_llm"])
+        return self._llm
+
+    async def _close_llm(self):
+        http_client, self._llm, self._llm_http_client = self._llm_http_client, None, None
+        if http_client is not None:
+            await http_client.aclose()
+
+    async def _browse(self, query: str):
+        # runs on the pool's event loop, in a fresh context of a warm browser
+        async with self.pool.lease() as browser_context:
+            browser_agent = BrowserAgent(
+                task=query,
+                # browser-use drives the chat model itself: the provider client, not a hedged runnable
+                llm=self._pool_llm(),
+                browser=browser_context.browser,
+                browser_context=browser_context,
+            )
+            return await browser_agent.run()
+
     def __call__(self, state: State):
+        """
+        Synchronous entry point: the task runs on the browser pool's event loop.
+        """
         browse_input = BrowserUseInput(**state["next_agent_input"])
-        print(f"Sync BrowserUse is calling the available agents for the task: {browse_input}")
+        print(f"BrowserUse is calling the available agents for the task: {browse_input}")
         try:
-            # Get the current event loop or create a new one
-            try:
-                loop = asyncio.get_event_loop()
-            except RuntimeError:
-                loop = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop)
-            
-            browser_agent = BrowserAgent(
-                task=browse_input.query,
-                llm=mistral_llm
-            )
-            
-            # Run the async code in the event loop
-            result = loop.run_until_complete(browser_agent.run())
-            return {
-                "last_task_status": TaskStatus.SUCCESS,
-                "last_task_output": result,
-                "previous_outputs": ["\n\n**BrowserUse has finished the task with the following output**:\n" + str(result)[:200]]
-            }
+            result = self.pool.submit(self._browse(browse_input.query)).result()
         except Exception as e:
-            print(f"Error executing task: {browse_input.query}. Error: {e}")
-            return {
-                "last_task_status": TaskStatus.FAILURE,
-                "last_task_output": f"Error executing task: {browse_input.query}. Error: {e}",
-                "previous_outputs": [f"\n\n**Error executing task:**\n{browse_input.query}. Error: {e}"]
-            }
-        
-        
+            return self._failure(browse_input, e)
+        return self._success(result)
 
     async def __acall__(self, state: State, **kwargs) -> str:
         browse_input = BrowserUseInput(**state["next_agent_input"])
         print(f"Async BrowserUse is calling the available agents for the task: {browse_input}")
         try:
-            browser_agent = BrowserAgent(
-                task=browse_input.query,
-                llm=mistral_llm
-            )
-            
-            result = await browser_agent.run()
-            return {
-                "last_task_status": TaskStatus.SUCCESS,
-                "last_task_output": result,
-                "previous_outputs": ["\n\n**BrowserUse has finished the task with the following output**:\n" + str(result)[:200]]
-            }
+            # cancelling this call cancels the task on the pool's loop
+            result = await asyncio.wrap_future(self.pool.submit(self._browse(browse_input.query)))
         except Exception as e:
-            print(f"Error executing task: {browse_input.query}. Error: {e}")
-            return {
-                "last_task_status": TaskStatus.FAILURE,
-                "last_task_output": f"Error executing task: {browse_input.query}. Error: {e}",
-                "previous_outputs": [f"\n\n**Error executing task:**\n{browse_input.query}. Error: {e}"]
-            }
+            return self._failure(browse_input, e)
+        return self._success(result)
+
+    @staticmethod
+    def _success(result):
+        return {
+            "last_task_status": TaskStatus.SUCCESS,
+            "last_task_output": result,
+            "previous_outputs": ["\n\n**BrowserUse has finished the task with the following output**:\n" + str(result)[:200]]
+        }
+
+    @staticmethod
+    def _failure(browse_input: BrowserUseInput, e: Exception):
+        print(f"Error executing task: {browse_input.query}. Error: {e}")
+        return {
+            "last_task_status": TaskStatus.FAILURE,
+            "last_task_output": f"Error executing task: {browse_input.query}. Error: {e}",
+            "previous_outputs": [f"\n\n**Error executing task:**\n{browse_input.query}. Error: {e}"]
+        }
         
     def define_input_schema(self) -> type[BrowserUseInput]:
         return BrowserUseInput
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+Pool of warm browsers for the BrowserUse agent.
+
+Launching a browser takes seconds, so the pool launches `BrowserPoolConfig.size` browsers ahead of the tasks
+and each task leases one of them with a fresh (isolated: cookies, storage, pages) browser context, closed when
+the task ends. A browser is replaced by a new one after `max_uses` tasks, when it crashed (disconnected) or when
+its processes use more than `max_memory_mb` of resident memory.
+
+Playwright objects belong to the event loop they were created in, so the pool runs on its own
+`EventLoopThread`: `submit(coroutine)` runs a coroutine there and returns a `concurrent.futures.Future`.
+
+The pool is generic over the browser objects: `browser_factory()` returns a browser with async
+`get_playwright_browser()` (launches it) and `close()`, `context_factory(browser)` an isolated context with
+async `close()` (e.g. browser_use's `Browser` and `BrowserContext`, see `agent_hub.browser.browser_agent`).
+Other resources the tasks use on the pool's loop (e.g. an HTTP client) are registered with `on_close`.
+Launches, lease waits and replacements are recorded in `agent_hub.telemetry` under `browser_pool.*`.
+"""
+import asyncio
+import concurrent.futures
+import os
+import sys
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Coroutine, List, Optional, Set
+from agent_hub.config import BrowserPoolConfig
+from agent_hub.event_loop import EventLoopThread
+from agent_hub.telemetry import telemetry
+
+
+class PooledBrowser:
+    def __init__(self, browser: Any):
+        self.browser = browser
+        self.uses = 0
+
+    @property
+    def playwright_browser(self):
+        return getattr(self.browser, "playwright_browser", None)
+
+    def is_connected(self) -> bool:
+        playwright_browser = self.playwright_browser
+        return playwright_browser is not None and playwright_browser.is_connected()
+
+
+async def browser_memory_mb(playwright_browser) -> Optional[float]:
+    """
+    Resident memory of all the processes of a chromium browser, None when it can't be measured.
+    """
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        session = await playwright_browser.new_browser_cdp_session()
+        try:
+            process_info = await session.send("SystemInfo.getProcessInfo")
+        finally:
+            await session.detach()
+    except Exception:
+        return None
+    page_size = os.sysconf("SC_PAGE_SIZE")
+    total = 0
+    for process in process_info.get("processInfo", []):
+        try:
+            with open(f"/proc/{process['id']}/statm") as statm:
+                total += int(statm.read().split()[1]) * page_size
+        except (OSError, KeyError, ValueError, IndexError):
+            continue
+    return total / (1024 * 1024)
+
+
+class BrowserPool:
+    """
+    Warm browsers leased to one task at a time, each task in its own browser context.
+    """
+    def __init__(self, config: BrowserPoolConfig, browser_factory: Callable[[], Any], context_factory: Callable[[Any], Any]):
+        self.config = config
+        self.browser_factory = browser_factory
+        self.context_factory = context_factory
+        self.loop_thread = EventLoopThread("browser-pool", on_close=self._close)
+        self._idle: Optional[asyncio.Queue] = None
+        # browsers alive or being launched
+        self._browsers = 0
+        self._tasks: Set[asyncio.Task] = set()
+        self._closers: List[Callable[[], Coroutine]] = []
+
+    def on_close(self, closer: Callable[[], Coroutine]):
+        """
+        Register a coroutine function releasing a resource of the pool's loop (e.g. an HTTP client of the tasks),
+        run when the pool is closed.
+        """
+        self._closers.append(closer)
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """
+        Run a coroutine on the pool's event loop (await it with `asyncio.wrap_future`).
+        """
+        return self.loop_thread.submit(coroutine)
+
+    async def _launch(self) -> PooledBrowser:
+        start_time = time.perf_counter()
+        browser = self.browser_factory()
+        try:
+            await browser.get_playwright_browser()
+        except BaseException:
+            await browser.close()
+            raise
+        telemetry.observe("browser_pool.launch_time", time.perf_counter() - start_time)
+        return PooledBrowser(browser)
+
+    async def _add_browser(self):
+        # the caller counted the browser in `_browsers`, so concurrent tasks don't launch more than `size`
+        try:
+            self._idle.put_nowait(await self._launch())
+        except BaseException as e:
+            self._browsers -= 1
+            print(f"Browser pool failed to launch a browser. Error: {e}")
+
+    def _spawn(self, coroutine: Coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def start(self):
+        """
+        Launch the browsers missing to reach the pool size (runs on the pool's loop).
+        """
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        missing = max(0, self.config.size - self._browsers)
+        self._browsers += missing
+        await asyncio.gather(*(self._add_browser() for _ in range(missing)))
+
+    async def _acquire(self) -> PooledBrowser:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        start_time = time.perf_counter()
+        if self._idle.empty() and self._browsers < self.config.size:
+            # not warmed up (yet): launch one for this task
+            self._browsers += 1
+            self._spawn(self._add_browser())
+        pooled = await asyncio.wait_for(self._idle.get(), self.config.lease_timeout)
+        telemetry.observe("browser_pool.lease_wait", time.perf_counter() - start_time)
+        return pooled
+
+    async def _recycle(self, pooled: PooledBrowser, reason: str):
+        print(f"Replacing a pooled browser ({reason}) after {pooled.uses} tasks")
+        telemetry.increment(f"browser_pool.recycled.{reason}")
+        try:
+            await pooled.browser.close()
+        finally:
+            await self._add_browser()
+
+    async def _recycle_reason(self, pooled: PooledBrowser) -> Optional[str]:
+        if not pooled.is_connected():
+            return "crashed"
+        if pooled.uses >= self.config.max_uses:
+            return "max_uses"
+        if self.config.max_memory_mb is not None:
+            memory = await browser_memory_mb(pooled.playwright_browser)
+            if memory is not None:
+                telemetry.observe("browser_pool.memory_mb", memory)
+                if memory > self.config.max_memory_mb:
+                    return "memory"
+        return None
+
+    @asynccontextmanager
+    async def lease(self):
+        """
+        A fresh browser context on a warm browser, for one task (runs on the pool's loop).
+        """
+        pooled = await self._acquire()
+        while not pooled.is_connected():
+            # crashed while idle
+            await self._recycle(pooled, "crashed")
+            pooled = await self._acquire()
+        context = self.context_factory(pooled.browser)
+        try:
+            yield context
+        finally:
+            pooled.uses += 1
+            try:
+                await context.close()
+            except Exception as e:
+                print(f"Failed to close a browser context. Error: {e}")
+            # the next task gets this browser back right away, unless it has to be replaced
+            reason = await self._recycle_reason(pooled)
+            if reason is None:
+                self._idle.put_nowait(pooled)
+            else:
+                self._spawn(self._recycle(pooled, reason))
+
+    async def _close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        while self._idle is not None and not self._idle.empty():
+            await self._idle.get_nowait().browser.close()
+            self._browsers -= 1
+        for closer in self._closers:
+            try:
+                await closer()
+            except Exception as e:
+                print(f"Browser pool failed to release a resource. Error: {e}")
+
+    def close(self):
+        """
+        Close the idle browsers and stop the pool's loop.
+        """
+        self.loop_thread.close()
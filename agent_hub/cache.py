@@ -0,0 +1,236 @@
+"""
+Result caches.
+
+A `TieredCache` looks values up in an ordered list of `CacheBackend`s (typically an
+in-memory LRU in front of an on-disk SQLite store), promotes hits to the faster tiers
+and records hits, misses and the time spent computing misses in `agent_hub.telemetry`.
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+from agent_hub.config import CacheConfig, CacheLayerConfig
+from agent_hub.telemetry import telemetry
+
+MISSING = object()
+
+
+def make_key(*parts: Any) -> str:
+    """
+    Stable cache key from JSON-serializable parts.
+    """
+    serialized = json.dumps(parts, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+
+
+class CacheBackend(ABC):
+    """
+    A storage tier of a `TieredCache`. Values must be JSON-serializable.
+    """
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        """Return the cached value or `MISSING`."""
+
+    @abstractmethod
+    def set(self, key: str, value: Any):
+        pass
+
+    @abstractmethod
+    def delete(self, key: str):
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    LRU cache with a per-entry time to live.
+    """
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < self.clock():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any):
+        expires_at = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Persistent cache stored in a SQLite table, with a time to live and a size budget.
+    When the stored values exceed `max_bytes`, the least recently used entries are evicted.
+    """
+    def __init__(self, path: str, namespace: str, ttl: Optional[float] = None, max_bytes: int = 64 * 1024 * 1024,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.table = "cache_" + "".join(char if char.isalnum() else "_" for char in namespace)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.clock = clock
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+                "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Any:
+        now = self.clock()
+        with self._lock:
+            row = self._connection.execute(
+                f"SELECT value, expires_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return MISSING
+            value, expires_at = row
+            if expires_at < now:
+                self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                return MISSING
+            self._connection.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+        return json.loads(value)
+
+    def set(self, key: str, value: Any):
+        now = self.clock()
+        serialized = json.dumps(value, separators=(",", ":"))
+        expires_at = now + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            self._connection.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, serialized, len(serialized), expires_at, now),
+            )
+            self._evict(now)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._connection.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+
+    def _evict(self, now: float):
+        self._connection.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (now,))
+        total_size = self._connection.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+        rows = self._connection.execute(f"SELECT key, size FROM {self.table} ORDER BY accessed_at ASC").fetchall()
+        evicted = []
+        for key, size in rows:
+            if total_size <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total_size -= size
+        self._connection.executemany(f"DELETE FROM {self.table} WHERE key = ?", evicted)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+
+
+class TieredCache:
+    """
+    Chain of cache backends, fastest first.
+
+    Args:
+        name: Name used for the telemetry counters (`cache.<name>.hit`, `cache.<name>.miss`...)
+        tiers: The backends to look values up in, fastest first
+    """
+    def __init__(self, name: str, tiers: List[CacheBackend]):
+        self.name = name
+        self.tiers = tiers
+
+    def get(self, key: str) -> Any:
+        for index, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not MISSING:
+                # promote the value to the faster tiers
+                for faster_tier in self.tiers[:index]:
+                    faster_tier.set(key, value)
+                telemetry.increment(f"cache.{self.name}.hit")
+                telemetry.increment(f"cache.{self.name}.hit.{type(tier).__name__}")
+                return value
+        telemetry.increment(f"cache.{self.name}.miss")
+        return MISSING
+
+    def set(self, key: str, value: Any):
+        for tier in self.tiers:
+            tier.set(key, value)
+
+    def delete(self, key: str):
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        value = self.get(key)
+        if value is MISSING:
+            start_time = time.perf_counter()
+            value = compute()
+            telemetry.observe(f"cache.{self.name}.miss_latency", time.perf_counter() - start_time)
+            self.set(key, value)
+        return value
+
+    async def aget_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        value = self.get(key)
+        if value is MISSING:
+            start_time = time.perf_counter()
+            value = await compute()
+            telemetry.observe(f"cache.{self.name}.miss_latency", time.perf_counter() - start_time)
+            self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        """
+        Hits, misses, hit rate and the estimated time saved (hits times the mean miss latency).
+        """
+        hits = telemetry.counter(f"cache.{self.name}.hit")
+        misses = telemetry.counter(f"cache.{self.name}.miss")
+        miss_latency = telemetry.snapshot()["observations"].get(f"cache.{self.name}.miss_latency", {})
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "saved_seconds": hits * miss_latency.get("mean", 0.0),
+        }
+
+
+def build_cache(name: str, layer_config: CacheLayerConfig, cache_config: CacheConfig) -> TieredCache:
+    """
+    Build the memory (+ SQLite when `cache_config.path` is set) cache of an operation.
+    A disabled layer gets no tier, so every lookup is a miss.
+    """
+    tiers: List[CacheBackend] = []
+    if layer_config.enabled:
+        tiers.append(MemoryCache(max_entries=layer_config.max_entries, ttl=layer_config.ttl))
+        if cache_config.path:
+            tiers.append(SQLiteCache(cache_config.path, name, ttl=layer_config.ttl, max_bytes=cache_config.max_disk_bytes))
+    return TieredCache(name, tiers)
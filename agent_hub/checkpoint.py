@@ -0,0 +1,303 @@
+"""
+Durable checkpoints of graph runs, keyed by thread (session) id.
+
+`SQLiteCheckpointer` persists the graph state in a local SQLite file after every step. Checkpoints are
+incremental: like LangGraph's in-memory saver, each channel value is stored once per version, so a step
+only writes the channels it updated (e.g. the new task results, not the whole conversation again), using
+LangGraph's compact msgpack serializer. Agent outputs of a step are saved as soon as each agent finishes,
+so a resumed run (`resume`/`aresume`) never executes a completed task again.
+Write latency and size are recorded in `agent_hub.telemetry` (`checkpoint.write_latency`, `checkpoint.write_bytes`).
+"""
+import asyncio
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Sequence, Tuple
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+from agent_hub.config import CheckpointConfig
+from agent_hub.telemetry import telemetry
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT NOT NULL,
+    checkpoint BLOB NOT NULL,
+    metadata_type TEXT NOT NULL,
+    metadata BLOB NOT NULL,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS blobs (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    version TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, channel, version)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL,
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT NOT NULL,
+    blob BLOB,
+    task_path TEXT NOT NULL DEFAULT '',
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+"""
+
+
+def thread_config(thread_id: str, **configurable: Any) -> Dict:
+    """
+    Run config of a thread (session), to pass to `invoke`/`astream` on a checkpointed graph.
+    """
+    return {"configurable": {"thread_id": thread_id, **configurable}}
+
+
+class SQLiteCheckpointer(BaseCheckpointSaver[str]):
+    """
+    Incremental LangGraph checkpointer backed by a local SQLite file (WAL mode, thread safe).
+    The async methods run the (short) SQLite operations in a worker thread.
+
+    Args:
+        path: SQLite file (":memory:" for tests)
+    """
+    def __init__(self, path: str = ".cache/checkpoints.sqlite", serde=None):
+        super().__init__(serde=serde)
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        # durable across process crashes, only an OS crash can lose the last steps
+        self._connection.execute("PRAGMA synchronous=NORMAL")
+        self._connection.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def _execute(self, query: str, parameters: Sequence = ()) -> list:
+        with self._lock:
+            return self._connection.execute(query, parameters).fetchall()
+
+    def _load_blobs(self, thread_id: str, checkpoint_ns: str, versions: ChannelVersions) -> Dict[str, Any]:
+        values = {}
+        for channel, version in versions.items():
+            rows = self._execute(
+                "SELECT type, blob FROM blobs WHERE thread_id = ? AND checkpoint_ns = ? AND channel = ? AND version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            )
+            if rows and rows[0][0] != "empty":
+                values[channel] = self.serde.loads_typed((rows[0][0], rows[0][1]))
+        return values
+
+    def _pending_writes(self, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> list:
+        rows = self._execute(
+            "SELECT task_id, idx, channel, type, blob, task_path FROM writes WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        )
+        rows.sort(key=lambda row: writes_sort_key(row[5], row[0], row[1]))
+        return [(task_id, channel, self.serde.loads_typed((type_, blob))) for task_id, _, channel, type_, blob, _ in rows]
+
+    def _to_tuple(self, thread_id: str, checkpoint_ns: str, row: Tuple) -> CheckpointTuple:
+        checkpoint_id, parent_checkpoint_id, type_, checkpoint_blob, metadata_type, metadata_blob = row
+        checkpoint = self.serde.loads_typed((type_, checkpoint_blob))
+        return CheckpointTuple(
+            config=thread_config(thread_id, checkpoint_ns=checkpoint_ns, checkpoint_id=checkpoint_id),
+            checkpoint={**checkpoint, "channel_values": self._load_blobs(thread_id, checkpoint_ns, checkpoint["channel_versions"])},
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                thread_config(thread_id, checkpoint_ns=checkpoint_ns, checkpoint_id=parent_checkpoint_id)
+                if parent_checkpoint_id else None
+            ),
+            pending_writes=self._pending_writes(thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        columns = "checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+        if checkpoint_id := get_checkpoint_id(config):
+            rows = self._execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                (thread_id, checkpoint_ns, checkpoint_id),
+            )
+        else:
+            rows = self._execute(
+                f"SELECT {columns} FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? ORDER BY checkpoint_id DESC LIMIT 1",
+                (thread_id, checkpoint_ns),
+            )
+        return self._to_tuple(thread_id, checkpoint_ns, rows[0]) if rows else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata FROM checkpoints"
+        conditions, parameters = [], []
+        if config:
+            conditions.append("thread_id = ?")
+            parameters.append(str(config["configurable"]["thread_id"]))
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                conditions.append("checkpoint_ns = ?")
+                parameters.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                conditions.append("checkpoint_id = ?")
+                parameters.append(checkpoint_id)
+        if before and (before_checkpoint_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            parameters.append(before_checkpoint_id)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY checkpoint_id DESC"
+        for row in self._execute(query, parameters):
+            checkpoint_tuple = self._to_tuple(row[0], row[1], row[2:])
+            if filter and not all(checkpoint_tuple.metadata.get(key) == value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    break
+                limit -= 1
+            yield checkpoint_tuple
+
+    def put(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        start_time = time.perf_counter()
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        checkpoint = checkpoint.copy()
+        values = checkpoint.pop("channel_values")
+        # only the channels updated by this step are written
+        blobs = [
+            (thread_id, checkpoint_ns, channel, str(version), *(self.serde.dumps_typed(values[channel]) if channel in values else ("empty", None)))
+            for channel, version in new_versions.items()
+        ]
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        with self._lock, self._connection:
+            self._connection.executemany("INSERT OR REPLACE INTO blobs VALUES (?, ?, ?, ?, ?, ?)", blobs)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (thread_id, checkpoint_ns, checkpoint["id"], config["configurable"].get("checkpoint_id"),
+                 checkpoint_type, checkpoint_blob, metadata_type, metadata_blob),
+            )
+        written_bytes = len(checkpoint_blob) + len(metadata_blob) + sum(len(blob[-1] or b"") for blob in blobs)
+        telemetry.observe("checkpoint.write_latency", time.perf_counter() - start_time)
+        telemetry.observe("checkpoint.write_bytes", written_bytes)
+        return thread_config(thread_id, checkpoint_ns=checkpoint_ns, checkpoint_id=checkpoint["id"])
+
+    def put_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        start_time = time.perf_counter()
+        thread_id = str(config["configurable"]["thread_id"])
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for index, (channel, value) in enumerate(writes):
+            write_index = WRITES_IDX_MAP.get(channel, index)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, write_index, channel, *self.serde.dumps_typed(value), task_path))
+        # special writes (errors, interrupts...) replace the previous ones, regular writes are only saved once
+        statement = "INSERT OR REPLACE" if all(channel in WRITES_IDX_MAP for channel, _ in writes) else "INSERT OR IGNORE"
+        with self._lock, self._connection:
+            self._connection.executemany(f"{statement} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        telemetry.observe("checkpoint.write_latency", time.perf_counter() - start_time)
+        telemetry.observe("checkpoint.write_bytes", sum(len(row[7] or b"") for row in rows))
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._connection:
+            for table in ("checkpoints", "blobs", "writes"):
+                self._connection.execute(f"DELETE FROM {table} WHERE thread_id = ?", (str(thread_id),))
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        checkpoint_tuples = await asyncio.to_thread(lambda: list(self.list(config, filter=filter, before=before, limit=limit)))
+        for checkpoint_tuple in checkpoint_tuples:
+            yield checkpoint_tuple
+
+    async def aput(self, config: RunnableConfig, checkpoint: Checkpoint, metadata: CheckpointMetadata, new_versions: ChannelVersions) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(self, config: RunnableConfig, writes: Sequence[Tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        # same version format as LangGraph's savers: zero padded counter (sortable) and a random suffix
+        if current is None:
+            current_version = 0
+        elif isinstance(current, int):
+            current_version = current
+        else:
+            current_version = int(current.split(".")[0])
+        return f"{current_version + 1:032}.{random.random():016}"
+
+
+_checkpointers: Dict[str, SQLiteCheckpointer] = {}
+_checkpointers_lock = threading.Lock()
+
+
+def build_checkpointer(config: CheckpointConfig) -> Optional[SQLiteCheckpointer]:
+    """
+    Shared checkpointer of a SQLite file (None when checkpointing is disabled).
+    """
+    if not config.enabled:
+        return None
+    with _checkpointers_lock:
+        if config.path not in _checkpointers:
+            _checkpointers[config.path] = SQLiteCheckpointer(config.path)
+        return _checkpointers[config.path]
+
+
+def has_pending_run(graph, thread_id: str) -> bool:
+    """
+    Whether the last run of a thread was interrupted (crash, timeout, deploy) before reaching the end.
+    """
+    return bool(graph.get_state(thread_config(thread_id)).next)
+
+
+def resume(graph, thread_id: str):
+    """
+    Resume an interrupted run from its last checkpoint: the tasks that already completed aren't run again.
+    """
+    return graph.invoke(None, thread_config(thread_id))
+
+
+async def aresume(graph, thread_id: str):
+    """
+    Async version of `resume`.
+    """
+    return await graph.ainvoke(None, thread_config(thread_id))
@@ -1,13 +1,16 @@
 from agent_hub.agent import Agent, AgentTask, AgentInput
 from pydantic import Field
-import time
 from agent_hub.plan import TaskStatus
 from agent_hub.state import State
-from agent_hub.cli.cli_generator import generate_cli_command
-import subprocess
-import logging
+from agent_hub.cli.cli_generator import generate_cli_command, agenerate_cli_command, is_valid_command, record_cli_command
+from agent_hub.cli.executor import CommandResult, arun_command, run_command
+from agent_hub.cli.shell import ShellSessions
+from agent_hub.cache import build_cache
 import os
 from pathlib import Path
+from typing import Optional
+from langchain_core.runnables.config import ensure_config
+from agent_hub.config import AgentHubConfig
 
 class CLIAgentInput(AgentInput):
     """
@@ -18,7 +21,7 @@ class CLIAgentInput(AgentInput):
     )
 
 class CLIAgent(Agent):
-    def __init__(self):
+    def __init__(self, config: Optional[AgentHubConfig] = None):
         description = """
         An agent specialized in executing CLI operations and file management tasks. 
         Can understand natural language descriptions and generate appropriate shell commands.
@@ -26,63 +29,82 @@ class CLIAgent(Agent):
         """
         name = "CLIAgent"
         task = AgentTask.CLI_COMMAND
-        super().__init__(name, description, task)
+        super().__init__(name, description, task, config)
+        # commands that worked, reused for the same operations instead of an LLM call
+        self.command_cache = build_cache("cli_command", self.config.cache.cli_command, self.config.cache)
         
         # Set project root
         self.project_root = Path(__file__).parent.parent.parent
         os.chdir(self.project_root)
+        # one long-lived shell per session instead of a shell per command
+        self.shells = ShellSessions(self.config.cli, cwd=str(self.project_root)) if self.config.cli.persistent_shell else None
 
     def define_input_schema(self)->type[CLIAgentInput]:
         return CLIAgentInput
 
+    @staticmethod
+    def _command_failed(command: str, result: Optional[CommandResult] = None):
+        details = result.to_prompt() if result is not None else command
+        return {"last_task_status": TaskStatus.FAILURE,
+                "last_task_output": f"CLIAgent failed to execute the command: {details}",
+                "previous_outputs": [f"\n\n**CLIAgent failed to execute the command:**\n{details}"]}
+
+    @staticmethod
+    def _operation_succeeded(operation: str, result: CommandResult):
+        return {"last_task_status": TaskStatus.SUCCESS,
+                "last_task_output": f"CLIAgent has finished the task: {operation}\n{result.to_prompt()}",
+                "previous_outputs": [f"\n\n**CLIAgent has finished the task:**\n{operation}\n{result.to_prompt()}"]}
+
+    @staticmethod
+    def _session_id() -> Optional[str]:
+        # the graph thread the agent runs in
+        return ensure_config().get("configurable", {}).get("thread_id")
+
+    async def _arun(self, command: str) -> CommandResult:
+        if self.shells is not None:
+            return await self.shells.arun(self._session_id(), command)
+        return await arun_command(command, self.config.cli, cwd=str(self.project_root))
+
+    def _run(self, command: str) -> CommandResult:
+        if self.shells is not None:
+            return self.shells.run(self._session_id(), command)
+        return run_command(command, self.config.cli, cwd=str(self.project_root))
+
+    def _finish(self, operation: str, command: str, result: Optional[CommandResult]):
+        succeeded = result is not None and result.succeeded
+        record_cli_command(self.command_cache, operation, command, succeeded)
+        if not succeeded:
+            return self._command_failed(command, result)
+        print(f"Executed command: {command}")
+        return self._operation_succeeded(operation, result)
+
     async def __acall__(self, state: State, **kwargs) -> str:
         """
         Translates the high-level operation description into appropriate CLI commands
-        and executes them safely
+        and executes them without blocking the event loop.
         """
-        print(f"CLIAgent processing operation: {state['next_agent_input'].operation}")
-        time.sleep(2)
-        
-        # TODO: Implement command generation logic using LLM
-        # This would analyze the operation description and generate appropriate shell commands
-        # Example:
-        # if "create directory" in input.operation.lower():
-        #     command = f"mkdir {parsed_directory_name}"
-        # elif "list files" in input.operation.lower():
-        #     command = "ls -la"
-        
-        # TODO: Implement safe command execution
-        # This would include:
-        # - Validation of generated commands
-        # - Security checks
-        # - Actual execution using subprocess or similar
-        # - Error handling
         cli_input = CLIAgentInput(**state["next_agent_input"])
-        print(f"CLIAgent has finished the task: {cli_input.operation}")
-        return {"last_task_status": TaskStatus.SUCCESS,
-                "last_task_output": f"CLIAgent has finished the task: {cli_input.operation}",
-                "previous_outputs": [f"\n\n**CLIAgent has finished the task:**\n{cli_input.operation}"]}
+        print(f"Processing CLI operation: {cli_input.operation}")
+        command = await agenerate_cli_command(cli_input.operation, cache=self.command_cache)
+        result = None
+        if is_valid_command(command):
+            try:
+                result = await self._arun(command)
+            except OSError as e:
+                print(f"Failed to start the command: {command}. Error: {e}")
+        return self._finish(cli_input.operation, command, result)
 
     def __call__(self, state: State):
         cli_input = CLIAgentInput(**state["next_agent_input"])
         print(f"Processing CLI operation: {cli_input.operation}")
-        command = generate_cli_command(cli_input.operation)
-        try:
-            output = run_command(command)
-            if not output:
-                return {"last_task_status": TaskStatus.FAILURE,
-                        "last_task_output": f"CLIAgent failed to execute the command: {command}",
-                        "previous_outputs": [f"\n\n**CLIAgent failed to execute the command:**\n{command}"]}
-        except Exception as e:
-            return {"last_task_status": TaskStatus.FAILURE,
-                    "last_task_output": f"CLIAgent failed to execute the command: {command}",
-                    "previous_outputs": [f"\n\n**CLIAgent failed to execute the command:**\n{command}"]}
-        
-        print(f"Executed command: {command}")
-        
-        return {"last_task_status": TaskStatus.SUCCESS,
-                "last_task_output": f"CLIAgent has finished the task: {cli_input.operation}",
-                "previous_outputs": [f"\n\n**CLIAgent has finished the task:**\n{cli_input.operation}"]}
+        command = generate_cli_command(cli_input.operation, cache=self.command_cache)
+        result = None
+        if is_valid_command(command):
+            try:
+                result = self._run(command)
+            except OSError as e:
+                print(f"Failed to start the command: {command}. Error: {e}")
+        return self._finish(cli_input.operation, command, result)
 
     async def setup(self):
         """
@@ -93,27 +115,3 @@ class CLIAgent(Agent):
         # - Set up command execution environment
         # - Verify necessary permissions
         # - Initialize command templates/patterns
-
-
-
-def run_command(command):
-    """Run a command and log output"""
-    try:
-        process = subprocess.run(
-            command,
-            check=True,
-            text=True,
-            capture_output=True,
-            shell=True
-        )
-        logging.info(process.stdout)
-        if process.stderr:
-            logging.error(process.stderr)
-        return True
-    except subprocess.CalledProcessError as e:
-        logging.error(f"Error running command: {e}")
-        if e.output:
-            logging.error(e.output)
-        if e.stderr:
-            logging.error(e.stderr)
-        return False
\ No newline at end of file
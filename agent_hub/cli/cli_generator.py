@@ -1,21 +1,96 @@
-from agent_hub.llms import mistral_llm, groq_llm
+import re
+import time
+from typing import Optional
+from agent_hub.cache import MISSING, TieredCache, make_key
+from agent_hub.llms import get_structured_llm, DEFAULT_LLMS
+from agent_hub.telemetry import telemetry
 from pydantic import BaseModel
 
 class CLICommand(BaseModel):
     command: str
     description: str
 
-def generate_cli_command(user_input: str, model:str="best", platform:str="windows"):
-    if model == "best":
-        llm = mistral_llm
-    elif model == "fine-tuned":
-        llm = groq_llm
-    else:
+# model flavor -> (provider, model)
+MODEL_FLAVORS = {
+    "best": DEFAULT_LLMS["mistral_llm"],
+    "fine-tuned": DEFAULT_LLMS["groq_llm"],
+}
+
+# Politeness at the start of an operation, which doesn't change the command asked for.
+# Nothing else is dropped: any other word can be an argument of the command (`mkdir a`, `echo just`)
+POLITE_PREFIX = re.compile(r"^(?:(?:please|kindly|(?:can|could|would) you)\s+)+", re.IGNORECASE)
+
+def normalize_operation(operation: str) -> str:
+    """
+    Cache form of an operation: whitespace, trailing punctuation, leading politeness and the capital of the
+    first word don't matter. The other words are kept as they are, they can be arguments or file names.
+    """
+    operation = POLITE_PREFIX.sub("", " ".join(operation.strip().rstrip(".!?;").split()))
+    words = operation.split()
+    if words:
+        words[0] = words[0].lower()
+    return " ".join(words)
+
+def command_cache_key(user_input: str, model: str, platform: str) -> str:
+    return make_key(normalize_operation(user_input), platform, model)
+
+def is_valid_command(command: Optional[str]) -> bool:
+    return bool(command and command.strip())
+
+def _command_llm_and_prompt(user_input: str, model: str, platform: str):
+    if model not in MODEL_FLAVORS:
         raise ValueError(f"Unsupported model: {model}")
-    llm = llm.with_structured_output(CLICommand)
+    llm = get_structured_llm(CLICommand, *MODEL_FLAVORS[model])
     prompt = f"""
     You are a CLI command generator. You are given a user input and you need to generate a CLI command that can be executed on a command line interface.
     Platform: {platform}
     User Input: {user_input}
     """
-    return llm.invoke(prompt).command
\ No newline at end of file
+    return llm, prompt
+
+def _cached_command(cache: Optional[TieredCache], user_input: str, model: str, platform: str) -> Optional[str]:
+    if cache is None:
+        return None
+    command = cache.get(command_cache_key(user_input, model, platform))
+    return None if command is MISSING else command
+
+def _record_generation(cache: Optional[TieredCache], start_time: float):
+    # the generation time is what a later hit saves (see `TieredCache.stats`)
+    if cache is not None:
+        telemetry.observe(f"cache.{cache.name}.miss_latency", time.perf_counter() - start_time)
+
+def generate_cli_command(user_input: str, model:str="best", platform:str="windows", cache: Optional[TieredCache] = None):
+    """
+    Generate the command of an operation, or reuse the command that worked for the same (normalized) operation.
+    Generated commands are only cached once they ran successfully, see `record_cli_command`.
+    """
+    command = _cached_command(cache, user_input, model, platform)
+    if command is not None:
+        return command
+    start_time = time.perf_counter()
+    llm, prompt = _command_llm_and_prompt(user_input, model, platform)
+    command = llm.invoke(prompt).command
+    _record_generation(cache, start_time)
+    return command
+
+async def agenerate_cli_command(user_input: str, model:str="best", platform:str="windows", cache: Optional[TieredCache] = None):
+    command = _cached_command(cache, user_input, model, platform)
+    if command is not None:
+        return command
+    start_time = time.perf_counter()
+    llm, prompt = _command_llm_and_prompt(user_input, model, platform)
+    command = (await llm.ainvoke(prompt)).command
+    _record_generation(cache, start_time)
+    return command
+
+def record_cli_command(cache: Optional[TieredCache], user_input: str, command: str, succeeded: bool, model: str = "best", platform: str = "windows"):
+    """
+    Cache a command that ran successfully, forget one that failed (invalid or failing commands are never reused).
+    """
+    if cache is None:
+        return
+    key = command_cache_key(user_input, model, platform)
+    if succeeded and is_valid_command(command):
+        cache.set(key, command)
+    else:
+        cache.delete(key)
@@ -0,0 +1,187 @@
+"""
+Async execution of shell commands for the CLI agent.
+
+Commands run as asyncio subprocesses, so a long command doesn't block the event loop (and the other
+sessions of the process). Their output (stdout and stderr, interleaved) is read as it is produced:
+the last `CLIConfig.output_tail_bytes` are kept in memory, and once the output outgrows them all of it
+is written to a file under `spill_dir` (the newest `spill_retention` files are kept). A command running longer than its timeout, or whose caller is
+cancelled, is killed with its whole process group.
+Run times are recorded in `agent_hub.telemetry` as `cli.command_time`, timeouts as `cli.timeout`.
+"""
+import asyncio
+import os
+import signal
+import sys
+import tempfile
+import time
+from collections import deque
+from pathlib import Path
+from typing import BinaryIO, Callable, Deque, Optional
+from pydantic import BaseModel
+from agent_hub.config import CLIConfig
+from agent_hub.telemetry import telemetry
+
+_READ_SIZE = 64 * 1024
+
+
+class CommandResult(BaseModel):
+    command: str
+    exit_code: Optional[int] = None
+    output: str = ""
+    truncated: bool = False
+    output_path: Optional[str] = None
+    timed_out: bool = False
+    duration: float = 0.0
+
+    @property
+    def succeeded(self) -> bool:
+        return self.exit_code == 0 and not self.timed_out
+
+    def to_prompt(self) -> str:
+        """
+        The command and its output as given to the next agents.
+        """
+        status = f"timed out after {self.duration:.0f}s" if self.timed_out else f"exit code {self.exit_code}"
+        lines = [f"$ {self.command}", f"({status})"]
+        if self.truncated:
+            lines.append(f"[output truncated to its end, full output in {self.output_path}]" if self.output_path else "[output truncated to its end]")
+        if self.output:
+            lines.append(self.output.rstrip())
+        return "\n".join(lines)
+
+
+class OutputCollector:
+    """
+    Keeps the tail of an output in memory, and the whole output in a file once it outgrows the tail.
+    """
+    def __init__(self, tail_bytes: int, spill_dir: Optional[str] = None, spill_retention: int = 50):
+        self.tail_bytes = tail_bytes
+        self.spill_dir = spill_dir
+        self.spill_retention = spill_retention
+        self.size = 0
+        self._chunks: Deque[bytes] = deque()
+        self._tail_size = 0
+        self._spill: Optional[BinaryIO] = None
+
+    def add(self, chunk: bytes):
+        self.size += len(chunk)
+        if self._spill is None and self.size > self.tail_bytes and self.spill_dir:
+            Path(self.spill_dir).mkdir(parents=True, exist_ok=True)
+            self._spill = tempfile.NamedTemporaryFile(dir=self.spill_dir, prefix="command-", suffix=".log", delete=False)
+            # the whole output is still in memory at this point
+            self._spill.writelines(self._chunks)
+        if self._spill is not None:
+            self._spill.write(chunk)
+        self._chunks.append(chunk)
+        self._tail_size += len(chunk)
+        while self._tail_size - len(self._chunks[0]) >= self.tail_bytes:
+            self._tail_size -= len(self._chunks.popleft())
+
+    @property
+    def truncated(self) -> bool:
+        return self.size > self.tail_bytes
+
+    @property
+    def path(self) -> Optional[str]:
+        return self._spill.name if self._spill is not None else None
+
+    def tail(self) -> str:
+        data = b"".join(self._chunks)[-self.tail_bytes:]
+        return data.decode("utf-8", errors="replace")
+
+    def close(self):
+        if self._spill is not None:
+            self._spill.close()
+            prune_spill_files(self.spill_dir, self.spill_retention, current=self._spill.name)
+
+
+def prune_spill_files(spill_dir: str, keep: int, current: Optional[str] = None):
+    """
+    Delete the oldest output files of a spill directory, keeping the newest `keep` (`current` among them).
+    """
+    files = []
+    for path in Path(spill_dir).glob("command-*.log"):
+        try:
+            files.append((str(path) == current, path.stat().st_mtime_ns, path))
+        except OSError:
+            continue
+    files.sort(reverse=True)
+    for _, _, path in files[keep:]:
+        try:
+            path.unlink()
+        except OSError:
+            pass
+
+
+def _kill(process: asyncio.subprocess.Process):
+    if process.returncode is not None:
+        return
+    try:
+        if sys.platform == "win32":
+            process.kill()
+        else:
+            # the shell's children too
+            os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+
+
+async def arun_command(command: str, config: Optional[CLIConfig] = None, timeout: Optional[float] = None,
+                       cwd: Optional[str] = None, on_output: Optional[Callable[[str], None]] = None) -> CommandResult:
+    """
+    Run a shell command without blocking the event loop.
+
+    Args:
+        command: The shell command
+        config: Output capture settings (and default timeout)
+        timeout: Seconds before the command is killed, defaults to `config.timeout`
+        cwd: Working directory of the command
+        on_output: Called with every chunk of output as it is produced
+
+    Returns:
+        The exit code (None if it was killed) and the tail of the output
+    """
+    config = config or CLIConfig()
+    timeout = config.timeout if timeout is None else timeout
+    collector = OutputCollector(config.output_tail_bytes, config.spill_dir, config.spill_retention)
+    start_time = time.perf_counter()
+    process = await asyncio.create_subprocess_shell(
+        command, cwd=cwd, stdin=asyncio.subprocess.DEVNULL, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+        # own process group, so that a kill reaches the processes started by the shell
+        start_new_session=sys.platform != "win32",
+    )
+    timed_out = False
+    try:
+        async with asyncio.timeout(timeout):
+            while chunk := await process.stdout.read(_READ_SIZE):
+                collector.add(chunk)
+                if on_output is not None:
+                    on_output(chunk.decode("utf-8", errors="replace"))
+            await process.wait()
+    except TimeoutError:
+        timed_out = True
+        telemetry.increment("cli.timeout")
+        print(f"Command timed out after {timeout}s, killing it: {command}")
+    finally:
+        # on timeout, and when the caller is cancelled
+        _kill(process)
+        await asyncio.shield(process.wait())
+        collector.close()
+    duration = time.perf_counter() - start_time
+    telemetry.observe("cli.command_time", duration)
+    return CommandResult(
+        command=command,
+        exit_code=None if timed_out else process.returncode,
+        output=collector.tail(),
+        truncated=collector.truncated,
+        output_path=collector.path,
+        timed_out=timed_out,
+        duration=duration,
+    )
+
+
+def run_command(command: str, config: Optional[CLIConfig] = None, timeout: Optional[float] = None, cwd: Optional[str] = None) -> CommandResult:
+    """
+    Synchronous version of `arun_command` (not to be called from inside a running event loop).
+    """
+    return asyncio.run(arun_command(command, config, timeout, cwd))
@@ -0,0 +1,226 @@
+"""
+Persistent shell sessions for the CLI agent.
+
+Instead of a new shell per command (see `agent_hub.cli.executor`), each session (graph thread) gets one
+long-lived shell the commands are written to, one after the other. The working directory and the
+environment carry over from one command to the next, and no process is spawned per command.
+
+Protocol: each command runs as a `{ ...; }` group reading from /dev/null (so it can't consume the following
+input), then the shell prints a sentinel line with the command's exit code. The output up to the sentinel
+is the command's output, captured like the executor's (tail in memory, spill to file). A command that
+doesn't finish within its timeout (e.g. waiting for an unclosed quote) gets its shell killed, and the next
+command of the session starts a new one. A command exiting the shell ends the session the same way.
+
+The shells live on their own `EventLoopThread`, serving the sync and async callers.
+Shell starts are counted in `agent_hub.telemetry` as `cli.shell.started`.
+"""
+import asyncio
+import os
+import signal
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional, Set
+from agent_hub.cli.executor import CommandResult, OutputCollector
+from agent_hub.config import CLIConfig
+from agent_hub.event_loop import EventLoopThread
+from agent_hub.telemetry import telemetry
+
+_READ_SIZE = 64 * 1024
+
+
+class ShellSession:
+    """
+    A long-lived shell running one command at a time.
+    """
+    def __init__(self, config: CLIConfig, cwd: Optional[str] = None):
+        self.config = config
+        self.cwd = cwd
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.sentinel = f"__agent_hub_done_{uuid.uuid4().hex}__"
+        self._marker = f"\n{self.sentinel} ".encode()
+        self._lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    @property
+    def busy(self) -> bool:
+        """
+        Whether a command is running (or waiting to run) in the shell.
+        """
+        return self._lock.locked()
+
+    async def _start(self):
+        self.process = await asyncio.create_subprocess_exec(
+            self.config.shell, cwd=self.cwd,
+            stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            # own process group, so that a kill reaches the processes started by the shell
+            start_new_session=True,
+        )
+        telemetry.increment("cli.shell.started")
+
+    def _script(self, command: str) -> bytes:
+        return f"{{ {command}\n}} < /dev/null 2>&1\nprintf '\\n%s %d\\n' '{self.sentinel}' \"$?\"\n".encode()
+
+    async def _read_output(self, collector: OutputCollector, on_output: Optional[Callable[[str], None]]) -> Optional[int]:
+        """
+        Collect the output up to the sentinel and return the exit code, None if the shell exited.
+        """
+        def emit(data: bytes):
+            if data:
+                collector.add(data)
+                if on_output is not None:
+                    on_output(data.decode("utf-8", errors="replace"))
+
+        buffer = b""
+        while True:
+            chunk = await self.process.stdout.read(_READ_SIZE)
+            if not chunk:
+                emit(buffer)
+                return None
+            buffer += chunk
+            index = buffer.find(self._marker)
+            if index >= 0:
+                emit(buffer[:index])
+                rest = buffer[index + len(self._marker):]
+                while b"\n" not in rest:
+                    chunk = await self.process.stdout.read(_READ_SIZE)
+                    if not chunk:
+                        return None
+                    rest += chunk
+                return int(rest.split(b"\n", 1)[0])
+            # keep what could be the start of the sentinel
+            keep = len(self._marker) - 1
+            if len(buffer) > keep:
+                emit(buffer[:-keep])
+                buffer = buffer[-keep:]
+
+    async def _kill(self):
+        if not self.alive:
+            return
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        await asyncio.shield(self.process.wait())
+
+    async def run(self, command: str, timeout: Optional[float] = None, on_output: Optional[Callable[[str], None]] = None) -> CommandResult:
+        """
+        Run a command in the shell (started first if needed), after the commands already waiting.
+        """
+        timeout = self.config.timeout if timeout is None else timeout
+        async with self._lock:
+            if not self.alive:
+                await self._start()
+            collector = OutputCollector(self.config.output_tail_bytes, self.config.spill_dir, self.config.spill_retention)
+            start_time = time.perf_counter()
+            timed_out = False
+            try:
+                self.process.stdin.write(self._script(command))
+                async with asyncio.timeout(timeout):
+                    await self.process.stdin.drain()
+                    exit_code = await self._read_output(collector, on_output)
+                if exit_code is None:
+                    # the command exited the shell
+                    exit_code = await self.process.wait()
+            except TimeoutError:
+                timed_out, exit_code = True, None
+                telemetry.increment("cli.timeout")
+                print(f"Command timed out after {timeout}s, restarting its shell: {command}")
+                await self._kill()
+            except BaseException:
+                # cancelled (or the shell died): its state is unknown, the next command gets a new one
+                await self._kill()
+                raise
+            finally:
+                collector.close()
+        duration = time.perf_counter() - start_time
+        telemetry.observe("cli.command_time", duration)
+        return CommandResult(
+            command=command,
+            exit_code=exit_code,
+            output=collector.tail(),
+            truncated=collector.truncated,
+            output_path=collector.path,
+            timed_out=timed_out,
+            duration=duration,
+        )
+
+    async def close(self, timeout: float = 2.0):
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.write(b"exit\n")
+            await asyncio.wait_for(self.process.wait(), timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        await self._kill()
+
+
+class ShellSessions:
+    """
+    One `ShellSession` per session id, at most `CLIConfig.max_shell_sessions` (least recently used idle one closed
+    first; while all the others are running a command the limit is exceeded, until one of them is idle again).
+    """
+    def __init__(self, config: CLIConfig, cwd: Optional[str] = None):
+        self.config = config
+        self.cwd = cwd
+        self._sessions: "OrderedDict[str, ShellSession]" = OrderedDict()
+        self._closing: Set[asyncio.Task] = set()
+        self.loop_thread = EventLoopThread("cli-shells", on_close=self._close_all)
+
+    def _closed(self, task: asyncio.Task):
+        self._closing.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"Failed to close an evicted shell session. Error: {task.exception()}")
+
+    def _evict(self, keep: str):
+        for session_id in list(self._sessions):
+            if len(self._sessions) <= self.config.max_shell_sessions:
+                return
+            session = self._sessions[session_id]
+            if session_id == keep or session.busy:
+                continue
+            del self._sessions[session_id]
+            task = asyncio.ensure_future(session.close())
+            self._closing.add(task)
+            task.add_done_callback(self._closed)
+
+    async def _run(self, session_id: str, command: str, timeout: Optional[float]) -> CommandResult:
+        if session_id not in self._sessions:
+            self._sessions[session_id] = ShellSession(self.config, self.cwd)
+        self._sessions.move_to_end(session_id)
+        self._evict(keep=session_id)
+        return await self._sessions[session_id].run(command, timeout)
+
+    async def arun(self, session_id: Optional[str], command: str, timeout: Optional[float] = None) -> CommandResult:
+        """
+        Run a command in the shell of a session (the default session's without id).
+        """
+        return await asyncio.wrap_future(self.loop_thread.submit(self._run(session_id or "default", command, timeout)))
+
+    def run(self, session_id: Optional[str], command: str, timeout: Optional[float] = None) -> CommandResult:
+        return self.loop_thread.submit(self._run(session_id or "default", command, timeout)).result()
+
+    async def _close_session(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            await session.close()
+
+    def close_session(self, session_id: str):
+        """
+        Tear down the shell of a session (a later command starts a new one).
+        """
+        self.loop_thread.submit(self._close_session(session_id)).result()
+
+    async def _close_all(self):
+        sessions, self._sessions = list(self._sessions.values()), OrderedDict()
+        await asyncio.gather(*(session.close() for session in sessions), *self._closing, return_exceptions=True)
+
+    def close(self):
+        """
+        Tear down every shell and stop their loop.
+        """
+        self.loop_thread.close()
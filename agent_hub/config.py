@@ -0,0 +1,326 @@
+from typing import Annotated, Dict, List, Literal, Optional, Tuple
+import json
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class HTTPConfig(BaseModel):
+    """
+    Connection pool and timeout settings of a shared HTTP client (see `agent_hub.transport`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    max_connections: int = Field(default=100, description="Maximum number of concurrent connections per upstream service")
+    max_keepalive_connections: int = Field(default=20, description="Maximum number of idle connections kept alive per upstream service")
+    keepalive_expiry: float = Field(default=30.0, description="Seconds an idle connection is kept in the pool")
+    connect_timeout: float = Field(default=5.0, description="Seconds to wait for a connection to be established")
+    read_timeout: float = Field(default=30.0, description="Seconds to wait for data (also used for write and pool timeouts)")
+    http2: bool = Field(default=True, description="Use HTTP/2 when the `h2` package is installed")
+
+
+class CacheLayerConfig(BaseModel):
+    """
+    Settings of one cached operation.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = True
+    ttl: float = Field(default=3600.0, description="Seconds a cached result stays valid")
+    max_entries: int = Field(default=1024, description="Maximum number of entries in the in-memory LRU tier")
+
+
+class CacheConfig(BaseModel):
+    """
+    Result caches of the web searcher and of the CLI command generation.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    path: Optional[str] = Field(default=".cache/nexus_agents.sqlite", description="SQLite file of the on-disk tier (None to keep results in memory only)")
+    max_disk_bytes: int = Field(default=64 * 1024 * 1024, description="Size budget of each on-disk cache table")
+    search: CacheLayerConfig = Field(default=CacheLayerConfig(ttl=3600.0), description="Serper results, keyed by query, type and params")
+    rerank: CacheLayerConfig = Field(default=CacheLayerConfig(ttl=24 * 3600.0), description="Rerank orders, keyed by query, model and document hashes")
+    answer: CacheLayerConfig = Field(default=CacheLayerConfig(enabled=False, ttl=900.0, max_entries=256), description="Synthesized answers, keyed by query")
+    cli_command: CacheLayerConfig = Field(default=CacheLayerConfig(ttl=7 * 24 * 3600.0), description="Generated CLI commands that ran successfully, keyed by normalized operation, platform and model flavor")
+
+
+class WebSearchConfig(BaseModel):
+    """
+    Settings of the web searcher pipeline.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    rerank_timeout: float = Field(default=3.0, description="Seconds to wait for the remote reranker before falling back to the local one")
+    context_token_budget: int = Field(default=2000, description="Maximum number of tokens of search results given to the synthesis LLM")
+    duplicate_similarity: float = Field(default=0.8, description="Snippets at least this similar (shingle Jaccard) to a better ranked one are dropped")
+
+
+class PlanCacheConfig(BaseModel):
+    """
+    Plan templates reused for queries similar to past successful ones (see `agent_hub.orchestrator.plan_cache`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = True
+    path: Optional[str] = Field(default=".cache/plan_templates.json", description="JSON file the templates are persisted to (None to keep them in memory only)")
+    max_entries: int = Field(default=256, description="Maximum number of templates, the least recently used ones are evicted")
+    similarity_threshold: float = Field(default=0.7, description="Minimum TF-IDF cosine similarity between two queries to reuse a plan (the substitutions are checked against the plan too)")
+    n_features: int = Field(default=2 ** 14, description="Size of the hashed n-gram feature space")
+
+
+class OrchestratorConfig(BaseModel):
+    """
+    Settings of the orchestrator's parallel task execution and failure handling.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    max_parallel_tasks: int = Field(default=4, ge=1, description="Maximum number of plan tasks dispatched at the same step")
+    max_parallel_per_agent: Dict[str, Annotated[int, Field(ge=1)]] = Field(default={"BrowserUse": 1}, description="Maximum number of tasks run in parallel by each agent (by agent name)")
+    default_max_parallel_per_agent: int = Field(default=2, ge=1, description="Maximum number of tasks run in parallel by agents missing from `max_parallel_per_agent`")
+    direct_dispatch: bool = Field(default=True, description="Send tasks whose agent input was given by the planner straight to their agent, without the tool-selection LLM call")
+    plan_repair: Literal["incremental", "replan"] = Field(default="incremental", description="On task failure, replace only the failed and remaining tasks (incremental) or plan again from scratch (replan)")
+    max_task_repairs: int = Field(default=2, description="Maximum number of times a failed task is repaired before the plan is given up")
+    plan_cache: PlanCacheConfig = Field(default=PlanCacheConfig(), description="Reuse of past successful plans")
+
+    def max_parallel(self, agent_name: str) -> int:
+        return self.max_parallel_per_agent.get(agent_name, self.default_max_parallel_per_agent)
+
+    def __hash__(self):
+        # dicts aren't hashable, hash the serialized config instead
+        return hash(json.dumps(self.model_dump(mode="json"), sort_keys=True))
+
+
+class RouterConfig(BaseModel):
+    """
+    Local first-stage router of the FrontLLM (see `agent_hub.router`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = True
+    model_path: Optional[str] = Field(default=".cache/router.npz", description="Trained router (`python -m scripts.train_router`), every message goes to the LLM while it is missing")
+    decisions_path: Optional[str] = Field(default=None, description="JSON lines log of the LLM decisions, used as training data. Opt-in (e.g. \".cache/router_decisions.jsonl\"): it stores the users' raw messages")
+    confidence: float = Field(default=0.9, description="Minimum probability of the predicted decision to skip the LLM")
+
+
+class MemoryConfig(BaseModel):
+    """
+    Token budgets of the agents' outputs and of the conversation given to the LLMs (see `agent_hub.memory`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    recent_outputs: int = Field(default=3, description="Maximum number of the latest agent outputs kept verbatim in the orchestrator prompts")
+    output_token_budget: int = Field(default=1500, description="Tokens of the verbatim agent outputs, older outputs are rolled into the summary")
+    summary_token_budget: int = Field(default=400, description="Tokens of the summary of the older agent outputs")
+    message_token_budget: int = Field(default=2000, description="Tokens of the conversation history sent to the FrontLLM")
+    task_output_token_budget: int = Field(default=1000, description="Tokens of the last task output shown to the FrontLLM")
+
+
+class CheckpointConfig(BaseModel):
+    """
+    Durable checkpoints of the graph runs, to resume interrupted runs (see `agent_hub.checkpoint`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = False
+    path: str = Field(default=".cache/checkpoints.sqlite", description="SQLite file of the checkpoints")
+
+
+class ServerConfig(BaseModel):
+    """
+    Admission control of the HTTP service (see `agent_hub.server`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    max_concurrent_runs: int = Field(default=16, description="Maximum number of graph runs executed at the same time")
+    max_queued_runs: int = Field(default=64, description="Maximum number of requests waiting for a run slot, the next ones get a 429")
+    queue_timeout: float = Field(default=30.0, description="Maximum time (in seconds) a request waits for a run slot before getting a 503")
+    run_timeout: float = Field(default=300.0, description="Maximum duration (in seconds) of a graph run before it is cancelled")
+    disconnect_poll_interval: float = Field(default=0.5, description="Interval (in seconds) at which non-streaming requests check for client disconnection")
+
+
+class ProviderLimits(BaseModel):
+    """
+    Rate limits of one upstream provider (or model), None meaning unlimited.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = Field(default=None, description="Prompt and completion tokens per minute (LLM providers only)")
+    max_concurrency: int = Field(default=32, description="Upper bound of the adaptive concurrency limit")
+    initial_concurrency: int = Field(default=8, description="Concurrency limit before any feedback from the provider")
+
+
+class RateLimitConfig(BaseModel):
+    """
+    Client-side rate limiting of the upstream calls (see `agent_hub.rate_limit`).
+    The default limits are conservative, set the ones of your accounts.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = True
+    limits: Dict[str, ProviderLimits] = Field(
+        default={
+            "groq": ProviderLimits(requests_per_minute=30, tokens_per_minute=6000),
+            "mistral": ProviderLimits(requests_per_minute=60, tokens_per_minute=500000),
+            "together": ProviderLimits(requests_per_minute=600, tokens_per_minute=180000),
+            "serper": ProviderLimits(requests_per_minute=300),
+            "jina": ProviderLimits(requests_per_minute=500),
+        },
+        description="Limits by provider (HTTP client name), or by `provider/model` for a specific model. Each provider and model gets its own buckets",
+    )
+    default_limits: ProviderLimits = Field(default=ProviderLimits(), description="Limits of the providers missing from `limits`")
+    burst_seconds: float = Field(default=10.0, description="Size of the token buckets, in seconds of allowed rate")
+    default_completion_tokens: int = Field(default=512, description="Completion tokens assumed for requests without `max_tokens`, until the actual usage is known")
+    latency_tolerance: float = Field(default=3.0, description="Latency above this multiple of the smoothed latency counts as congestion")
+    decrease_factor: float = Field(default=0.5, description="Multiplicative decrease of the concurrency limit on congestion (429 or slow response)")
+
+    def limits_for(self, provider: str, model: Optional[str] = None) -> ProviderLimits:
+        return self.limits.get(f"{provider}/{model}") or self.limits.get(provider) or self.default_limits
+
+    def __hash__(self):
+        return hash(json.dumps(self.model_dump(mode="json"), sort_keys=True))
+
+
+class ResilienceConfig(BaseModel):
+    """
+    Retries and circuit breakers of the upstream calls (see `agent_hub.resilience`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = True
+    max_attempts: int = Field(default=3, description="Attempts of a call failing with a retryable error (network error, timeout, 408, 429, 5xx)")
+    base_delay: float = Field(default=0.5, description="Backoff before the first retry (seconds), doubled at each retry and fully jittered")
+    max_delay: float = Field(default=10.0, description="Maximum backoff between two attempts (seconds)")
+    retry_statuses: Tuple[int, ...] = Field(default=(408, 429, 500, 502, 503, 504), description="Response statuses retried")
+    failure_threshold: int = Field(default=5, description="Consecutive failures (network errors, timeouts, 5xx) of a provider opening its circuit")
+    reset_timeout: float = Field(default=30.0, description="Seconds an open circuit fails fast before a probe call is let through")
+
+
+class HedgingConfig(BaseModel):
+    """
+    Hedged LLM calls (see `agent_hub.hedging`): a call still running after the rolling `quantile` latency of
+    its model is sent again to an equivalent model of another provider, and the first valid answer wins.
+    """
+    model_config = ConfigDict(frozen=True)
+
+    enabled: bool = True
+    backups: Dict[str, str] = Field(
+        default={
+            "groq/llama3-70b-8192": "together/meta-llama/Meta-Llama-3.1-70B-Instruct-Turbo",
+            "groq/llama-3.2-90b-vision-preview": "together/meta-llama/Llama-3.2-90B-Vision-Instruct-Turbo",
+            "mistral/pixtral-large-latest": "together/meta-llama/Llama-3.2-90B-Vision-Instruct-Turbo",
+        },
+        description="Equivalent model of another provider for each 'provider/model' (the model names can contain '/')",
+    )
+    quantile: float = Field(default=0.95, description="Latency quantile of the primary model after which the backup call is sent")
+    min_samples: int = Field(default=20, description="Latency samples needed before the quantile is used")
+    initial_delay: Optional[float] = Field(
+        default=None,
+        description="Hedging delay (seconds) until `min_samples` calls are recorded, None to only fail over until then",
+    )
+    min_delay: float = Field(default=0.5, description="Shortest hedging delay (seconds), so fast models aren't hedged on noise")
+
+    def backup_for(self, provider: str, model: str) -> Optional[Tuple[str, str]]:
+        backup = self.backups.get(f"{provider}/{model}")
+        if backup is None:
+            return None
+        backup_provider, backup_model = backup.split("/", 1)
+        return backup_provider, backup_model
+
+    def __hash__(self):
+        return hash(json.dumps(self.model_dump(mode="json"), sort_keys=True))
+
+
+class BrowserPoolConfig(BaseModel):
+    """
+    Warm browsers of the BrowserUse agent (see `agent_hub.browser.pool`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    size: int = Field(default=2, description="Browsers launched ahead of the tasks, and tasks browsing at the same time")
+    warm_on_setup: bool = Field(default=True, description="Launch the browsers in the agent's `setup()` rather than on the first tasks")
+    headless: bool = True
+    max_uses: int = Field(default=20, description="Tasks served by a browser before it is replaced by a fresh one")
+    max_memory_mb: Optional[int] = Field(default=1536, description="Resident memory of a browser (all its processes) above which it is replaced after its task, None for no cap (only measured on Linux)")
+    js_heap_mb: Optional[int] = Field(default=512, description="V8 heap cap of each page, None for the chromium default")
+    lease_timeout: float = Field(default=300.0, description="Seconds a task waits for a free browser")
+
+
+class CLIConfig(BaseModel):
+    """
+    Command execution of the CLI agent (see `agent_hub.cli.executor`).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    timeout: float = Field(default=120.0, description="Seconds a command may run before it is killed")
+    output_tail_bytes: int = Field(default=16 * 1024, description="Last bytes of a command's output kept in memory and given to the next agents")
+    spill_dir: Optional[str] = Field(default=".cache/cli_output", description="Directory the full output of a command is written to once it exceeds the tail (None to only keep the tail)")
+    spill_retention: int = Field(default=50, ge=1, description="Output files kept in spill_dir, the oldest ones are deleted when a new one is closed")
+    persistent_shell: bool = Field(default=False, description="Run the commands of a session (graph thread) one after the other in the same long-lived shell, keeping its working directory and environment (POSIX only)")
+    shell: str = Field(default="/bin/sh", description="Shell of the persistent sessions")
+    max_shell_sessions: int = Field(default=32, description="Persistent shells kept alive, the least recently used one is closed beyond")
+
+
+class AgentHubConfig(BaseModel):
+    """
+    Settings used to build and run the agent graph.
+    The config is immutable so it can be used as part of the `build_graph` cache key.
+
+    `llm_http`, `rate_limit`, `resilience` and `hedging` are process-wide: the LLM clients, the shared HTTP
+    clients and the rate limiters are built once per process from the process config (`set_config`), so these
+    sections of a config given to `build_graph` or `create_app` are ignored (with a warning when they differ).
+    """
+    model_config = ConfigDict(frozen=True)
+
+    setup_agents: bool = Field(default=True, description="Whether to run the registered agents' `setup()` when the graph is built")
+    http: HTTPConfig = Field(default=HTTPConfig(), description="HTTP client used for search APIs (Serper, Jina)")
+    llm_http: HTTPConfig = Field(default=HTTPConfig(read_timeout=120.0, connect_timeout=10.0), description="HTTP client used for LLM providers (process-wide, see `set_config`)")
+    cache: CacheConfig = Field(default=CacheConfig(), description="Web search result caches")
+    web_search: WebSearchConfig = Field(default=WebSearchConfig(), description="Web searcher pipeline settings")
+    orchestrator: OrchestratorConfig = Field(default=OrchestratorConfig(), description="Orchestrator parallel execution settings")
+    router: RouterConfig = Field(default=RouterConfig(), description="FrontLLM local router")
+    memory: MemoryConfig = Field(default=MemoryConfig(), description="Prompt token budgets of the outputs and conversation history")
+    checkpoint: CheckpointConfig = Field(default=CheckpointConfig(), description="Durable checkpoints of the runs, keyed by thread id")
+    server: ServerConfig = Field(default=ServerConfig(), description="HTTP service admission control")
+    rate_limit: RateLimitConfig = Field(default=RateLimitConfig(), description="Client-side rate limits of the LLM and search providers (process-wide, see `set_config`)")
+    resilience: ResilienceConfig = Field(default=ResilienceConfig(), description="Retries and circuit breakers of the LLM and search providers (process-wide, see `set_config`)")
+    hedging: HedgingConfig = Field(default=HedgingConfig(), description="Backup calls to other LLM providers when a call is slow or fails (process-wide, see `set_config`)")
+    browser_pool: BrowserPoolConfig = Field(default=BrowserPoolConfig(), description="Warm browsers of the BrowserUse agent")
+    cli: CLIConfig = Field(default=CLIConfig(), description="Timeouts and output capture of the CLI agent's commands")
+
+
+_config: Optional[AgentHubConfig] = None
+
+
+def get_config() -> AgentHubConfig:
+    """
+    Get the process-wide default config.
+    """
+    global _config
+    if _config is None:
+        _config = AgentHubConfig()
+    return _config
+
+
+def set_config(config: AgentHubConfig):
+    """
+    Replace the process-wide default config (used by agents and clients created afterwards).
+    This is the only way to set the `PROCESS_WIDE_SETTINGS`, call it before the first LLM or HTTP client is built.
+    """
+    global _config
+    _config = config
+
+
+PROCESS_WIDE_SETTINGS = ("llm_http", "rate_limit", "resilience", "hedging")
+
+
+def ignored_settings(config: AgentHubConfig) -> List[str]:
+    """
+    The process-wide sections of a config that differ from the process config, and so don't apply.
+    """
+    process_config = get_config()
+    return [name for name in PROCESS_WIDE_SETTINGS if getattr(config, name) != getattr(process_config, name)]
+
+
+def warn_ignored_settings(config: AgentHubConfig):
+    ignored = ignored_settings(config)
+    if ignored:
+        print(f"Warning: the {', '.join(ignored)} settings of this config are ignored, they are process-wide: set them with agent_hub.config.set_config()")
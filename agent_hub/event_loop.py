@@ -0,0 +1,58 @@
+"""
+Event loop running in its own thread.
+
+Long-lived asyncio resources (browsers, shell processes) belong to the loop they were created in, while
+the graph calls the agents from different loops (`graph.invoke` runs each sync call in its own loop).
+Such resources live on an `EventLoopThread`, and every caller submits its coroutines to it.
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import threading
+from typing import Callable, Coroutine, Optional
+
+
+class EventLoopThread:
+    """
+    Event loop started in a daemon thread on first use.
+
+    Args:
+        name: Name of the thread
+        on_close: Coroutine function run on the loop by `close()` (and at exit), to release the resources
+    """
+    def __init__(self, name: str, on_close: Optional[Callable[[], Coroutine]] = None):
+        self.name = name
+        self.on_close = on_close
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name=self.name, daemon=True).start()
+                atexit.register(self.close)
+            return self._loop
+
+    def submit(self, coroutine: Coroutine) -> concurrent.futures.Future:
+        """
+        Run a coroutine on the loop (await it with `asyncio.wrap_future`, cancelling it cancels the coroutine).
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def close(self, timeout: float = 10.0):
+        """
+        Run `on_close` and stop the loop.
+        """
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None or not loop.is_running():
+            return
+        try:
+            if self.on_close is not None:
+                asyncio.run_coroutine_threadsafe(self.on_close(), loop).result(timeout)
+        except Exception as e:
+            print(f"Failed to release the resources of {self.name}. Error: {e}")
+        finally:
+            loop.call_soon_threadsafe(loop.stop)
@@ -1,26 +1,79 @@
-from agent_hub.graph import State
-from agent_hub.llms import get_llm
+from typing import Optional
+from agent_hub.state import State
+from agent_hub.llms import get_llm, get_structured_llm
 from agent_hub.plan import FrontLLMOutput
+from agent_hub.config import AgentHubConfig, get_config
+from agent_hub.router import build_router
+from agent_hub.memory import record_prompt_tokens, window_messages
+from agent_hub.tokens import truncate_tokens
 from langchain_core.messages import AIMessage, SystemMessage
 class FrontLLM():
-    def __init__(self):
-        self.llm = get_llm().with_structured_output(FrontLLMOutput)
+    def __init__(self, config: Optional[AgentHubConfig] = None):
         self.name = "front_llm"
-    def __call__(self, state: State):
+        self.config = config or get_config()
+        # local first-stage decision, the LLM only decides the messages the router isn't confident about
+        self.router = build_router(self.config.router)
+
+    @property
+    def llm(self):
+        return get_structured_llm(FrontLLMOutput)
+
+    @property
+    def answer_llm(self):
+        # plain text generation, so the final answer can be streamed token by token
+        return get_llm()
+
+    @staticmethod
+    def _is_final_answer(state: State) -> bool:
+        plan = state.get("plan", None)
+        return plan is not None and plan.is_completed
+
+    def _route(self, state: State) -> Optional[bool]:
+        # only the first decision (before any plan) is routed locally
+        message = state["messages"][-1].content
+        if self.router is None or state.get("plan", None) is not None or not isinstance(message, str):
+            return None
+        return self.router.route(message)
+
+    def _log_decision(self, state: State, front_llm_output: FrontLLMOutput):
+        message = state["messages"][-1].content
+        if self.router is not None and state.get("plan", None) is None and isinstance(message, str):
+            self.router.log_decision(message, front_llm_output.is_computer_interaction_required)
+
+    def _with_history(self, system_message: SystemMessage, state: State):
+        # only the latest messages fitting in the token budget are sent
+        messages = [system_message] + window_messages(state["messages"], self.config.memory.message_token_budget)
+        record_prompt_tokens(self.name, messages)
+        return messages
+
+    def _chat_messages(self, state: State):
+        system_message = SystemMessage(content="You are a helpful assistant. Answer the user query directly and concisely.")
+        return self._with_history(system_message, state)
+
+    def _last_task_output(self, state: State) -> str:
+        return truncate_tokens(str(state["last_task_output"]), self.config.memory.task_output_token_budget)
+
+    @staticmethod
+    def _computer_interaction_update(state: State):
+        return {"user_input": state["messages"][-1].content, "is_computer_interaction_required": True}
+
+    def _build_messages(self, state: State):
         plan = state.get("plan", None)
         # if it's the first time the FrontLLM is called, there is no plan yet. step is to decide whether to answer directly or to use an agent
         if plan is None:
             system_message = SystemMessage(content="""You are a helpful assistant that can answer questions and perform tasks that require interacting with the computer.
                                            Your goal is to determine whether the user query requires computer interaction (the user query is complex and requires the LLM to use an agent to perform the task) or not (the user query is simple and the LLM should answer the user query without using an agent)""")
-            front_llm_output = self.llm.invoke([system_message] + state["messages"])
-            if front_llm_output.is_computer_interaction_required:
-                return {"user_input": state["messages"][-1].content, "is_computer_interaction_required": True}
-            else:
-                return {"messages": [AIMessage(content=front_llm_output.llm_response)], "is_computer_interaction_required": False}
+        elif plan.is_completed:
+            system_message = SystemMessage(content=f"""You are a helpful assistant that can answer questions and perform tasks that require interacting with the computer.
+                                           The agents have executed the plan built for the user query.
+                                           Here was the plan : {plan.to_prompt()}
+                                           Here was the last task status : {state["last_task_status"]}
+                                           Here was the last task output : {self._last_task_output(state)}.
+                                           Answer the user query directly and concisely.""")
         else:
-            plan_str = plan.model_dump_json()
+            plan_str = plan.to_prompt()
             last_task_status = state["last_task_status"]
-            last_task_output = state["last_task_output"]
+            last_task_output = self._last_task_output(state)
             system_message = SystemMessage(content=f"""You are a helpful assistant that can answer questions and perform tasks that require interacting with the computer.
                                            The user has already asked a question and you have already decided whether to use an agent or not.
                                            Your goal is to answer the user query directly or to reuse the agent to perform the task given the plan and its last task status
@@ -28,5 +81,42 @@ class FrontLLM():
                                            Here was the last task status : {last_task_status}
                                            Here was the last task output : {last_task_output}.
                                            If everything is done, you can simply answer the user query directly and concisely.""")
-            front_llm_output = self.llm.invoke([system_message] + state["messages"])
-            return {"messages": [AIMessage(content=front_llm_output.llm_response)], "is_computer_interaction_required": front_llm_output.is_computer_interaction_required}
+        return self._with_history(system_message, state)
+
+    def _build_update(self, state: State, front_llm_output: FrontLLMOutput):
+        if state.get("plan", None) is None:
+            if front_llm_output.is_computer_interaction_required:
+                return self._computer_interaction_update(state)
+            else:
+                return {"messages": [AIMessage(content=front_llm_output.llm_response)], "is_computer_interaction_required": False}
+        return {"messages": [AIMessage(content=front_llm_output.llm_response)], "is_computer_interaction_required": front_llm_output.is_computer_interaction_required}
+
+    @staticmethod
+    def _final_answer_update(answer):
+        return {"messages": [AIMessage(content=answer.content)], "is_computer_interaction_required": False}
+
+    def __call__(self, state: State):
+        if self._is_final_answer(state):
+            return self._final_answer_update(self.answer_llm.invoke(self._build_messages(state)))
+        route = self._route(state)
+        if route is True:
+            return self._computer_interaction_update(state)
+        if route is False:
+            return self._final_answer_update(self.answer_llm.invoke(self._chat_messages(state)))
+        front_llm_output = self.llm.invoke(self._build_messages(state))
+        self._log_decision(state, front_llm_output)
+        return self._build_update(state, front_llm_output)
+
+    async def __acall__(self, state: State):
+        if self._is_final_answer(state):
+            # under `graph.astream(stream_mode="messages")` the tokens of this call are streamed as they arrive
+            return self._final_answer_update(await self.answer_llm.ainvoke(self._build_messages(state)))
+        route = self._route(state)
+        if route is True:
+            return self._computer_interaction_update(state)
+        if route is False:
+            # chit-chat: plain (streamed) answer instead of the structured decision
+            return self._final_answer_update(await self.answer_llm.ainvoke(self._chat_messages(state)))
+        front_llm_output = await self.llm.ainvoke(self._build_messages(state))
+        self._log_decision(state, front_llm_output)
+        return self._build_update(state, front_llm_output)
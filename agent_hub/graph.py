@@ -1,66 +1,158 @@
-from typing_extensions import TypedDict
+from typing import Dict, Optional, Sequence, Tuple, Union
 from agent_hub.state import State
+from agent_hub.plan import TaskResult
+from agent_hub.agent import Agent
+from agent_hub.config import AgentHubConfig, get_config, warn_ignored_settings
+from agent_hub.checkpoint import build_checkpointer
 from langgraph.graph import StateGraph, START, END
+from langgraph.types import Send
 from agent_hub.orchestrator.orchestrator import Orchestrator
-from agent_hub.browser.browser_agent import BrowserUse
-from agent_hub.web_searcher.web_searcher import WebSearcher
-from agent_hub.cli.cli_agent import CLIAgent
 from agent_hub.front_llm import FrontLLM
+from langchain_core.runnables import RunnableLambda
+import importlib
+import threading
 import asyncio
 
+# Agents are imported lazily so that only the registered ones (and their heavy
+# dependencies, e.g. browser_use for BrowserUse) are loaded.
+AGENT_CLASSES: Dict[str, str] = {
+    "BrowserUse": "agent_hub.browser.browser_agent:BrowserUse",
+    "CLIAgent": "agent_hub.cli.cli_agent:CLIAgent",
+    "WebSearcher": "agent_hub.web_searcher.web_searcher:WebSearcher",
+}
+DEFAULT_AGENTS: Tuple[str, ...] = ("BrowserUse", "CLIAgent", "WebSearcher")
 
-browse_use = BrowserUse()
-cli_agent = CLIAgent()
-web_searcher = WebSearcher()
-agents = [browse_use, cli_agent, web_searcher]
-orchestrator = Orchestrator(available_agents=agents)
-front_llm = FrontLLM()
+_compiled_graphs = {}
+_build_lock = threading.Lock()
 
-asyncio.run(orchestrator.setup())
 
-def next_step(state: State):
-    next_agent_name = state["next_agent_name"]
-    if next_agent_name is not None:
-        return next_agent_name
-    else:
-        return front_llm.name
+def as_node(component):
+    """
+    Wrap an agent so the graph runs its `__call__` under `invoke`/`stream`
+    and its `__acall__` coroutine under `ainvoke`/`astream`.
+    """
+    return RunnableLambda(component.__call__, afunc=component.__acall__, name=component.name)
 
-def is_computer_interaction_required(state: State):
-    is_computer_interaction_required = state["is_computer_interaction_required"]
-    if is_computer_interaction_required:
-        return orchestrator.name
-    else:
-        return END
 
-graph_builder = StateGraph(State)
+def as_task_node(agent: Agent):
+    """
+    Wrap an agent dispatched by the orchestrator (through `Send`) so that its state update
+    is recorded as the result of the task it ran, under the task index.
+    Parallel agents thus never overwrite each other's outputs.
+    """
+    def to_task_result(state, update):
+        return {"task_results": {state["current_task_index"]: TaskResult.from_update(update)}}
 
-graph_builder.add_node(orchestrator.name, orchestrator)
-graph_builder.add_node(front_llm.name, front_llm)
-graph_builder.add_edge(START, front_llm.name)
-graph_builder.add_conditional_edges(front_llm.name, is_computer_interaction_required)
-for agent in agents:
-    graph_builder.add_node(agent.name, agent)
-    graph_builder.add_edge(agent.name, orchestrator.name)
+    def call(state):
+        return to_task_result(state, agent(state))
 
-graph_builder.add_conditional_edges(orchestrator.name, next_step)
+    async def acall(state):
+        return to_task_result(state, await agent.__acall__(state))
 
+    return RunnableLambda(call, afunc=acall, name=agent.name)
 
-graph = graph_builder.compile()
 
-from pathlib import Path
-from langchain_core.runnables.graph import CurveStyle, MermaidDrawMethod
+def load_agent(agent: Union[str, Agent], config: Optional[AgentHubConfig] = None) -> Agent:
+    """
+    Instantiate a registered agent from its name (agent instances are returned as is).
+    """
+    if isinstance(agent, Agent):
+        return agent
+    if agent not in AGENT_CLASSES:
+        raise ValueError(f"Unknown agent: {agent}. Available agents: {list(AGENT_CLASSES)}")
+    module_path, class_name = AGENT_CLASSES[agent].split(":")
+    return getattr(importlib.import_module(module_path), class_name)(config=config)
 
-# Create docs directory if it doesn't exist
-Path("docs").mkdir(exist_ok=True)
 
-# Generate and save the Mermaid diagram
-png_data = graph.get_graph().draw_mermaid_png(
-    draw_method=MermaidDrawMethod.API,
-    background_color="white",
-    padding=10
-)
+def compile_graph(agents: Sequence[Agent], config: Optional[AgentHubConfig] = None, checkpointer=None):
+    """
+    Wire the FrontLLM, the orchestrator and the given agents into a compiled graph.
+    No agent setup is performed here.
+    With a `checkpointer`, the state is saved after every step and runs need a thread id
+    (`agent_hub.checkpoint.thread_config`).
+    """
+    if config is not None:
+        warn_ignored_settings(config)
+    orchestrator = Orchestrator(available_agents=list(agents), config=config)
+    front_llm = FrontLLM(config=config)
 
-# Save the PNG data to a file
-output_path = "docs/mermaid_graph.png"
-with open(output_path, "wb") as f:
-    f.write(png_data)
\ No newline at end of file
+    def next_step(state: State):
+        # fan-out: every dispatched task runs in parallel, then the orchestrator collects the results
+        dispatches = state.get("dispatches") or []
+        if dispatches:
+            return [
+                Send(dispatch.agent_name, {"next_agent_input": dispatch.agent_input, "current_task_index": dispatch.task_index})
+                for dispatch in dispatches
+            ]
+        else:
+            return front_llm.name
+
+    def is_computer_interaction_required(state: State):
+        is_computer_interaction_required = state["is_computer_interaction_required"]
+        if is_computer_interaction_required:
+            return orchestrator.name
+        else:
+            return END
+
+    graph_builder = StateGraph(State)
+
+    graph_builder.add_node(orchestrator.name, as_node(orchestrator))
+    graph_builder.add_node(front_llm.name, as_node(front_llm))
+    graph_builder.add_edge(START, front_llm.name)
+    graph_builder.add_conditional_edges(front_llm.name, is_computer_interaction_required)
+    for agent in agents:
+        graph_builder.add_node(agent.name, as_task_node(agent))
+        graph_builder.add_edge(agent.name, orchestrator.name)
+
+    graph_builder.add_conditional_edges(orchestrator.name, next_step, [agent.name for agent in agents] + [front_llm.name])
+
+    return orchestrator, graph_builder.compile(checkpointer=checkpointer)
+
+
+def _cache_key(agents: Sequence[Union[str, Agent]], config: AgentHubConfig):
+    return tuple(agents), config
+
+
+def build_graph(agents: Sequence[Union[str, Agent]] = DEFAULT_AGENTS, config: Optional[AgentHubConfig] = None):
+    """
+    Build (once per agents/config combination) the compiled agent graph.
+
+    Args:
+        agents: Names of registered agents (see `AGENT_CLASSES`) or agent instances
+        config: Graph settings, defaults to the process config (`agent_hub.config.get_config()`).
+            Its process-wide sections (`PROCESS_WIDE_SETTINGS`: LLM HTTP, rate limits, resilience, hedging)
+            don't apply, they come from the process config
+
+    Returns:
+        The compiled graph, memoized for subsequent calls
+    """
+    config = config or get_config()
+    key = _cache_key(agents, config)
+    with _build_lock:
+        if key not in _compiled_graphs:
+            orchestrator, graph = compile_graph([load_agent(agent, config) for agent in agents], config, build_checkpointer(config.checkpoint))
+            if config.setup_agents:
+                asyncio.run(orchestrator.setup())
+            _compiled_graphs[key] = graph
+        return _compiled_graphs[key]
+
+
+async def abuild_graph(agents: Sequence[Union[str, Agent]] = DEFAULT_AGENTS, config: Optional[AgentHubConfig] = None):
+    """
+    Async version of `build_graph`, to be used from inside a running event loop.
+    """
+    config = config or get_config()
+    key = _cache_key(agents, config)
+    if key not in _compiled_graphs:
+        orchestrator, graph = compile_graph([load_agent(agent, config) for agent in agents], config, build_checkpointer(config.checkpoint))
+        if config.setup_agents:
+            await orchestrator.setup()
+        _compiled_graphs.setdefault(key, graph)
+    return _compiled_graphs[key]
+
+
+def __getattr__(name: str):
+    # Backward compatibility: `from agent_hub.graph import graph` builds the default graph on first access
+    if name == "graph":
+        return build_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
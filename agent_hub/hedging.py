@@ -0,0 +1,232 @@
+"""
+Hedged LLM calls across providers.
+
+`HedgedRunnable` sends a call to its primary model and, if no answer came back after the primary's rolling
+p95 latency (`HedgingConfig.quantile`), sends the same call to an equivalent model of another provider.
+Until `HedgingConfig.min_samples` latencies of the primary are recorded, slow calls aren't hedged (unless an
+`initial_delay` is set).
+The first valid answer (an instance of the structured output schema, or a message with content or tool
+calls) wins and the other call is cancelled. A call failing or returning an invalid answer fails over to the
+backup right away. The helpers of `agent_hub.llms` return hedged runnables for the models having a backup
+in `HedgingConfig.backups` (of the process config, see `agent_hub.config.set_config`), so the call sites don't change.
+
+Streamed answers: once the primary has streamed a token to the user, its answer is the one returned (the
+backup call is never streamed: it runs with the parent callbacks except the streaming handlers, e.g. those of
+`graph.astream(stream_mode="messages")` and `astream_events`, so tracing still sees it).
+
+The latency of every successful call is recorded in `agent_hub.telemetry` as `llm.latency.<provider>/<model>`,
+the backup calls as `llm.hedge.fired.<primary>` and the calls won by the backup as `llm.hedge.won.<backup>`.
+"""
+import asyncio
+import concurrent.futures
+import time
+from typing import Any, Callable, Optional
+from langchain_core.callbacks import BaseCallbackHandler, BaseCallbackManager
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import ContextThreadPoolExecutor, ensure_config, merge_configs, patch_config
+# protocol of the handlers streaming runs to the caller (LangGraph's "messages" stream mode, astream_events, astream_log)
+from langchain_core.tracers._streaming import _StreamingCallbackHandler
+from agent_hub.config import HedgingConfig
+from agent_hub.telemetry import telemetry
+
+# Threads of the sync hedged calls (a sync call can't be interrupted: the loser runs to completion in the background)
+_executor = ContextThreadPoolExecutor(max_workers=32, thread_name_prefix="hedged-llm")
+
+
+def latency_metric(name: str) -> str:
+    return f"llm.latency.{name}"
+
+
+class _StreamWatcher(BaseCallbackHandler):
+    """
+    Notices the first text token streamed by a call.
+    """
+    def __init__(self):
+        self.streaming = False
+
+    def on_llm_new_token(self, token: str, **kwargs: Any):
+        if token:
+            self.streaming = True
+
+
+def without_stream_handlers(callbacks: Any) -> Any:
+    """
+    Copy of the callbacks (a handler list or a callback manager) without the handlers streaming to the caller.
+    """
+    if isinstance(callbacks, BaseCallbackManager):
+        manager = callbacks.copy()
+        for handler in manager.handlers + manager.inheritable_handlers:
+            if isinstance(handler, _StreamingCallbackHandler):
+                manager.remove_handler(handler)
+        return manager
+    if isinstance(callbacks, list):
+        return [handler for handler in callbacks if not isinstance(handler, _StreamingCallbackHandler)]
+    return callbacks
+
+
+class HedgedRunnable(Runnable):
+    """
+    Runs `primary`, and `backup` as well when the primary is slow or fails.
+    Other attributes are read from the primary, so it can stand in for it.
+
+    Args:
+        primary: Runnable of the primary model
+        backup: Factory of the backup runnable (built on the first hedged call), None to disable hedging
+        primary_name: "provider/model" of the primary, for its latency metric
+        backup_name: "provider/model" of the backup
+        config: Hedging delay settings
+        schema: Structured output schema the answers must be instances of
+    """
+    def __init__(self, primary: Runnable, backup: Callable[[], Optional[Runnable]], primary_name: str, backup_name: str,
+                 config: HedgingConfig, schema: Optional[type] = None):
+        self.primary = primary
+        self._backup_factory = backup
+        self._backup: Optional[Runnable] = None
+        self.primary_name = primary_name
+        self.backup_name = backup_name
+        self.config = config
+        self.schema = schema
+
+    def __getattr__(self, name: str):
+        if name == "primary":
+            raise AttributeError(name)
+        return getattr(self.primary, name)
+
+    @property
+    def InputType(self):
+        return self.primary.InputType
+
+    @property
+    def OutputType(self):
+        return self.primary.OutputType
+
+    @property
+    def backup(self) -> Optional[Runnable]:
+        if self._backup is None and self._backup_factory is not None:
+            try:
+                self._backup = self._backup_factory()
+            except Exception as e:
+                print(f"Backup {self.backup_name} of {self.primary_name} is unavailable, calls won't be hedged. Error: {e}")
+            self._backup_factory = None
+        return self._backup
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Seconds to wait for the primary before sending the backup call, None to only fail over.
+        """
+        metric = latency_metric(self.primary_name)
+        if telemetry.count(metric) < self.config.min_samples:
+            return self.config.initial_delay
+        return max(self.config.min_delay, telemetry.quantile(metric, self.config.quantile))
+
+    def _hedge_at(self) -> Optional[float]:
+        delay = self.hedge_delay()
+        return None if delay is None else time.monotonic() + delay
+
+    def is_valid(self, result: Any) -> bool:
+        if self.schema is not None:
+            return isinstance(result, self.schema)
+        if isinstance(result, BaseMessage):
+            return bool(result.content) or bool(getattr(result, "tool_calls", None))
+        return result is not None
+
+    def _configs(self, config: Optional[RunnableConfig]):
+        # the backup call runs without the streaming handlers, so its tokens aren't streamed along the primary's
+        config = ensure_config(config)
+        watcher = _StreamWatcher()
+        backup_config = patch_config(config, callbacks=without_stream_handlers(config.get("callbacks")))
+        return watcher, merge_configs(config, {"callbacks": [watcher]}), backup_config
+
+    def _timed(self, runnable: Runnable, name: str, input: Any, config: RunnableConfig, **kwargs: Any):
+        start_time = time.perf_counter()
+        result = runnable.invoke(input, config, **kwargs)
+        telemetry.observe(latency_metric(name), time.perf_counter() - start_time)
+        return result
+
+    async def _atimed(self, runnable: Runnable, name: str, input: Any, config: RunnableConfig, **kwargs: Any):
+        start_time = time.perf_counter()
+        result = await runnable.ainvoke(input, config, **kwargs)
+        telemetry.observe(latency_metric(name), time.perf_counter() - start_time)
+        return result
+
+    def _outcome(self, call, backup_call, watcher: _StreamWatcher):
+        """
+        (result, valid) of a finished call. A valid backup answer loses to a primary already streaming to the user.
+        """
+        if call.exception() is not None:
+            print(f"LLM call to {self.backup_name if call is backup_call else self.primary_name} failed. Error: {call.exception()}")
+            return None, False
+        result = call.result()
+        if call is backup_call and watcher.streaming:
+            return result, False
+        return result, self.is_valid(result)
+
+    def _won(self, call, backup_call):
+        if call is backup_call:
+            telemetry.increment(f"llm.hedge.won.{self.backup_name}")
+
+    def _hedge(self) -> Optional[Runnable]:
+        backup = self.backup
+        if backup is not None:
+            telemetry.increment(f"llm.hedge.fired.{self.primary_name}")
+        return backup
+
+    @staticmethod
+    def _fallback(primary_call):
+        # no valid answer: the primary's own result (or error) is returned, as without hedging
+        return primary_call.result()
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        watcher, primary_config, backup_config = self._configs(config)
+        primary_call = _executor.submit(self._timed, self.primary, self.primary_name, input, primary_config, **kwargs)
+        backup_call, hedged = None, False
+        hedge_at = self._hedge_at()
+        pending = {primary_call}
+        try:
+            while pending:
+                timeout = None if hedged or watcher.streaming or hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, pending = concurrent.futures.wait(pending, timeout=timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+                start_backup = not done and not watcher.streaming
+                for call in done:
+                    result, valid = self._outcome(call, backup_call, watcher)
+                    if valid:
+                        self._won(call, backup_call)
+                        return result
+                    start_backup = start_backup or call is primary_call
+                if start_backup and not hedged:
+                    hedged, backup = True, self._hedge()
+                    if backup is not None:
+                        backup_call = _executor.submit(self._timed, backup, self.backup_name, input, backup_config, **kwargs)
+                        pending.add(backup_call)
+            return self._fallback(primary_call)
+        finally:
+            for call in pending:
+                call.cancel()
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        watcher, primary_config, backup_config = self._configs(config)
+        primary_call = asyncio.ensure_future(self._atimed(self.primary, self.primary_name, input, primary_config, **kwargs))
+        backup_call, hedged = None, False
+        hedge_at = self._hedge_at()
+        pending = {primary_call}
+        try:
+            while pending:
+                timeout = None if hedged or watcher.streaming or hedge_at is None else max(0.0, hedge_at - time.monotonic())
+                done, pending = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                start_backup = not done and not watcher.streaming
+                for call in done:
+                    result, valid = self._outcome(call, backup_call, watcher)
+                    if valid:
+                        self._won(call, backup_call)
+                        return result
+                    start_backup = start_backup or call is primary_call
+                if start_backup and not hedged:
+                    hedged, backup = True, self._hedge()
+                    if backup is not None:
+                        backup_call = asyncio.ensure_future(self._atimed(backup, self.backup_name, input, backup_config, **kwargs))
+                        pending.add(backup_call)
+            return self._fallback(primary_call)
+        finally:
+            for call in pending:
+                call.cancel()
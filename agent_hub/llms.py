@@ -1,31 +1,187 @@
+import os
+import threading
+import httpx
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
 from langchain_groq import ChatGroq
 from langchain_together import ChatTogether
 from dotenv import load_dotenv
 from langchain_mistralai import ChatMistralAI
+from agent_hub.config import get_config
+from agent_hub.hedging import HedgedRunnable
+from agent_hub.transport import get_http_client, get_async_http_client, new_async_http_client
 
 load_dotenv()
 
+
+# The SDK retries are disabled: the shared HTTP transport retries every call with backoff,
+# within the request deadline (see `agent_hub.resilience`)
+
+
+def _build_groq(model: str, async_client_factory: Callable[..., Any] = get_async_http_client):
+    http_config = get_config().llm_http
+    return ChatGroq(
+        model=model,
+        max_retries=0,
+        http_client=get_http_client("groq", http_config),
+        http_async_client=async_client_factory("groq", http_config),
+    )
+
+
+def _build_together(model: str, async_client_factory: Callable[..., Any] = get_async_http_client):
+    http_config = get_config().llm_http
+    return ChatTogether(
+        model=model,
+        max_retries=0,
+        http_client=get_http_client("together", http_config),
+        http_async_client=async_client_factory("together", http_config),
+    )
+
+
+def _build_mistral(model: str, async_client_factory: Callable[..., Any] = get_async_http_client):
+    # ChatMistralAI talks to the API directly through its httpx clients, so they carry the base url and auth
+    client_options = {
+        "base_url": os.getenv("MISTRAL_BASE_URL", "https://api.mistral.ai/v1"),
+        "headers": {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+            "Authorization": f"Bearer {os.getenv('MISTRAL_API_KEY')}",
+        },
+    }
+    http_config = get_config().llm_http
+    return ChatMistralAI(
+        model=model,
+        # total attempts for this client: the retries are done by the shared transport
+        max_retries=1,
+        client=get_http_client("mistral", http_config, **client_options),
+        async_client=async_client_factory("mistral", http_config, **client_options),
+    )
+
+
+PROVIDERS: Dict[str, Callable[..., Any]] = {
+    "groq": _build_groq,
+    "together": _build_together,
+    "mistral": _build_mistral,
+}
+
+
+def new_llm(provider: str, model: str) -> Tuple[Any, httpx.AsyncClient]:
+    """
+    An LLM client outside of the registry, with an async HTTP client of its own, for code running on another
+    event loop than the graph's (e.g. the browser pool's). The caller closes the returned HTTP client.
+    """
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unsupported provider: {provider}")
+    async_clients = []
+
+    def async_client_factory(name: str, http_config, **client_kwargs) -> httpx.AsyncClient:
+        async_clients.append(new_async_http_client(name, http_config, **client_kwargs))
+        return async_clients[-1]
+
+    llm = PROVIDERS[provider](model, async_client_factory)
+    return llm, async_clients[0]
+
+
+class LLMRegistry:
+    """
+    Process-wide cache of LLM clients.
+
+    The clients are built with the process config (`agent_hub.config.get_config()`): its `llm_http` and `hedging`
+    settings apply to every graph of the process, whatever config the graph was built with.
+
+    Clients are built on first use and keyed by (provider, model, structured-output schema / bound tools),
+    so schema wrapping and tool binding happen once per process. All the clients of a provider share
+    the same pooled HTTP transport (see `agent_hub.transport`).
+    """
+    def __init__(self):
+        self._runnables: Dict[Tuple[Hashable, ...], Any] = {}
+        self._lock = threading.RLock()
+
+    def _get_or_create(self, key: Tuple[Hashable, ...], factory: Callable[[], Any]):
+        with self._lock:
+            if key not in self._runnables:
+                self._runnables[key] = factory()
+            return self._runnables[key]
+
+    def get(self, provider: str, model: str):
+        if provider not in PROVIDERS:
+            raise ValueError(f"Unsupported provider: {provider}")
+        return self._get_or_create((provider, model, None), lambda: PROVIDERS[provider](model))
+
+    def get_structured(self, provider: str, model: str, schema: type):
+        return self._get_or_create(
+            (provider, model, schema),
+            lambda: self.get(provider, model).with_structured_output(schema),
+        )
+
+    def get_with_tools(self, provider: str, model: str, tools: Sequence[type], tool_choice: Optional[str] = None):
+        return self._get_or_create(
+            (provider, model, tuple(tools), tool_choice),
+            lambda: self.get(provider, model).bind_tools(list(tools), tool_choice=tool_choice),
+        )
+
+    def hedged(self, provider: str, model: str, build: Callable[[str, str], Any], key: Tuple[Hashable, ...] = (), schema: Optional[type] = None):
+        """
+        `build(provider, model)` hedged with the backup model of `HedgingConfig.backups`, as is without backup.
+        `key` identifies what `build` adds to the model (schema, tools).
+        """
+        config = get_config().hedging
+        backup = config.backup_for(provider, model) if config.enabled else None
+        if backup is None:
+            return build(provider, model)
+        return self._get_or_create(
+            ("hedged", config, provider, model) + key,
+            lambda: HedgedRunnable(build(provider, model), lambda: build(*backup), f"{provider}/{model}", "/".join(backup), config, schema),
+        )
+
+    def __contains__(self, key: Tuple[Hashable, ...]) -> bool:
+        return key in self._runnables
+
+    def clear(self):
+        with self._lock:
+            self._runnables.clear()
+
+
+registry = LLMRegistry()
+
+
 def get_llm(provider: str = "groq", model: str = "llama3-70b-8192"):
     """
     Factory function to get different LLM instances.
     
     Args:
-        provider: The LLM provider ("groq" or "together")
+        provider: The LLM provider ("groq", "together" or "mistral")
         model: The model name to use
         
     Returns:
-        A configured LLM instance
-    """
-    if provider == "groq":
-        return ChatGroq(model=model)
-    elif provider == "together":
-        return ChatTogether(model=model)
-    elif provider == "mistral":
-        return ChatMistralAI(model="pixtral-large-latest")
-    else:
-        raise ValueError(f"Unsupported provider: {provider}")
+        A configured LLM instance, shared with every other caller asking for the same provider and model,
+        hedged with an equivalent model of another provider when one is configured (see `agent_hub.hedging`)
+    """
+    return registry.hedged(provider, model, registry.get)
+
+
+def get_structured_llm(schema: type, provider: str = "groq", model: str = "llama3-70b-8192"):
+    """
+    Get a cached (and hedged) `with_structured_output(schema)` runnable for the given provider and model.
+    """
+    return registry.hedged(provider, model, lambda p, m: registry.get_structured(p, m, schema), (schema,), schema)
+
+
+def get_tool_llm(tools: Sequence[type], provider: str = "groq", model: str = "llama3-70b-8192", tool_choice: Optional[str] = None):
+    """
+    Get a cached (and hedged) `bind_tools(tools)` runnable for the given provider and model.
+    """
+    return registry.hedged(provider, model, lambda p, m: registry.get_with_tools(p, m, tools, tool_choice), (tuple(tools), tool_choice))
+
+
+# Default instances, built on first access
+DEFAULT_LLMS = {
+    "groq_llm": ("groq", "llama-3.2-90b-vision-preview"),
+    "together_llm": ("together", "meta-llama/Llama-3-70b-chat-hf"),
+    "mistral_llm": ("mistral", "pixtral-large-latest"),
+}
+
 
-# Default instance
-groq_llm = get_llm("groq", "llama-3.2-90b-vision-preview")
-together_llm = get_llm("together", "meta-llama/Llama-3-70b-chat-hf")
-mistral_llm = get_llm("mistral", "pixtral-large-latest")
+def __getattr__(name: str):
+    if name in DEFAULT_LLMS:
+        return get_llm(*DEFAULT_LLMS[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
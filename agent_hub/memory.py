@@ -0,0 +1,97 @@
+"""
+Bounded memory of the prompts.
+
+The agents' outputs keep accumulating in `State.previous_outputs`, but the prompts only get the
+latest ones verbatim (within a token budget) and a running summary of the older ones. The summary is
+updated incrementally: only the outputs leaving the verbatim window are summarized, together with the
+previous summary. `record_prompt_tokens` reports the prompt size of each node in `agent_hub.telemetry`.
+"""
+from typing import List, Optional, Sequence, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, SystemMessage, trim_messages
+from agent_hub.config import MemoryConfig
+from agent_hub.llms import get_llm
+from agent_hub.telemetry import telemetry
+from agent_hub.tokens import count_message_tokens, count_tokens, truncate_tokens
+
+
+def record_prompt_tokens(node: str, messages: Sequence[BaseMessage]) -> int:
+    tokens = count_message_tokens(messages)
+    telemetry.observe(f"prompt_tokens.{node}", tokens)
+    return tokens
+
+
+def window_messages(messages: Sequence[BaseMessage], max_tokens: int) -> List[BaseMessage]:
+    """
+    Latest messages of a conversation fitting in `max_tokens`, starting on a user message.
+    """
+    windowed = trim_messages(
+        messages, max_tokens=max_tokens, token_counter=count_message_tokens, strategy="last", start_on="human",
+    )
+    # always keep the latest message, even above the budget
+    return windowed or list(messages[-1:])
+
+
+class OutputMemory:
+    """
+    Keeps the latest agent outputs verbatim and rolls the older ones into a summary.
+    """
+    def __init__(self, config: MemoryConfig):
+        self.config = config
+
+    def window(self, outputs: Sequence[str], summarized: int) -> Tuple[List[str], List[str]]:
+        """
+        Split the outputs not summarized yet into the ones to summarize and the ones kept verbatim.
+        """
+        pending = list(outputs[summarized:])
+        recent, used_tokens = [], 0
+        for output in reversed(pending):
+            tokens = count_tokens(output)
+            if len(recent) >= self.config.recent_outputs or (recent and used_tokens + tokens > self.config.output_token_budget):
+                break
+            # a single output above the budget is cut rather than dropped
+            recent.insert(0, truncate_tokens(output, self.config.output_token_budget))
+            used_tokens += tokens
+        return pending[:len(pending) - len(recent)], recent
+
+    def _summary_messages(self, summary: Optional[str], outputs: Sequence[str]) -> list:
+        system_prompt = f"""You maintain a short summary of what the agents did so far and of their results.
+        Update the current summary with the new agent outputs. Keep the facts, values, file paths and failures that later steps may need.
+        Answer with the updated summary only, in less than {self.config.summary_token_budget} tokens."""
+        human_prompt = f"""Current summary: {summary or "(empty)"}
+
+        New agent outputs:
+        {chr(10).join(outputs)}"""
+        return [SystemMessage(content=system_prompt), HumanMessage(content=human_prompt)]
+
+    def _fallback_summary(self, summary: Optional[str], outputs: Sequence[str]) -> str:
+        return truncate_tokens("\n".join(filter(None, [summary, *outputs])), self.config.summary_token_budget)
+
+    def summarize(self, summary: Optional[str], outputs: Sequence[str]) -> Optional[str]:
+        if not outputs:
+            return summary
+        messages = self._summary_messages(summary, outputs)
+        record_prompt_tokens("memory", messages)
+        try:
+            return truncate_tokens(get_llm().invoke(messages).content, self.config.summary_token_budget)
+        except Exception as e:
+            print(f"Could not summarize the agents' outputs, truncating them instead. Error: {e}")
+            return self._fallback_summary(summary, outputs)
+
+    async def asummarize(self, summary: Optional[str], outputs: Sequence[str]) -> Optional[str]:
+        if not outputs:
+            return summary
+        messages = self._summary_messages(summary, outputs)
+        record_prompt_tokens("memory", messages)
+        try:
+            return truncate_tokens((await get_llm().ainvoke(messages)).content, self.config.summary_token_budget)
+        except Exception as e:
+            print(f"Could not summarize the agents' outputs, truncating them instead. Error: {e}")
+            return self._fallback_summary(summary, outputs)
+
+    @staticmethod
+    def render(summary: Optional[str], recent: Sequence[str]) -> str:
+        parts = []
+        if summary:
+            parts.append(f"Summary of the earlier outputs: {summary}")
+        parts.extend(recent)
+        return "\n".join(parts) if parts else "None"
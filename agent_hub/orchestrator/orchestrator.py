@@ -1,11 +1,18 @@
-from typing import List
+from typing import Dict, List, Optional
 from agent_hub.agent import Agent
-from agent_hub.llms import get_llm
+from agent_hub.llms import get_structured_llm, get_tool_llm
 from agent_hub.state import State
 from agent_hub.agent import AgentInput
-from pydantic import BaseModel
+from agent_hub.config import AgentHubConfig
+from pydantic import BaseModel, ValidationError
+from agent_hub.telemetry import telemetry
+from agent_hub.memory import OutputMemory, record_prompt_tokens
+from agent_hub.tokens import truncate_tokens
+from agent_hub.orchestrator.prompts import OrchestratorPrompts, compile_prompts, format_agent_capabilities
 from langchain_core.messages import HumanMessage, SystemMessage ,AIMessage
-from agent_hub.plan import OrchestratorPlan, AgentTask, TaskStatus
+from agent_hub.plan import OrchestratorPlan, AgentTask, TaskStatus, AgentDispatch, PlanRepair
+from agent_hub.orchestrator.plan_cache import build_plan_cache
+from collections import Counter
 import asyncio
 
 class OrchestratorInput(AgentInput):
@@ -13,18 +20,33 @@ class OrchestratorInput(AgentInput):
 
 
 class Orchestrator(Agent):
-    def __init__(self, available_agents: List[Agent]):
+    def __init__(self, available_agents: List[Agent], config: Optional[AgentHubConfig] = None):
         description = """
         Orchestrator is a class that orchestrates the execution of a plan.
         """
         name = "Orchestrator"
         task = AgentTask.ORCHESTRATOR
-        super().__init__(name, description, task)
+        super().__init__(name, description, task, config)
         self.available_agents = available_agents
         self.agents_names_input_names = {agent.as_tool.__name__: agent.name for agent in available_agents}
-        self.main_llm = get_llm("mistral", "pixtral-large-latest")
-        self.plan_llm = get_llm("mistral", "pixtral-large-latest").with_structured_output(OrchestratorPlan)
+        self.agents_by_name = {agent.name: agent for agent in available_agents}
+        self.tools = [agent.as_tool for agent in available_agents]
         self.plan = None
+        self.plan_cache = build_plan_cache(self.config.orchestrator.plan_cache)
+        self.memory = OutputMemory(self.config.memory)
+        self._prompts = None
+
+    @property
+    def main_llm(self):
+        return get_tool_llm(self.tools, "mistral", "pixtral-large-latest", tool_choice="any")
+
+    @property
+    def plan_llm(self):
+        return get_structured_llm(OrchestratorPlan, "mistral", "pixtral-large-latest")
+
+    @property
+    def repair_llm(self):
+        return get_structured_llm(PlanRepair, "mistral", "pixtral-large-latest")
         
     def define_input_schema(self)->type[OrchestratorInput]:
         return OrchestratorInput
@@ -34,52 +56,55 @@ class Orchestrator(Agent):
         Setup the orchestrator by setting up the available agents.
         """
         print("Setting up the orchestrator")
-        for agent in self.available_agents:
-            print(f"Setting up agent: {agent.name}")
-            await agent.setup()
-        tools = [agent.as_tool for agent in self.available_agents]
-        self.main_llm = self.main_llm.bind_tools(tools, tool_choice="any")
+        print(f"Setting up agents: {[agent.name for agent in self.available_agents]}")
+        # Agents are independent from each other, so they can be set up concurrently
+        await asyncio.gather(*(agent.setup() for agent in self.available_agents))
+        self._prompts = compile_prompts(self.available_agents)
         print("Orchestrator setup complete")
 
-    def create_plan(self, query: str) -> OrchestratorPlan:
+    @property
+    def prompts(self) -> OrchestratorPrompts:
+        # compiled at setup, or on first use when the agents' setup is skipped
+        if self._prompts is None:
+            self._prompts = compile_prompts(self.available_agents)
+        return self._prompts
+
+    def _plan_messages(self, query: str) -> list:
         """
-        Create a plan for computer interaction tasks by understanding available agents' capabilities
+        Build the planner messages for computer interaction tasks by understanding available agents' capabilities
         and limitations.
         """
-        system_prompt = f"""You are an expert planner designed to help AI systems interact with computers efficiently.
-        Given a query from a user, you need to break it down into a series of specific tasks that can be handled by different agents (e.g., vision-based agents for screen interaction, CLI-based agents for terminal tasks).
-        Ensure the plan is detailed, well-structured, and efficient.
-
-        Instructions:
-        1. Analyze the user's query and break it into distinct tasks.
-        
-        2. For each task, assign the most appropriate agent, keeping in mind the agent's strengths and limitations:
-            - Vision-based agents are useful for GUI interactions but come with higher latency and token costs. So use them only when necessary.
-            - CLI-based agents are efficient for text-based tasks and have lower resource usage.
-            - Other agents like file system or web navigation agents should be used for specific actions like file handling or web browsing.
-            - Some tasks are better handled by direct API calls or command-line operations
-            - Complex UI interactions may require multiple steps
-           
-        3. Ensure the plan includes:
-            - A task name.
-            - A task description with specific details on what needs to be done.
-            - The name of the agent that will execute the task.
-            - Order and dependencies between tasks, as some tasks may need to be executed sequentially (e.g., opening a file before editing it).
-
-        Important: Though the plan should be detailed, it should be concise and to the point (No unnecessary steps). Also you only have access to the following agents:
-
-        Available specialized agents and their capabilities:
-        {self._format_agent_capabilities()}
-        
-        Thus, you should only use the agents that are necessary to complete the task.
-        Note: You can use the same agent multiple times if needed.
-        IMPORTANT: Look at the agent's description and capabilities. Therefore don't give too granular queries. Give a high level query if the agents can handle them.
-        """
-        
         human_prompt = f"""Plan the computer interaction steps for this task: {query}
         Break it down into specific, atomic operations that match our agents' capabilities."""
-        messages = [SystemMessage(content=system_prompt), HumanMessage(content=human_prompt)]
-        plan = self.plan_llm.invoke(messages)
+        messages = self.prompts.planner.messages(human_prompt)
+        record_prompt_tokens(self.name, messages)
+        return messages
+
+    def _cached_plan(self, query: str, use_cache: bool) -> Optional[OrchestratorPlan]:
+        if not use_cache or self.plan_cache is None:
+            return None
+        return self.plan_cache.lookup(query)
+
+    def create_plan(self, query: str, use_cache: bool = True) -> OrchestratorPlan:
+        """
+        Create a plan for computer interaction tasks.
+        The plan of a similar past query is reused when available (see `PlanCache`).
+        """
+        plan = self._cached_plan(query, use_cache)
+        if plan is not None:
+            return plan
+        plan = self.plan_llm.invoke(self._plan_messages(query))
+        print("New Plan Created: \n", plan.model_dump_json(indent=4))
+        return plan
+
+    async def acreate_plan(self, query: str, use_cache: bool = True) -> OrchestratorPlan:
+        """
+        Async version of `create_plan`.
+        """
+        plan = self._cached_plan(query, use_cache)
+        if plan is not None:
+            return plan
+        plan = await self.plan_llm.ainvoke(self._plan_messages(query))
         print("New Plan Created: \n", plan.model_dump_json(indent=4))
         return plan
 
@@ -87,86 +112,49 @@ class Orchestrator(Agent):
         """
         Format available agents with detailed capability descriptions and limitations.
         """
-        capability_template = """
-        - {name}: {description}
+        return format_agent_capabilities(self.available_agents)
+
+    def _execution_messages(self, plan: OrchestratorPlan, memory: str, task_index: int) -> list:
         """
-        #   Optimal for: {optimal_uses}
-        #   Limitations: {limitations}
-        #   Interaction method: {interaction_method}
-        
-        capabilities = []
-        for agent in self.available_agents:
-            # You would need to enhance Agent class to include these additional attributes
-            capabilities.append(capability_template.format(
-                name=agent.name,
-                description=agent.description,
-                # optimal_uses=agent.optimal_uses,
-                # limitations=agent.limitations,
-                # interaction_method=agent.interaction_method
-            ))
-        return "\n".join(capabilities)
-
-    def execute_plan(self, plan: OrchestratorPlan, previous_outputs: List[str]):
+        Build the messages asking the main LLM to pick the agent (and its input) for the given task.
+        The dynamic content comes after the static executor prefix.
         """
-        Execute the plan by invoking the appropriate agents for each task.
-        The orchestrator should manage dependencies, handle agent outputs, and ensure tasks are completed in the correct order.
+        current_task = plan.tasks[task_index]
+        messages = self.prompts.executor.messages(
+            f"Plan:\n{plan.to_prompt()}",
+            f"Previous outputs:\n{memory}",
+            f"Current task:\n{current_task.model_dump_json(include={'name', 'description', 'execution_agent_name'})}",
+            current_task.description,
+        )
+        record_prompt_tokens(self.name, messages)
+        return messages
+
+    def _direct_dispatch(self, plan: OrchestratorPlan, task_index: int):
         """
-        current_task = plan.tasks[plan.current_task_index]
-        main_llm_system_prompt = f"""You are an expert computer interaction coordinator that executes plans by calling specialized agents.
-            Your role is to translate high-level tasks into specific agent instructions while being aware of computer interaction patterns.
-
-            Key principles:
-            1. Choose the most efficient interaction method:
-            - Prefer CLI/API calls over vision-based interaction when possible
-            - Use vision (VLM) agents only when GUI interaction is necessary
-            - Chain multiple simple commands rather than complex GUI operations
-            
-            2. Provide detailed context to agents:
-            - Include relevant file paths, window titles, or UI elements
-            - Specify expected outcomes and verification criteria
-            - Pass any state from previous operations
-            
-            3. Handle computer interaction carefully:
-            - Verify critical operations before proceeding
-            - Include fallback options for common failure cases
-            - Consider system state (files open, applications running)
-            
-            4. Optimize for reliability:
-            - Break complex UI interactions into smaller steps
-            - Add verification steps after critical operations
-            - Handle timeouts and retries appropriately
-
-            Available specialized agents:
-            {self._format_agent_capabilities()}
-            
-            Plan:
-            {plan.model_dump_json(indent=4)}
-            
-            Current task:
-            {current_task.model_dump_json(indent=4)}
-
-            Look at the previous agents' outputs and use them to complete the current task and provide necessary context to the agent.
-            Previous outputs: {previous_outputs}
-            For each task, you should:
-            1. Analyze what type of computer interaction is needed
-            2. Choose the most efficient agent and interaction method
-
-        IMPORTANT: You should pick one of the available agents to execute the task. Only if and only if the task is not handled by any agent, you don't need to pick an agent.
-        """
-        messages = [SystemMessage(content=main_llm_system_prompt), HumanMessage(content=current_task.description)]
-        retry_count = 0
-        while retry_count < 3:
-            try:
-                llm_output = self.main_llm.invoke(messages)
-                break
-            except Exception as e:
-                print(f"Error executing task: {current_task.name}. Error: {e}")
-                retry_count += 1
-                print(f"Retrying {retry_count} times")
-                continue
-        
+        Agent input and name of a task whose input was given by the planner, validated against the agent's
+        input schema, or None when the tool-selection LLM call is needed.
+        """
+        task = plan.tasks[task_index]
+        agent = self.agents_by_name.get(task.execution_agent_name)
+        if not self.config.orchestrator.direct_dispatch or task.agent_input is None or agent is None:
+            return None
+        try:
+            agent_input = agent.as_tool.model_validate(task.agent_input).model_dump()
+        except ValidationError as e:
+            print(f"Invalid planned input for task {task.name}, asking the LLM instead. Error: {e}")
+            return None
+        telemetry.increment("orchestrator.direct_dispatch")
+        print(f"Directly dispatching task: {task.name}\nto agent: {agent.name}\nwith input: {agent_input}")
+        return agent_input, agent.name
+
+    def _parse_agent_call(self, plan: OrchestratorPlan, llm_output, task_index: int):
+        """
+        Extract the next agent name and input from the main LLM tool calls.
+        """
+        current_task = plan.tasks[task_index]
         next_agent_input = None
         next_agent_name = None
+        telemetry.increment("orchestrator.llm_dispatch")
         
         if llm_output.tool_calls:
             for tool_call in llm_output.tool_calls:
@@ -180,37 +168,263 @@ class Orchestrator(Agent):
         print("************************************************************")
         return next_agent_input, next_agent_name
 
-    def update_plan(self, plan: OrchestratorPlan)->OrchestratorPlan:
+    def execute_plan(self, plan: OrchestratorPlan, memory: str, task_index: Optional[int] = None):
         """
-        Update the plan based on the last task status.
+        Execute the plan by invoking the appropriate agents for each task.
+        The orchestrator should manage dependencies, handle agent outputs, and ensure tasks are completed in the correct order.
         """
-        return self.create_plan(plan.goal)
-        
+        task_index = plan.current_task_index if task_index is None else task_index
+        current_task = plan.tasks[task_index]
+        messages = self._execution_messages(plan, memory, task_index)
+        try:
+            llm_output = self.main_llm.invoke(messages)
+        except Exception as e:
+            # the call was already retried with backoff by the shared transport (see `agent_hub.resilience`)
+            print(f"Error executing task: {current_task.name}. Error: {e}")
+            return None, None
+        return self._parse_agent_call(plan, llm_output, task_index)
+
+    async def aexecute_plan(self, plan: OrchestratorPlan, memory: str, task_index: Optional[int] = None):
+        """
+        Async version of `execute_plan`.
+        """
+        task_index = plan.current_task_index if task_index is None else task_index
+        current_task = plan.tasks[task_index]
+        messages = self._execution_messages(plan, memory, task_index)
+        try:
+            llm_output = await self.main_llm.ainvoke(messages)
+        except Exception as e:
+            # the call was already retried with backoff by the shared transport (see `agent_hub.resilience`)
+            print(f"Error executing task: {current_task.name}. Error: {e}")
+            return None, None
+        return self._parse_agent_call(plan, llm_output, task_index)
+
+    def _repair_messages(self, plan: OrchestratorPlan, failed_index: int, failure_output) -> list:
+        """
+        Build the planner messages asking only for the tasks replacing the failed one and the remaining ones.
+        """
+        task_fields = {"name", "description", "execution_agent_name"}
+        completed = [task.model_dump(include=task_fields) for task in plan.tasks if task.task_status == TaskStatus.SUCCESS]
+        remaining = [
+            task.model_dump(include=task_fields) for index, task in enumerate(plan.tasks)
+            if task.task_status != TaskStatus.SUCCESS and index != failed_index
+        ]
+        human_prompt = f"""A plan is being executed for this task: {plan.goal}
+        These tasks already succeeded, their results are available and they must not be repeated: {completed}
+        This task failed: {plan.tasks[failed_index].model_dump(include=task_fields)}
+        Failure output: {truncate_tokens(str(failure_output), self.config.memory.task_output_token_budget)}
+        These tasks were still to be executed: {remaining}
+        Give only the tasks replacing the failed task and the ones still to be executed, fixing the cause of the failure.
+        New tasks can depend on the tasks that already succeeded."""
+        messages = self.prompts.planner.messages(human_prompt)
+        record_prompt_tokens(self.name, messages)
+        return messages
+
+    def _forget_template(self, plan: OrchestratorPlan):
+        # a reused plan that fails is not a good template
+        if self.plan_cache is not None and plan.template_query is not None:
+            self.plan_cache.invalidate(plan.template_query)
+            plan.template_query = None
+
+    def _remember_plan(self, query: str, plan: OrchestratorPlan):
+        if self.plan_cache is not None and plan.is_completed and all(task.task_status == TaskStatus.SUCCESS for task in plan.tasks):
+            self.plan_cache.add(query, plan)
+
+    @staticmethod
+    def _failed_task_index(plan: OrchestratorPlan) -> Optional[int]:
+        return next((index for index, task in enumerate(plan.tasks) if task.task_status == TaskStatus.FAILURE), None)
+
+    def _repair_budget_exhausted(self, plan: OrchestratorPlan, failed_index: int) -> bool:
+        failed_task = plan.tasks[failed_index]
+        if failed_task.attempts < self.config.orchestrator.max_task_repairs:
+            return False
+        print(f"Task {failed_task.name} failed after {failed_task.attempts} repairs, giving up the plan")
+        plan.is_completed = True
+        return True
+
+    @staticmethod
+    def _apply_repair(plan: OrchestratorPlan, failed_index: int, repair: PlanRepair) -> OrchestratorPlan:
+        """
+        Keep the succeeded tasks (and thus their outputs) and replace the others by the repair tasks.
+        """
+        completed = [task for task in plan.tasks if task.task_status == TaskStatus.SUCCESS]
+        attempts = plan.tasks[failed_index].attempts + 1
+        for task in repair.tasks:
+            task.task_status = TaskStatus.PENDING
+            task.attempts = attempts
+        repaired_plan = OrchestratorPlan(tasks=completed + repair.tasks, goal=plan.goal, current_task_index=len(completed))
+        print("Plan repaired: \n", repaired_plan.model_dump_json(indent=4))
+        return repaired_plan
+
+    @staticmethod
+    def _carry_attempts(plan: OrchestratorPlan, failed_index: int, new_plan: OrchestratorPlan) -> OrchestratorPlan:
+        for task in new_plan.tasks:
+            task.attempts = plan.tasks[failed_index].attempts + 1
+        return new_plan
+
+    def update_plan(self, plan: OrchestratorPlan, failure_output=None) -> OrchestratorPlan:
+        """
+        Update the plan after a task failure: only the failed task and the remaining ones are planned again
+        (or the whole plan, with `plan_repair="replan"`), within the repair budget of the failed task.
+        """
+        failed_index = self._failed_task_index(plan)
+        self._forget_template(plan)
+        if failed_index is None:
+            return self.create_plan(plan.goal, use_cache=False)
+        if self._repair_budget_exhausted(plan, failed_index):
+            return plan
+        if self.config.orchestrator.plan_repair == "replan":
+            return self._carry_attempts(plan, failed_index, self.create_plan(plan.goal, use_cache=False))
+        repair = self.repair_llm.invoke(self._repair_messages(plan, failed_index, failure_output))
+        return self._apply_repair(plan, failed_index, repair)
+
+    async def aupdate_plan(self, plan: OrchestratorPlan, failure_output=None) -> OrchestratorPlan:
+        """
+        Async version of `update_plan`.
+        """
+        failed_index = self._failed_task_index(plan)
+        self._forget_template(plan)
+        if failed_index is None:
+            return await self.acreate_plan(plan.goal, use_cache=False)
+        if self._repair_budget_exhausted(plan, failed_index):
+            return plan
+        if self.config.orchestrator.plan_repair == "replan":
+            return self._carry_attempts(plan, failed_index, await self.acreate_plan(plan.goal, use_cache=False))
+        repair = await self.repair_llm.ainvoke(self._repair_messages(plan, failed_index, failure_output))
+        return self._apply_repair(plan, failed_index, repair)
+
+    def _collect_task_results(self, state: State) -> Dict:
+        """
+        Fan-in: turn the results of the tasks dispatched at the previous step into a state update.
+        Results are consumed in plan order, so the outputs don't depend on which agent finished first.
+        """
+        plan = state.get("plan", None)
+        results = state.get("task_results") or {}
+        update = {"task_results": None, "previous_outputs": []}
+        if plan is None or not results:
+            return update
+        for index in sorted(results):
+            plan.tasks[index].task_status = results[index].status
+            update["previous_outputs"].append(results[index].summary)
+        failed = [index for index in sorted(results) if results[index].status == TaskStatus.FAILURE]
+        last_index = failed[0] if failed else max(results)
+        update["last_task_status"] = results[last_index].status
+        update["last_task_output"] = results[last_index].output
+        return update
+
+    def _schedule(self, plan: OrchestratorPlan) -> List[int]:
+        """
+        Pick the ready tasks to run at this step, within the parallelism caps, or complete the plan.
+        """
+        if plan.is_completed:
+            return []
+        ready = plan.ready_tasks()
+        if not ready:
+            if any(task.task_status == TaskStatus.PENDING for task in plan.tasks):
+                print("No task can be executed anymore (unsatisfiable dependencies), completing the plan")
+            plan.is_completed = True
+            return []
+        limits = self.config.orchestrator
+        per_agent = Counter()
+        scheduled = []
+        for index in ready:
+            agent_name = plan.tasks[index].execution_agent_name
+            if len(scheduled) >= limits.max_parallel_tasks:
+                break
+            if per_agent[agent_name] >= limits.max_parallel(agent_name):
+                continue
+            per_agent[agent_name] += 1
+            scheduled.append(index)
+        if not scheduled:
+            # only with caps below 1, which the config rejects
+            print("No ready task fits the parallelism caps, completing the plan")
+            plan.is_completed = True
+            return []
+        plan.current_task_index = scheduled[0]
+        return scheduled
+
+    @staticmethod
+    def _dispatch_update(plan: OrchestratorPlan, scheduled: List[int], agent_calls: List[tuple], update: Dict) -> Dict:
+        """
+        Fan-out: mark the tasks given to an agent as running and send them to the graph.
+        """
+        dispatches = []
+        for index, (agent_input, agent_name) in zip(scheduled, agent_calls):
+            if agent_name is None:
+                continue
+            plan.tasks[index].task_status = TaskStatus.RUNNING
+            dispatches.append(AgentDispatch(task_index=index, agent_name=agent_name, agent_input=agent_input))
+        first = dispatches[0] if dispatches else None
+        update.update({
+            "plan": plan,
+            "dispatches": dispatches,
+            "next_agent_input": first.agent_input if first else None,
+            "next_agent_name": first.agent_name if first else None,
+        })
+        return update
+
     def __call__(self, state: State):
         """
         The orchestrator will be called with a user query to execute the tasks defined in the plan.
+        Every ready task (whose dependencies succeeded) is dispatched at once and the agents run in parallel.
         """
         orchestrator_input = OrchestratorInput(query=state["user_input"])
+        update = self._collect_task_results(state)
         # First, create a detailed plan for the query
         plan = state.get("plan", None)
-        previous_outputs = state.get("previous_outputs", [])
-        print(f"Inside Orchestrator, current plan: {plan.model_dump_json(indent=4) if plan else 'None'}")
-        last_task_status = state.get("last_task_status", TaskStatus.PENDING)
+        print(f"Inside Orchestrator, current plan: {plan.to_prompt() if plan else 'None'}")
         if plan is None:
             plan = self.create_plan(orchestrator_input.query)
-        elif last_task_status == TaskStatus.FAILURE:
-            plan = self.update_plan(plan)
-        elif last_task_status == TaskStatus.SUCCESS and plan.current_task_index < len(plan.tasks) - 1:
-            plan.tasks[plan.current_task_index].task_status = TaskStatus.SUCCESS
-            plan.current_task_index += 1
-        else:
-            plan.is_completed = True
-        # Execute the tasks based on the plan
-        if not plan.is_completed:
-            next_agent_input, next_agent_name = self.execute_plan(plan, previous_outputs)
-        else :
-            next_agent_input = None
-            next_agent_name = None
-        return {"plan": plan, "next_agent_input": next_agent_input, "next_agent_name": next_agent_name}
+        elif update.get("last_task_status") == TaskStatus.FAILURE:
+            plan = self.update_plan(plan, update["last_task_output"])
+        # Execute the ready tasks of the plan
+        scheduled = self._schedule(plan)
+        self._remember_plan(orchestrator_input.query, plan)
+        direct_calls = {index: self._direct_dispatch(plan, index) for index in scheduled}
+        # the agents' outputs are only needed (and summarized) for the tasks going through the LLM
+        memory = self._recall(state, update) if not all(direct_calls.values()) else None
+        agent_calls = [direct_calls[index] or self.execute_plan(plan, memory, index) for index in scheduled]
+        return self._dispatch_update(plan, scheduled, agent_calls, update)
+
+    def _recall_window(self, state: State, update: Dict):
+        outputs = state.get("previous_outputs", []) + update["previous_outputs"]
+        summarized = state.get("summarized_outputs") or 0
+        to_summarize, recent = self.memory.window(outputs, summarized)
+        update["summarized_outputs"] = summarized + len(to_summarize)
+        return to_summarize, recent
+
+    def _recall(self, state: State, update: Dict) -> str:
+        """
+        Render the previous outputs for the prompts: latest ones verbatim, older ones rolled into the summary.
+        """
+        to_summarize, recent = self._recall_window(state, update)
+        update["memory_summary"] = self.memory.summarize(state.get("memory_summary"), to_summarize)
+        return self.memory.render(update["memory_summary"], recent)
+
+    async def _arecall(self, state: State, update: Dict) -> str:
+        to_summarize, recent = self._recall_window(state, update)
+        update["memory_summary"] = await self.memory.asummarize(state.get("memory_summary"), to_summarize)
+        return self.memory.render(update["memory_summary"], recent)
+
     async def __acall__(self, state: State):
-        print(" Async Orchestrator received the query:")
+        """
+        Async version of `__call__`, used when the graph runs through `ainvoke`/`astream`.
+        The agent inputs of the scheduled tasks are generated concurrently.
+        """
+        orchestrator_input = OrchestratorInput(query=state["user_input"])
+        update = self._collect_task_results(state)
+        plan = state.get("plan", None)
+        print(f"Inside Orchestrator, current plan: {plan.to_prompt() if plan else 'None'}")
+        if plan is None:
+            plan = await self.acreate_plan(orchestrator_input.query)
+        elif update.get("last_task_status") == TaskStatus.FAILURE:
+            plan = await self.aupdate_plan(plan, update["last_task_output"])
+        scheduled = self._schedule(plan)
+        self._remember_plan(orchestrator_input.query, plan)
+        direct_calls = {index: self._direct_dispatch(plan, index) for index in scheduled}
+        memory = await self._arecall(state, update) if not all(direct_calls.values()) else None
+        agent_calls = await asyncio.gather(*(self._adispatch(plan, memory, index, direct_calls[index]) for index in scheduled))
+        return self._dispatch_update(plan, scheduled, agent_calls, update)
+
+    async def _adispatch(self, plan: OrchestratorPlan, memory: Optional[str], task_index: int, direct_call):
+        return direct_call or await self.aexecute_plan(plan, memory, task_index)
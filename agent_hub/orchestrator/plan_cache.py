@@ -0,0 +1,262 @@
+"""
+Plan templates of past successful queries, reused to skip the planning LLM call.
+
+Queries are indexed under hashed n-gram TF-IDF vectors (see `agent_hub.text_features`).
+When a new query is similar enough to an indexed one, the cached plan is copied and
+parameterized: the words that differ between the two queries (e.g. a city or a file name)
+are substituted in the plan's goal, task names, descriptions, dependencies and agent inputs.
+A similar query is only a candidate: the plan isn't reused when words were added to or dropped
+from the template query, or when a replaced span can't be found in the plan (the plan doesn't
+depend on it the way the substitution assumes, e.g. a different action was asked for).
+"""
+import difflib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from agent_hub.config import PlanCacheConfig
+from agent_hub.plan import OrchestratorPlan, TaskStatus
+from agent_hub.telemetry import telemetry
+from agent_hub.text_features import hash_text, l2_normalize
+
+# words, keeping file names and paths (e.g. weather.txt, ./notes/today.md) in one piece
+_PARAMETER_PATTERN = re.compile(r"[\w~]+(?:[./\\:-][\w~]+)*|\S", re.UNICODE)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def _has_words(tokens: List[str]) -> bool:
+    return any(re.search(r"\w", token) for token in tokens)
+
+
+def query_substitutions(template_query: str, query: str) -> Optional[Dict[str, str]]:
+    """
+    Spans of the template query replaced in the new query (aligned word by word with difflib),
+    None if words were inserted or dropped (punctuation aside), which no substitution can express.
+    """
+    template_tokens = _PARAMETER_PATTERN.findall(template_query)
+    tokens = _PARAMETER_PATTERN.findall(query)
+    matcher = difflib.SequenceMatcher(None, template_tokens, tokens, autojunk=False)
+    substitutions = {}
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "replace":
+            substitutions[" ".join(template_tokens[i1:i2])] = " ".join(tokens[j1:j2])
+        elif tag != "equal" and _has_words(template_tokens[i1:i2] + tokens[j1:j2]):
+            return None
+    return substitutions
+
+
+def _span_pattern(spans) -> re.Pattern:
+    spans = sorted(spans, key=len, reverse=True)
+    return re.compile("|".join(rf"(?<!\w){re.escape(span)}(?!\w)" for span in spans), re.IGNORECASE)
+
+
+def substitute(text: str, substitutions: Dict[str, str]) -> str:
+    """
+    Apply all the substitutions in a single pass (so a replacement is never replaced again), ignoring case.
+    """
+    if not substitutions:
+        return text
+    replacements = {old.lower(): new for old, new in substitutions.items()}
+
+    def replace(match: re.Match) -> str:
+        new = replacements[match.group(0).lower()]
+        # "Write the results" -> "Append the results"
+        if match.group(0)[:1].isupper() and new[:1].islower():
+            new = new[:1].upper() + new[1:]
+        return new
+
+    return _span_pattern(substitutions).sub(replace, text)
+
+
+def unsafe_substitution(plan: OrchestratorPlan, substitutions: Dict[str, str]) -> Optional[str]:
+    """
+    A substitution the plan can't be parameterized with, if any: its span is nowhere in the plan's task
+    names, descriptions and agent inputs, or a task mentions it while its (directly dispatched) agent input doesn't.
+    """
+    for old in substitutions:
+        pattern = _span_pattern([old])
+        found = False
+        for task in plan.tasks:
+            in_text = bool(pattern.search(task.name) or pattern.search(task.description))
+            in_input = task.agent_input is not None and any(
+                isinstance(value, str) and pattern.search(value) for value in task.agent_input.values()
+            )
+            if in_text and task.agent_input is not None and not in_input:
+                return old
+            found = found or in_text or in_input
+        if not found:
+            return old
+    return None
+
+
+def parameterize_plan(plan: OrchestratorPlan, substitutions: Dict[str, str], goal: str, template_query: Optional[str] = None) -> OrchestratorPlan:
+    """
+    Fresh (pending) copy of a template plan for a new query.
+    """
+    plan = plan.model_copy(deep=True)
+    plan.goal = goal
+    plan.template_query = template_query
+    plan.current_task_index = 0
+    plan.is_completed = False
+    for task in plan.tasks:
+        task.name = substitute(task.name, substitutions)
+        task.description = substitute(task.description, substitutions)
+        if task.dependencies is not None:
+            task.dependencies = [substitute(name, substitutions) for name in task.dependencies]
+        if task.agent_input is not None:
+            task.agent_input = {
+                key: substitute(value, substitutions) if isinstance(value, str) else value
+                for key, value in task.agent_input.items()
+            }
+        task.task_status = TaskStatus.PENDING
+        task.attempts = 0
+    return plan
+
+
+class PlanCache:
+    """
+    LRU index of successful plans, optionally persisted to a JSON file.
+
+    Args:
+        path: JSON file the templates are saved to and loaded from (None to keep them in memory only)
+        max_entries: Maximum number of templates, the least recently used ones are evicted
+        similarity_threshold: Minimum cosine similarity between two queries to reuse a plan
+        n_features: Size of the hashed feature space
+    """
+    def __init__(self, path: Optional[str] = None, max_entries: int = 256, similarity_threshold: float = 0.7, n_features: int = 2 ** 14):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.n_features = n_features
+        self._templates: "OrderedDict[str, Tuple[str, OrchestratorPlan]]" = OrderedDict()
+        self._counts: Dict[str, np.ndarray] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _best_match(self, query: str) -> Tuple[Optional[str], float]:
+        """
+        Most similar indexed query (TF-IDF cosine, idf computed over the indexed queries).
+
+        Query features the index has never seen (typically the new entity of the query) can't match any
+        template, they get the lowest idf instead of the highest so they don't outweigh the shared words.
+        """
+        if not self._templates:
+            return None, 0.0
+        keys = list(self._templates)
+        counts = np.stack([self._counts[key] for key in keys])
+        document_frequency = (counts > 0).sum(axis=0)
+        idf = np.log((1 + len(keys)) / (1 + document_frequency)) + 1.0
+        index_vectors = l2_normalize(np.log1p(counts) * idf)
+        query_idf = np.where(document_frequency > 0, idf, 1.0)
+        query_vector = l2_normalize(np.log1p(hash_text(query, self.n_features)) * query_idf)
+        similarities = index_vectors @ query_vector
+        best = int(np.argmax(similarities))
+        return keys[best], float(similarities[best])
+
+    def lookup(self, query: str) -> Optional[OrchestratorPlan]:
+        """
+        Plan of the most similar past query, parameterized for this query, or None below the similarity threshold
+        or when the differences between the two queries aren't parameters of the plan.
+        """
+        with self._lock:
+            key, similarity = self._best_match(query)
+            telemetry.observe("plan_cache.similarity", similarity)
+            if key is None or similarity < self.similarity_threshold:
+                telemetry.increment("plan_cache.miss")
+                return None
+            template_query, template_plan = self._templates[key]
+        substitutions = query_substitutions(template_query, query)
+        if substitutions is None:
+            reason = "words were added or dropped"
+        else:
+            unsafe = unsafe_substitution(template_plan, substitutions)
+            reason = f"\"{unsafe}\" isn't a parameter of its plan" if unsafe is not None else None
+        if reason is not None:
+            print(f"Not reusing the plan of \"{template_query}\" (similarity {similarity:.2f}): {reason}")
+            telemetry.increment("plan_cache.rejected")
+            telemetry.increment("plan_cache.miss")
+            return None
+        with self._lock:
+            if key in self._templates:
+                self._templates.move_to_end(key)
+        telemetry.increment("plan_cache.hit")
+        print(f"Reusing the plan of \"{template_query}\" (similarity {similarity:.2f}, substitutions {substitutions})")
+        return parameterize_plan(template_plan, substitutions, goal=query, template_query=template_query)
+
+    def add(self, query: str, plan: OrchestratorPlan):
+        """
+        Index the plan of a query that was executed successfully.
+        """
+        key = normalize_query(query)
+        with self._lock:
+            self._templates[key] = (query, parameterize_plan(plan, {}, goal=plan.goal))
+            self._counts[key] = hash_text(query, self.n_features)
+            self._templates.move_to_end(key)
+            while len(self._templates) > self.max_entries:
+                evicted, _ = self._templates.popitem(last=False)
+                del self._counts[evicted]
+            self._save()
+
+    def invalidate(self, template_query: str):
+        """
+        Drop a template (e.g. after a plan copied from it failed).
+        """
+        key = normalize_query(template_query)
+        with self._lock:
+            if key not in self._templates:
+                return
+            del self._templates[key]
+            del self._counts[key]
+            self._save()
+
+    def stats(self) -> Dict:
+        hits = telemetry.counter("plan_cache.hit")
+        misses = telemetry.counter("plan_cache.miss")
+        lookups = hits + misses
+        return {"entries": len(self), "hits": hits, "misses": misses, "hit_rate": hits / lookups if lookups else 0.0}
+
+    def _load(self):
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            entries = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"Could not load the plan cache {self.path}: {e}")
+            return
+        for entry in entries[-self.max_entries:]:
+            key = normalize_query(entry["query"])
+            self._templates[key] = (entry["query"], OrchestratorPlan.model_validate(entry["plan"]))
+            self._counts[key] = hash_text(entry["query"], self.n_features)
+
+    def _save(self):
+        if self.path is None:
+            return
+        entries: List[Dict] = [
+            {"query": query, "plan": plan.model_dump(mode="json")} for query, plan in self._templates.values()
+        ]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename, so a crash never leaves a truncated file behind
+        temporary_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        temporary_path.write_text(json.dumps(entries), encoding="utf-8")
+        os.replace(temporary_path, self.path)
+
+
+def build_plan_cache(config: PlanCacheConfig) -> Optional[PlanCache]:
+    if not config.enabled:
+        return None
+    return PlanCache(
+        path=config.path,
+        max_entries=config.max_entries,
+        similarity_threshold=config.similarity_threshold,
+        n_features=config.n_features,
+    )
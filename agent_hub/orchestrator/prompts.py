@@ -0,0 +1,164 @@
+"""
+Prompt templates of the orchestrator.
+
+The static part of each prompt (instructions and agent capabilities) is compiled once per agent set
+into an immutable `PromptPrefix` system message. The dynamic content (query, plan, previous outputs,
+current task) always comes after it, so consecutive calls share the exact same prefix and benefit
+from provider-side prompt caching. Prefix reuse is counted in `agent_hub.telemetry`.
+"""
+import hashlib
+import threading
+from typing import Dict, Sequence, Tuple
+from langchain_core.messages import HumanMessage, SystemMessage
+from agent_hub.agent import Agent
+from agent_hub.telemetry import telemetry
+from agent_hub.tokens import count_tokens
+
+PLANNER_TEMPLATE = """You are an expert planner designed to help AI systems interact with computers efficiently.
+        Given a query from a user, you need to break it down into a series of specific tasks that can be handled by different agents (e.g., vision-based agents for screen interaction, CLI-based agents for terminal tasks).
+        Ensure the plan is detailed, well-structured, and efficient.
+
+        Instructions:
+        1. Analyze the user's query and break it into distinct tasks.
+
+        2. For each task, assign the most appropriate agent, keeping in mind the agent's strengths and limitations:
+            - Vision-based agents are useful for GUI interactions but come with higher latency and token costs. So use them only when necessary.
+            - CLI-based agents are efficient for text-based tasks and have lower resource usage.
+            - Other agents like file system or web navigation agents should be used for specific actions like file handling or web browsing.
+            - Some tasks are better handled by direct API calls or command-line operations
+            - Complex UI interactions may require multiple steps
+
+        3. Ensure the plan includes:
+            - A task name.
+            - A task description with specific details on what needs to be done.
+            - The name of the agent that will execute the task.
+            - Order and dependencies between tasks, as some tasks may need to be executed sequentially (e.g., opening a file before editing it).
+              List in `dependencies` the names of the tasks whose results a task needs, and use an empty list for tasks that don't need any other task:
+              independent tasks (e.g., two unrelated web searches) are executed in parallel.
+            - The input arguments of the agent (`agent_input`) when they are fully known at planning time, i.e. when the task doesn't need the results of other tasks.
+              The task is then sent directly to the agent. Leave it empty when the input depends on the results of other tasks.
+
+        Important: Though the plan should be detailed, it should be concise and to the point (No unnecessary steps). Also you only have access to the following agents:
+
+        Available specialized agents and their capabilities:
+        {capabilities}
+
+        Thus, you should only use the agents that are necessary to complete the task.
+        Note: You can use the same agent multiple times if needed.
+        IMPORTANT: Look at the agent's description and capabilities. Therefore don't give too granular queries. Give a high level query if the agents can handle them.
+        """
+
+EXECUTOR_TEMPLATE = """You are an expert computer interaction coordinator that executes plans by calling specialized agents.
+            Your role is to translate high-level tasks into specific agent instructions while being aware of computer interaction patterns.
+
+            Key principles:
+            1. Choose the most efficient interaction method:
+            - Prefer CLI/API calls over vision-based interaction when possible
+            - Use vision (VLM) agents only when GUI interaction is necessary
+            - Chain multiple simple commands rather than complex GUI operations
+
+            2. Provide detailed context to agents:
+            - Include relevant file paths, window titles, or UI elements
+            - Specify expected outcomes and verification criteria
+            - Pass any state from previous operations
+
+            3. Handle computer interaction carefully:
+            - Verify critical operations before proceeding
+            - Include fallback options for common failure cases
+            - Consider system state (files open, applications running)
+
+            4. Optimize for reliability:
+            - Break complex UI interactions into smaller steps
+            - Add verification steps after critical operations
+            - Handle timeouts and retries appropriately
+
+            Available specialized agents:
+            {capabilities}
+
+            You will be given the plan, the previous agents' outputs and the current task.
+            Look at the previous agents' outputs and use them to complete the current task and provide necessary context to the agent.
+            For each task, you should:
+            1. Analyze what type of computer interaction is needed
+            2. Choose the most efficient agent and interaction method
+
+        IMPORTANT: You should pick one of the available agents to execute the task. Only if and only if the task is not handled by any agent, you don't need to pick an agent.
+        """
+
+CAPABILITY_TEMPLATE = """
+        - {name}: {description}
+          Input arguments: {input_arguments}
+        """
+
+_seen_prefixes = set()
+_seen_lock = threading.Lock()
+
+
+def format_agent_capabilities(agents: Sequence[Agent]) -> str:
+    """
+    Format available agents with their capability descriptions and input arguments.
+    """
+    return "\n".join(
+        CAPABILITY_TEMPLATE.format(
+            name=agent.name,
+            description=agent.description,
+            input_arguments={name: field.description for name, field in agent.as_tool.model_fields.items()},
+        )
+        for agent in agents
+    )
+
+
+class PromptPrefix:
+    """
+    Immutable system message shared by every call of one kind (the dynamic content is sent after it).
+    """
+    def __init__(self, name: str, content: str):
+        self.name = name
+        self.message = SystemMessage(content=content)
+        self.digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+        self.tokens = count_tokens(content)
+
+    def messages(self, *dynamic_parts: str) -> list:
+        """
+        The prefix followed by the dynamic content, recording whether this exact prefix was already sent.
+        """
+        with _seen_lock:
+            reused = self.digest in _seen_prefixes
+            _seen_prefixes.add(self.digest)
+        telemetry.increment(f"prompt_prefix.{self.name}.{'reused' if reused else 'new'}")
+        if reused:
+            telemetry.increment(f"prompt_prefix.{self.name}.reused_tokens", self.tokens)
+        return [self.message, HumanMessage(content="\n\n".join(dynamic_parts))]
+
+
+class OrchestratorPrompts:
+    """
+    Prompt prefixes of the orchestrator for one agent set.
+    """
+    def __init__(self, agents: Sequence[Agent]):
+        capabilities = format_agent_capabilities(agents)
+        self.planner = PromptPrefix("planner", PLANNER_TEMPLATE.format(capabilities=capabilities))
+        self.executor = PromptPrefix("executor", EXECUTOR_TEMPLATE.format(capabilities=capabilities))
+
+
+_compiled_prompts: Dict[Tuple, OrchestratorPrompts] = {}
+_compile_lock = threading.Lock()
+
+
+def compile_prompts(agents: Sequence[Agent]) -> OrchestratorPrompts:
+    """
+    Compile (once per agent set) the orchestrator prompt prefixes.
+    """
+    key = tuple((agent.name, agent.description, agent.as_tool.__name__) for agent in agents)
+    with _compile_lock:
+        if key not in _compiled_prompts:
+            _compiled_prompts[key] = OrchestratorPrompts(agents)
+        return _compiled_prompts[key]
+
+
+def prefix_reuse_rate(name: str) -> float:
+    """
+    Share of the calls that sent an already sent prefix (cacheable by the provider).
+    """
+    reused = telemetry.counter(f"prompt_prefix.{name}.reused")
+    total = reused + telemetry.counter(f"prompt_prefix.{name}.new")
+    return reused / total if total else 0.0
@@ -1,5 +1,6 @@
-from typing import List
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel, Field
+from pydantic.json_schema import SkipJsonSchema
 from enum import Enum
 
 
@@ -8,6 +9,7 @@ class TaskStatus(Enum):
     The status of a task with an optional comment/reason field.
     """
     PENDING = "pending"
+    RUNNING = "running"
     SUCCESS = "success"
     FAILURE = "failure"
 
@@ -20,7 +22,11 @@ class Task(BaseModel):
     description: str
     execution_agent_name: str
     task_status: TaskStatus = TaskStatus.PENDING
-    
+    dependencies: Optional[List[str]] = Field(default=None, description="Names of the tasks whose results this task needs. Use an empty list if the task can start right away (independent tasks are executed in parallel)")
+    agent_input: Optional[Dict[str, Any]] = Field(default=None, description="Input of the execution agent (the arguments of its input schema), only when it is fully known when planning, i.e. the task doesn't need the results of other tasks. Leave it empty otherwise")
+    # number of repairs that led to this task (hidden from the planner LLM)
+    attempts: SkipJsonSchema[int] = 0
+
 class OrchestratorPlan(BaseModel):
     """
     A plan is a list of tasks to be performed by the orchestrator in order to successfully complete the main task asked by the user.
@@ -30,6 +36,76 @@ class OrchestratorPlan(BaseModel):
     goal: str
     current_task_index: int = 0
     is_completed: bool = False
+    # query of the cached plan this plan was copied from (hidden from the planner LLM)
+    template_query: SkipJsonSchema[Optional[str]] = None
+
+    def dependency_indices(self, index: int) -> List[int]:
+        """
+        Indices of the tasks the given task depends on.
+        A task without explicit dependencies depends on the previous one (sequential plan).
+        """
+        task = self.tasks[index]
+        if task.dependencies is None:
+            return [index - 1] if index > 0 else []
+        indices = {task.name: i for i, task in enumerate(self.tasks)}
+        return [indices[name] for name in task.dependencies if name in indices and indices[name] != index]
+
+    def to_prompt(self) -> str:
+        """
+        Compact rendering of the plan for prompts (one line per task).
+        """
+        lines = [f"Goal: {self.goal}"]
+        for index, task in enumerate(self.tasks):
+            dependencies = ", ".join(self.tasks[dependency].name for dependency in self.dependency_indices(index)) or "none"
+            lines.append(f"{index}. [{task.task_status.value}] {task.name} (agent: {task.execution_agent_name}; after: {dependencies}): {task.description}")
+        return "\n".join(lines)
+
+    def ready_tasks(self) -> List[int]:
+        """
+        Indices (in plan order) of the pending tasks whose dependencies all succeeded.
+        """
+        return [
+            index for index, task in enumerate(self.tasks)
+            if task.task_status == TaskStatus.PENDING
+            and all(self.tasks[dependency].task_status == TaskStatus.SUCCESS for dependency in self.dependency_indices(index))
+        ]
+
+
+class PlanRepair(BaseModel):
+    """
+    The tasks replacing the failed task of a plan and the tasks that were still to be executed.
+    Tasks that already succeeded are kept and must not be repeated.
+    """
+    tasks: List[Task]
+
+
+class AgentDispatch(BaseModel):
+    """
+    A task sent to an agent by the orchestrator (several dispatches of the same step run in parallel).
+    """
+    task_index: int
+    agent_name: str
+    agent_input: Dict[str, Any]
+
+
+class TaskResult(BaseModel):
+    """
+    The result of a dispatched task, merged back into the state by task index.
+    """
+    status: TaskStatus
+    output: Any = None
+    summary: str = ""
+
+    @classmethod
+    def from_update(cls, update: Dict) -> "TaskResult":
+        """
+        Build the result from the state update returned by an agent.
+        """
+        return cls(
+            status=update.get("last_task_status", TaskStatus.SUCCESS),
+            output=update.get("last_task_output"),
+            summary="".join(update.get("previous_outputs", [])),
+        )
 
 class AgentTask(Enum):
     """
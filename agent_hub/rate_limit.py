@@ -0,0 +1,344 @@
+"""
+Process-wide client-side rate limiting of the upstream providers.
+
+Every call to an LLM provider or search API goes through the shared HTTP clients (`agent_hub.transport`),
+whose transport is wrapped by `RateLimitedTransport`. Before a request is sent it waits for:
+- the request and token buckets of its provider and model (the model is read from the JSON body, the
+  tokens are estimated from the body size and `max_tokens`, then corrected with the actual usage),
+- a free slot under the adaptive concurrency limit (AIMD): the limit grows by one every `limit` successful
+  calls and is cut by `decrease_factor` on a 429 or a response much slower than usual.
+A 429 also pauses the provider for its `Retry-After`. Throttling ourselves keeps the calls from being
+rejected (and retried) by the provider.
+The limits are those of the process config (`agent_hub.config.get_config().rate_limit`, see `set_config`).
+The wait time is recorded in `agent_hub.telemetry` as `rate_limit.wait.<provider>`, the 429s as
+`rate_limit.throttled.<provider>` and the concurrency limit as `rate_limit.concurrency.<provider>`.
+"""
+import asyncio
+import json
+import threading
+import time
+from typing import Dict, Optional, Tuple
+import httpx
+from agent_hub.config import ProviderLimits, RateLimitConfig, get_config
+from agent_hub.telemetry import telemetry
+
+# Polling interval while waiting for a concurrency slot (sync and async callers share the slots)
+_SLOT_POLL_INTERVAL = 0.01
+# Responses larger than this aren't parsed for their token usage
+_MAX_USAGE_BODY = 1024 * 1024
+
+
+class TokenBucket:
+    """
+    Refills at `per_minute / 60` per second up to `burst_seconds` worth of rate.
+    Amounts larger than the bucket are allowed once it is full, leaving it in debt.
+    """
+    def __init__(self, per_minute: float, burst_seconds: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate * burst_seconds)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        self._refill(now)
+        missing = min(amount, self.capacity) - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        self.tokens -= amount
+
+    def adjust(self, amount: float):
+        # positive: the call used fewer tokens than reserved
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class Permit:
+    """
+    A call admitted by a `ProviderLimiter`, to be released once the response is read.
+    """
+    def __init__(self, limiter: "ProviderLimiter", tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.start_time = time.monotonic()
+        self.released = False
+
+
+class ProviderLimiter:
+    """
+    Buckets and adaptive concurrency limit of one provider (and model).
+    Thread safe, usable from sync and async code at the same time.
+    """
+    def __init__(self, name: str, limits: ProviderLimits, config: RateLimitConfig):
+        self.name = name
+        self.config = config
+        self.max_concurrency = max(1, limits.max_concurrency)
+        self.limit = float(min(limits.initial_concurrency, self.max_concurrency))
+        self.in_flight = 0
+        self.requests = TokenBucket(limits.requests_per_minute, config.burst_seconds) if limits.requests_per_minute else None
+        self.tokens = TokenBucket(limits.tokens_per_minute, config.burst_seconds) if limits.tokens_per_minute else None
+        self.smoothed_latency: Optional[float] = None
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(self, tokens: int) -> Tuple[Optional[Permit], float]:
+        with self._lock:
+            now = time.monotonic()
+            wait = self.paused_until - now
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(1, now))
+            if self.tokens and tokens:
+                wait = max(wait, self.tokens.wait_time(tokens, now))
+            if wait <= 0 and self.in_flight >= int(self.limit):
+                wait = _SLOT_POLL_INTERVAL
+            if wait > 0:
+                return None, wait
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens and tokens:
+                self.tokens.take(tokens)
+            self.in_flight += 1
+            return Permit(self, tokens), 0.0
+
+    def acquire(self, tokens: int = 0) -> Permit:
+        start_time = time.monotonic()
+        while True:
+            permit, wait = self._try_acquire(tokens)
+            if permit:
+                telemetry.observe(f"rate_limit.wait.{self.name}", time.monotonic() - start_time)
+                return permit
+            time.sleep(wait)
+
+    async def aacquire(self, tokens: int = 0) -> Permit:
+        start_time = time.monotonic()
+        while True:
+            permit, wait = self._try_acquire(tokens)
+            if permit:
+                telemetry.observe(f"rate_limit.wait.{self.name}", time.monotonic() - start_time)
+                return permit
+            await asyncio.sleep(wait)
+
+    def release(self, permit: Permit, status_code: Optional[int], used_tokens: Optional[int] = None,
+                retry_after: Optional[float] = None):
+        """
+        Free the permit's slot and update the concurrency limit from the outcome of the call.
+
+        Args:
+            status_code: Response status, None if the call failed without a response
+            used_tokens: Actual token usage reported by the provider
+            retry_after: Seconds the provider asked to wait (429 `Retry-After`)
+        """
+        if permit.released:
+            return
+        permit.released = True
+        latency = time.monotonic() - permit.start_time
+        with self._lock:
+            now = time.monotonic()
+            self.in_flight -= 1
+            if self.tokens and used_tokens is not None:
+                self.tokens.adjust(permit.tokens - used_tokens)
+            if status_code == 429:
+                telemetry.increment(f"rate_limit.throttled.{self.name}")
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + retry_after)
+                self._decrease(now, force=True)
+            elif status_code is not None and status_code < 500:
+                congested = self.smoothed_latency is not None and latency > self.config.latency_tolerance * self.smoothed_latency
+                self.smoothed_latency = latency if self.smoothed_latency is None else 0.9 * self.smoothed_latency + 0.1 * latency
+                if congested:
+                    self._decrease(now)
+                else:
+                    self.limit = min(self.max_concurrency, self.limit + 1.0 / self.limit)
+            telemetry.observe(f"rate_limit.concurrency.{self.name}", self.limit)
+
+    def _decrease(self, now: float, force: bool = False):
+        # like TCP, decrease at most once per round trip: the calls in flight saw the same congestion
+        if not force and self.smoothed_latency and now - self.last_decrease < self.smoothed_latency:
+            return
+        self.limit = max(1.0, self.limit * self.config.decrease_factor)
+        self.last_decrease = now
+
+
+class RateLimiter:
+    """
+    The `ProviderLimiter` of every provider and model, created on first use.
+    """
+    def __init__(self, config: RateLimitConfig):
+        self.config = config
+        self._limiters: Dict[Tuple[str, Optional[str]], ProviderLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, model: Optional[str] = None) -> ProviderLimiter:
+        with self._lock:
+            if (provider, model) not in self._limiters:
+                self._limiters[provider, model] = ProviderLimiter(provider, self.config.limits_for(provider, model), self.config)
+            return self._limiters[provider, model]
+
+
+_rate_limiters: Dict[RateLimitConfig, RateLimiter] = {}
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(config: Optional[RateLimitConfig] = None) -> RateLimiter:
+    """
+    The process-wide rate limiter (one per config).
+    """
+    config = config or get_config().rate_limit
+    with _rate_limiters_lock:
+        if config not in _rate_limiters:
+            _rate_limiters[config] = RateLimiter(config)
+        return _rate_limiters[config]
+
+
+def _request_model_and_tokens(request: httpx.Request, config: RateLimitConfig) -> Tuple[Optional[str], int]:
+    """
+    Model and estimated tokens (prompt and completion) of a JSON API request, no tokens for non-LLM calls.
+    """
+    try:
+        body = json.loads(request.content) if request.content else None
+    except (ValueError, httpx.RequestNotRead):
+        return None, 0
+    if not isinstance(body, dict):
+        return None, 0
+    model = body.get("model")
+    if "messages" not in body:
+        return model, 0
+    completion_tokens = body.get("max_tokens") or body.get("max_completion_tokens") or config.default_completion_tokens
+    return model, len(request.content) // 4 + completion_tokens
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    try:
+        return float(response.headers.get("retry-after", ""))
+    except ValueError:
+        return None
+
+
+class _UsageTracker:
+    """
+    Collects a JSON response body as it is read, to release the permit with the actual token usage.
+    """
+    def __init__(self, limiter: ProviderLimiter, permit: Permit, response: httpx.Response):
+        self.limiter = limiter
+        self.permit = permit
+        self.status_code = response.status_code
+        self.retry_after = _retry_after(response)
+        self.collect = "json" in response.headers.get("content-type", "") and permit.tokens > 0
+        self.body = bytearray()
+
+    def add(self, chunk: bytes):
+        if self.collect:
+            self.body += chunk
+            if len(self.body) > _MAX_USAGE_BODY:
+                self.collect = False
+                self.body = bytearray()
+
+    def release(self):
+        used_tokens = None
+        if self.collect and self.body:
+            try:
+                used_tokens = (json.loads(bytes(self.body)).get("usage") or {}).get("total_tokens")
+            except (ValueError, AttributeError):
+                pass
+        self.limiter.release(self.permit, self.status_code, used_tokens, self.retry_after)
+
+
+class _LimitedStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, tracker: _UsageTracker):
+        self.stream = stream
+        self.tracker = tracker
+
+    def __iter__(self):
+        for chunk in self.stream:
+            self.tracker.add(chunk)
+            yield chunk
+
+    def close(self):
+        try:
+            self.stream.close()
+        finally:
+            self.tracker.release()
+
+
+class _AsyncLimitedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, tracker: _UsageTracker):
+        self.stream = stream
+        self.tracker = tracker
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            self.tracker.add(chunk)
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self.stream.aclose()
+        finally:
+            self.tracker.release()
+
+
+class RateLimitedTransport(httpx.BaseTransport):
+    """
+    Waits for the provider's rate limits before sending each request. The permit is held until the
+    response body is closed, so streamed responses count as in flight until their last chunk.
+    """
+    def __init__(self, provider: str, transport: httpx.BaseTransport, rate_limiter: Optional[RateLimiter] = None):
+        self.provider = provider
+        self.transport = transport
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = _request_model_and_tokens(request, self.rate_limiter.config)
+        limiter = self.rate_limiter.get(self.provider, model)
+        permit = limiter.acquire(tokens)
+        try:
+            response = self.transport.handle_request(request)
+        except BaseException:
+            limiter.release(permit, None)
+            raise
+        tracker = _UsageTracker(limiter, permit, response)
+        if response.is_closed:
+            # body already loaded by the transport (e.g. `httpx.MockTransport`)
+            tracker.add(response.content)
+            tracker.release()
+        else:
+            response.stream = _LimitedStream(response.stream, tracker)
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRateLimitedTransport(httpx.AsyncBaseTransport):
+    """
+    Async version of `RateLimitedTransport`.
+    """
+    def __init__(self, provider: str, transport: httpx.AsyncBaseTransport, rate_limiter: Optional[RateLimiter] = None):
+        self.provider = provider
+        self.transport = transport
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, tokens = _request_model_and_tokens(request, self.rate_limiter.config)
+        limiter = self.rate_limiter.get(self.provider, model)
+        permit = await limiter.aacquire(tokens)
+        try:
+            response = await self.transport.handle_async_request(request)
+        except BaseException:
+            limiter.release(permit, None)
+            raise
+        tracker = _UsageTracker(limiter, permit, response)
+        if response.is_closed:
+            # body already loaded by the transport (e.g. `httpx.MockTransport`)
+            tracker.add(response.content)
+            tracker.release()
+        else:
+            response.stream = _AsyncLimitedStream(response.stream, tracker)
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
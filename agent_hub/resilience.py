@@ -0,0 +1,256 @@
+"""
+Resilient upstream calls: retries with backoff, deadlines and circuit breakers.
+
+`ResilientTransport` is the outermost transport of the shared HTTP clients (`agent_hub.transport`), so every
+LLM and search API call gets the same policy (the SDKs' own retries are disabled, see `agent_hub.llms`):
+- retryable errors (network errors, timeouts, 408/429/5xx responses) are retried with exponential backoff
+  and full jitter, up to `ResilienceConfig.max_attempts` attempts,
+- the calls made under `request_deadline(budget)` share that budget: each attempt's timeout is cut to the
+  time left, and no attempt (or retry) starts once it is spent,
+- a provider failing `failure_threshold` times in a row has its circuit opened: its calls fail fast for
+  `reset_timeout` seconds, then a single probe call decides whether it is back.
+The policy is the process config's `resilience` (see `agent_hub.config.set_config`).
+Retries, fail-fast calls and exceeded deadlines are counted in `agent_hub.telemetry`.
+"""
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+import httpx
+from agent_hub.config import ResilienceConfig
+from agent_hub.telemetry import telemetry
+
+_deadline: ContextVar[Optional[float]] = ContextVar("agent_hub_deadline", default=None)
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """
+    Raised instead of starting a call once the request budget is spent.
+    """
+
+
+class CircuitOpenError(httpx.TransportError):
+    """
+    Raised instead of calling a provider whose circuit is open.
+    """
+
+
+@contextmanager
+def request_deadline(budget: Optional[float]):
+    """
+    Give the upstream calls made in this context (including the tasks and threads it starts) `budget` seconds
+    in total. Nested deadlines can only shorten the current one.
+    """
+    if budget is None:
+        yield
+        return
+    deadline = time.monotonic() + budget
+    current = _deadline.get()
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Seconds left before the current deadline, None without deadline.
+    """
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def backoff_delay(attempt: int, config: ResilienceConfig) -> float:
+    """
+    Full jitter exponential backoff before retry number `attempt` (starting at 1).
+    """
+    return random.uniform(0, min(config.max_delay, config.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Closed (calls pass), open (calls fail fast) or half-open (one probe call passes) circuit of a provider.
+    """
+    def __init__(self, name: str, config: ResilienceConfig):
+        self.name = name
+        self.config = config
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        # start of the probe call of a half-open circuit (a probe that never reports, e.g. cancelled, expires)
+        self.probe_started: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.config.reset_timeout else "open"
+
+    def before_call(self):
+        with self._lock:
+            state, now = self.state, time.monotonic()
+            if state == "closed":
+                return
+            if state == "half-open" and (self.probe_started is None or now - self.probe_started >= self.config.reset_timeout):
+                self.probe_started = now
+                return
+        telemetry.increment(f"resilience.fail_fast.{self.name}")
+        raise CircuitOpenError(f"Circuit of {self.name} is open after {self.failures} consecutive failures")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_started = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probe_started is not None or self.failures >= self.config.failure_threshold:
+                if self.opened_at is None or self.probe_started is not None:
+                    print(f"Opening the circuit of {self.name} after {self.failures} consecutive failures")
+                    telemetry.increment(f"resilience.circuit_open.{self.name}")
+                self.opened_at = time.monotonic()
+                self.probe_started = None
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_circuit_breaker(name: str, config: ResilienceConfig) -> CircuitBreaker:
+    """
+    The process-wide circuit breaker of a provider.
+    """
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, config)
+        return _breakers[name]
+
+
+class _RetryPolicy:
+    """
+    Decisions shared by the sync and async transports.
+    """
+    def __init__(self, provider: str, config: ResilienceConfig):
+        self.provider = provider
+        self.config = config
+        self.breaker = get_circuit_breaker(provider, config)
+
+    def start_attempt(self, request: httpx.Request):
+        """
+        Cut the attempt's timeouts to the time left before the deadline and check the circuit.
+        """
+        remaining = remaining_time()
+        if remaining is not None and remaining <= 0:
+            telemetry.increment("resilience.deadline_exceeded")
+            raise DeadlineExceeded(f"Request budget spent before calling {self.provider}", request=request)
+        self.breaker.before_call()
+        if remaining is None:
+            return
+        timeouts = request.extensions.get("timeout", {})
+        request.extensions["timeout"] = {
+            name: remaining if timeouts.get(name) is None else min(timeouts[name], remaining)
+            for name in ("connect", "read", "write", "pool")
+        }
+
+    def is_retryable_status(self, status_code: int) -> bool:
+        return status_code in self.config.retry_statuses
+
+    def record_response(self, status_code: int):
+        # any other answer (429s included, they are handled by the rate limiter) means the provider is up
+        if status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def retry_delay(self, attempt: int, reason) -> Optional[float]:
+        """
+        Backoff before the next attempt, None if the call shouldn't be retried.
+        """
+        if attempt >= self.config.max_attempts or isinstance(reason, (CircuitOpenError, DeadlineExceeded)):
+            return None
+        if self.breaker.state != "closed":
+            # the provider looks down: give the actual failure back rather than failing fast on the retry
+            return None
+        delay = backoff_delay(attempt, self.config)
+        remaining = remaining_time()
+        if remaining is not None and remaining <= delay:
+            return None
+        print(f"Call to {self.provider} failed ({reason}), retry {attempt}/{self.config.max_attempts - 1} in {delay:.2f}s")
+        telemetry.increment(f"resilience.retry.{self.provider}")
+        return delay
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """
+    Retries, deadline and circuit breaker around another transport.
+    """
+    def __init__(self, provider: str, transport: httpx.BaseTransport, config: ResilienceConfig):
+        self.transport = transport
+        self.policy = _RetryPolicy(provider, config)
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.policy.start_attempt(request)
+            try:
+                response = self.transport.handle_request(request)
+            except httpx.TransportError as e:
+                self.policy.breaker.record_failure()
+                delay = self.policy.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.policy.record_response(response.status_code)
+            if self.policy.is_retryable_status(response.status_code):
+                delay = self.policy.retry_delay(attempt, f"status {response.status_code}")
+                if delay is not None:
+                    response.close()
+                    time.sleep(delay)
+                    continue
+            return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncResilientTransport(httpx.AsyncBaseTransport):
+    """
+    Async version of `ResilientTransport`.
+    """
+    def __init__(self, provider: str, transport: httpx.AsyncBaseTransport, config: ResilienceConfig):
+        self.transport = transport
+        self.policy = _RetryPolicy(provider, config)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        attempt = 0
+        while True:
+            attempt += 1
+            self.policy.start_attempt(request)
+            try:
+                response = await self.transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                self.policy.breaker.record_failure()
+                delay = self.policy.retry_delay(attempt, e)
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.policy.record_response(response.status_code)
+            if self.policy.is_retryable_status(response.status_code):
+                delay = self.policy.retry_delay(attempt, f"status {response.status_code}")
+                if delay is not None:
+                    await response.aclose()
+                    await asyncio.sleep(delay)
+                    continue
+            return response
+
+    async def aclose(self):
+        await self.transport.aclose()
@@ -0,0 +1,152 @@
+"""
+Local first-stage router of the FrontLLM.
+
+A logistic regression over hashed word/character n-grams (see `agent_hub.text_features`) predicts
+whether a message requires computer interaction. Confident predictions are answered locally in
+microseconds, the others escalate to the FrontLLM structured decision. With `RouterConfig.decisions_path`
+set, the LLM decisions (with the raw user messages) are logged as JSON lines, so the router can be
+(re)trained with `python -m scripts.train_router`. Logging is off by default.
+"""
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from agent_hub.config import RouterConfig
+from agent_hub.telemetry import telemetry
+from agent_hub.text_features import hash_text, l2_normalize
+
+
+def featurize(texts: Sequence[str], n_features: int) -> np.ndarray:
+    return l2_normalize(np.log1p(np.stack([hash_text(text, n_features) for text in texts])))
+
+
+class RouterModel:
+    """
+    Binary logistic regression: probability that a message requires computer interaction.
+
+    Args:
+        n_features: Size of the hashed feature space
+    """
+    def __init__(self, n_features: int = 2 ** 14, weights: Optional[np.ndarray] = None, bias: float = 0.0):
+        self.n_features = n_features
+        self.weights = weights if weights is not None else np.zeros(n_features, dtype=np.float32)
+        self.bias = bias
+
+    def predict_proba(self, texts: Sequence[str]) -> np.ndarray:
+        logits = featurize(texts, self.n_features) @ self.weights + self.bias
+        return 1.0 / (1.0 + np.exp(-logits))
+
+    def fit(self, texts: Sequence[str], labels: Sequence[bool], epochs: int = 300, learning_rate: float = 1.0, l2: float = 1e-4) -> "RouterModel":
+        """
+        Full batch gradient descent, classes weighted by their inverse frequency.
+        """
+        features = featurize(texts, self.n_features)
+        targets = np.asarray(labels, dtype=np.float32)
+        positives = max(targets.sum(), 1.0)
+        negatives = max(len(targets) - targets.sum(), 1.0)
+        sample_weights = np.where(targets == 1.0, len(targets) / (2 * positives), len(targets) / (2 * negatives))
+        for _ in range(epochs):
+            probabilities = 1.0 / (1.0 + np.exp(-(features @ self.weights + self.bias)))
+            errors = (probabilities - targets) * sample_weights
+            self.weights -= learning_rate * (features.T @ errors / len(targets) + l2 * self.weights)
+            self.bias -= learning_rate * float(errors.mean())
+        return self
+
+    def save(self, path: str):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "wb") as file:
+            np.savez(file, weights=self.weights, bias=np.float32(self.bias))
+
+    @classmethod
+    def load(cls, path: str) -> "RouterModel":
+        with np.load(path) as data:
+            weights = data["weights"].astype(np.float32)
+            return cls(n_features=len(weights), weights=weights, bias=float(data["bias"]))
+
+
+class LocalRouter:
+    """
+    Short-circuits the confident "computer interaction required" decisions.
+
+    Args:
+        model: Trained model (None routes every message to the LLM, while still logging its decisions)
+        confidence: Minimum probability of the predicted class to skip the LLM
+        decisions_path: JSON lines file the LLM decisions are appended to (None to disable logging)
+    """
+    def __init__(self, model: Optional[RouterModel] = None, confidence: float = 0.9, decisions_path: Optional[str] = None):
+        self.model = model
+        self.confidence = confidence
+        self.decisions_path = Path(decisions_path) if decisions_path else None
+        self._lock = threading.Lock()
+
+    def route(self, message: str) -> Optional[bool]:
+        """
+        Whether the message requires computer interaction, or None when the LLM should decide.
+        """
+        if self.model is None:
+            telemetry.increment("router.escalated")
+            return None
+        probability = float(self.model.predict_proba([message])[0])
+        if probability >= self.confidence:
+            telemetry.increment("router.short_circuit")
+            return True
+        if probability <= 1.0 - self.confidence:
+            telemetry.increment("router.short_circuit")
+            return False
+        telemetry.increment("router.escalated")
+        return None
+
+    def log_decision(self, message: str, is_computer_interaction_required: bool):
+        if self.decisions_path is None:
+            return
+        line = json.dumps({"message": message, "is_computer_interaction_required": is_computer_interaction_required})
+        with self._lock:
+            self.decisions_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.decisions_path, "a", encoding="utf-8") as file:
+                file.write(line + "\n")
+
+    def short_circuit_rate(self) -> float:
+        short_circuited = telemetry.counter("router.short_circuit")
+        total = short_circuited + telemetry.counter("router.escalated")
+        return short_circuited / total if total else 0.0
+
+
+def load_decisions(path: str) -> Tuple[List[str], List[bool]]:
+    """
+    Messages and labels of a decision log (the last decision wins for repeated messages).
+    """
+    decisions: Dict[str, bool] = {}
+    with open(path, encoding="utf-8") as file:
+        for line in file:
+            if line.strip():
+                record = json.loads(line)
+                decisions[record["message"]] = bool(record["is_computer_interaction_required"])
+    return list(decisions), list(decisions.values())
+
+
+def evaluate(model: RouterModel, texts: Sequence[str], labels: Iterable[bool], confidence: float) -> Dict[str, float]:
+    """
+    Precision/recall of the short-circuited decisions (per class) and share of the messages short-circuited.
+    """
+    labels = np.asarray(list(labels), dtype=bool)
+    probabilities = model.predict_proba(texts)
+    confident = (probabilities >= confidence) | (probabilities <= 1.0 - confidence)
+    predictions = probabilities >= 0.5
+    report = {"messages": float(len(labels)), "short_circuit_rate": float(confident.mean()) if len(labels) else 0.0}
+    for name, positive in (("computer", True), ("chat", False)):
+        predicted = confident & (predictions == positive)
+        actual = labels == positive
+        true_positives = float((predicted & actual).sum())
+        report[f"{name}_precision"] = true_positives / predicted.sum() if predicted.sum() else 1.0
+        report[f"{name}_recall"] = true_positives / actual.sum() if actual.sum() else 1.0
+    return report
+
+
+def build_router(config: RouterConfig) -> Optional[LocalRouter]:
+    if not config.enabled:
+        return None
+    model = None
+    if config.model_path and Path(config.model_path).exists():
+        model = RouterModel.load(config.model_path)
+    return LocalRouter(model=model, confidence=config.confidence, decisions_path=config.decisions_path)
@@ -0,0 +1,276 @@
+"""
+Async HTTP service around the compiled graph.
+
+Each request runs in the thread of its session (`thread_id` = session id) of a checkpointed graph, so
+many sessions are served concurrently by one process and one event loop, and the messages of a session
+run one after the other on its latest state. Admission control bounds the load: at most
+`ServerConfig.max_concurrent_runs` runs execute at once, `max_queued_runs` more wait for a slot and the
+next requests get a 429. A run is cancelled as soon as its client disconnects.
+
+Run it with `uvicorn agent_hub.server:app` (one worker per process, the graph lives in its event loop),
+or build the app around another graph with `create_app(graph_factory)`.
+"""
+import asyncio
+import json
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from langchain_core.messages import HumanMessage
+from pydantic import BaseModel, Field
+from starlette.background import BackgroundTask
+from agent_hub.checkpoint import thread_config
+from agent_hub.config import AgentHubConfig, CheckpointConfig, ServerConfig, get_config
+from agent_hub.graph import abuild_graph
+from agent_hub.resilience import request_deadline
+from agent_hub.state import new_turn
+from agent_hub.streaming import astream_run
+from agent_hub.telemetry import telemetry
+from agent_hub.transport import aclose_http_clients
+
+
+class Overloaded(Exception):
+    """
+    Raised when every run slot is busy and the waiting queue is full.
+    """
+
+
+class AdmissionTicket:
+    """
+    A run slot, released once (releasing it again is a no-op).
+    """
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._controller._release()
+
+
+class AdmissionController:
+    """
+    Bounded concurrency with a bounded waiting queue.
+    Queue waits are recorded in `agent_hub.telemetry` (`server.queue_wait`), as well as the
+    rejected (`server.rejected`) and timed out (`server.queue_timeout`) requests.
+    """
+    def __init__(self, config: ServerConfig):
+        self.config = config
+        self._slots = asyncio.Semaphore(config.max_concurrent_runs)
+        self.active = 0
+        self.queued = 0
+
+    async def acquire(self) -> AdmissionTicket:
+        """
+        Wait for a run slot.
+
+        Raises:
+            Overloaded: If the waiting queue is full
+            asyncio.TimeoutError: If no slot was freed within `queue_timeout`
+        """
+        # counted synchronously: under a burst, the semaphore only sees the requests once they are awaited
+        if self.active + self.queued >= self.config.max_concurrent_runs + self.config.max_queued_runs:
+            telemetry.increment("server.rejected")
+            raise Overloaded(f"{self.active} runs in progress and {self.queued} waiting")
+        self.queued += 1
+        start_time = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.config.queue_timeout)
+        except asyncio.TimeoutError:
+            telemetry.increment("server.queue_timeout")
+            raise
+        finally:
+            self.queued -= 1
+        telemetry.observe("server.queue_wait", time.perf_counter() - start_time)
+        self.active += 1
+        return AdmissionTicket(self)
+
+    def _release(self):
+        self.active -= 1
+        self._slots.release()
+
+
+class SessionLocks:
+    """
+    One lock per active session, dropped once no request of the session is left.
+    """
+    def __init__(self):
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._waiters: Dict[str, int] = {}
+
+    @asynccontextmanager
+    async def hold(self, session_id: str):
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        self._waiters[session_id] = self._waiters.get(session_id, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._waiters[session_id] -= 1
+            if not self._waiters[session_id]:
+                del self._waiters[session_id]
+                del self._locks[session_id]
+
+
+class ChatRequest(BaseModel):
+    message: str = Field(description="The user message")
+    session_id: Optional[str] = Field(default=None, description="Session of the conversation, a new one is started when missing")
+
+
+class ChatResponse(BaseModel):
+    session_id: str
+    answer: str
+    total_time: float
+
+
+def session_config(config: AgentHubConfig) -> AgentHubConfig:
+    """
+    The graph config with checkpointing enabled: sessions need their state saved between requests.
+    """
+    if config.checkpoint.enabled:
+        return config
+    return config.model_copy(update={"checkpoint": CheckpointConfig(enabled=True)})
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _answer(state: Dict[str, Any]) -> str:
+    messages = state.get("messages") or []
+    return messages[-1].content if messages else ""
+
+
+async def _until_disconnected(request: Request, interval: float):
+    while not await request.is_disconnected():
+        await asyncio.sleep(interval)
+
+
+def create_app(graph_factory: Optional[Callable[[], Awaitable[Any]]] = None, config: Optional[AgentHubConfig] = None) -> FastAPI:
+    """
+    Build the HTTP service.
+
+    Args:
+        graph_factory: Coroutine function returning the compiled graph, called once at startup.
+            Defaults to the default agents' graph, checkpointed (see `session_config`)
+        config: Service and graph settings, defaults to the process config
+            (its process-wide sections come from the process config, see `AgentHubConfig`)
+
+    Returns:
+        The FastAPI application
+    """
+    config = config or get_config()
+    server_config = config.server
+    graph_factory = graph_factory or (lambda: abuild_graph(config=session_config(config)))
+    admission = AdmissionController(server_config)
+    sessions = SessionLocks()
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        app.state.graph = await graph_factory()
+        yield
+        await aclose_http_clients()
+
+    app = FastAPI(title="Nexus Agents", lifespan=lifespan)
+    app.state.admission = admission
+
+    async def admit() -> AdmissionTicket:
+        try:
+            return await admission.acquire()
+        except Overloaded as e:
+            raise HTTPException(status_code=429, detail=f"Server overloaded: {e}", headers={"Retry-After": "1"})
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=503, detail="Timed out waiting for a run slot", headers={"Retry-After": "1"})
+
+    async def run(session_id: str, message: str) -> Dict[str, Any]:
+        async with sessions.hold(session_id):
+            with request_deadline(server_config.run_timeout):
+                return await asyncio.wait_for(
+                    app.state.graph.ainvoke(new_turn(HumanMessage(content=message)), thread_config(session_id)),
+                    server_config.run_timeout,
+                )
+
+    @app.post("/chat", response_model=ChatResponse)
+    async def chat(body: ChatRequest, request: Request):
+        session_id = body.session_id or uuid.uuid4().hex
+        ticket = await admit()
+        start_time = time.perf_counter()
+        run_task = asyncio.create_task(run(session_id, body.message))
+        watcher = asyncio.create_task(_until_disconnected(request, server_config.disconnect_poll_interval))
+        try:
+            await asyncio.wait({run_task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            watcher.cancel()
+            try:
+                if not run_task.done():
+                    # the client is gone (or the server is shutting down): stop the run, and let it
+                    # unwind before its slot is given to another request
+                    run_task.cancel()
+                    telemetry.increment("server.cancelled")
+                    await asyncio.wait({run_task})
+            finally:
+                ticket.release()
+        if run_task.cancelled():
+            return Response(status_code=499)
+        try:
+            state = run_task.result()
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=504, detail="The run timed out")
+        except Exception as e:
+            print(f"Run of session {session_id} failed. Error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        return ChatResponse(session_id=session_id, answer=_answer(state), total_time=time.perf_counter() - start_time)
+
+    @app.post("/chat/stream")
+    async def chat_stream(body: ChatRequest):
+        """
+        Server-sent events: "session", then "token" (answer text chunks) and "node" (progress) events,
+        and finally "done" (full answer and run metrics) or "error".
+        """
+        session_id = body.session_id or uuid.uuid4().hex
+        ticket = await admit()
+
+        async def events():
+            try:
+                async with sessions.hold(session_id):
+                    yield _sse("session", {"session_id": session_id})
+                    with request_deadline(server_config.run_timeout):
+                        async with asyncio.timeout(server_config.run_timeout):
+                            async for event in astream_run(app.state.graph, new_turn(HumanMessage(content=body.message)), thread_config(session_id)):
+                                if event.type == "token":
+                                    yield _sse("token", {"node": event.node, "content": event.content})
+                                elif event.type == "node":
+                                    yield _sse("node", {"node": event.node})
+                                else:
+                                    yield _sse("done", {"answer": _answer(event.state), "metrics": event.metrics.model_dump()})
+            except asyncio.CancelledError:
+                # raised into the stream when the client disconnects
+                telemetry.increment("server.cancelled")
+                raise
+            except TimeoutError:
+                yield _sse("error", {"detail": "The run timed out"})
+            except Exception as e:
+                print(f"Run of session {session_id} failed. Error: {e}")
+                yield _sse("error", {"detail": str(e)})
+            finally:
+                ticket.release()
+
+        # the background task frees the slot if the stream never started
+        return StreamingResponse(events(), media_type="text/event-stream", background=BackgroundTask(ticket.release))
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "active_runs": admission.active, "queued_runs": admission.queued,
+                "max_concurrent_runs": server_config.max_concurrent_runs}
+
+    @app.get("/metrics")
+    async def metrics():
+        return telemetry.snapshot()
+
+    return app
+
+
+app = create_app()
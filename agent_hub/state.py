@@ -6,9 +6,20 @@ from typing_extensions import TypedDict
     
 from langgraph.graph.message import add_messages
 from agent_hub.agent import AgentInput, Agent
-from agent_hub.plan import AgentTask, TaskStatus, OrchestratorPlan
+from agent_hub.plan import AgentTask, TaskStatus, OrchestratorPlan, AgentDispatch, TaskResult
 from operator import add
-from typing import List
+from typing import Dict, List, Optional
+
+
+def merge_task_results(current: Optional[Dict[int, TaskResult]], update: Optional[Dict[int, TaskResult]]) -> Dict[int, TaskResult]:
+    """
+    Merge the results of the tasks run in parallel (keyed by task index, so the merge doesn't depend on
+    the order in which they finish). A `None` update clears the results once the orchestrator consumed them.
+    """
+    if update is None:
+        return {}
+    return {**(current or {}), **update}
+
 class State(TypedDict):
     # Messages have the type "list". The `add_messages` function
     # in the annotation defines how this state key should be updated
@@ -22,4 +33,29 @@ class State(TypedDict):
     messages: Annotated[list, add_messages]
     user_input: str = None
     is_computer_interaction_required: bool = False
-    previous_outputs : Annotated[List[str], add] = []
\ No newline at end of file
+    previous_outputs : Annotated[List[str], add] = []
+    # bounded prompt memory: summary of the first `summarized_outputs` previous outputs (see `agent_hub.memory`)
+    memory_summary : str = None
+    summarized_outputs : int = 0
+    # fan-out/fan-in of the plan tasks (see `Orchestrator` and `agent_hub.graph.as_task_node`)
+    dispatches : List[AgentDispatch] = []
+    current_task_index : int = None
+    task_results : Annotated[Dict[int, TaskResult], merge_task_results] = {}
+
+def new_turn(message) -> dict:
+    """
+    Graph input of a new user message in an existing thread (checkpointed graph): the previous plan and
+    its task state are reset, the conversation and the agents' outputs are kept.
+    """
+    return {
+        "messages": [message],
+        "plan": None,
+        "last_task_status": None,
+        "last_task_output": None,
+        "next_agent_input": None,
+        "next_agent_name": None,
+        "is_computer_interaction_required": False,
+        "dispatches": [],
+        "current_task_index": None,
+        "task_results": None,
+    }
@@ -0,0 +1,73 @@
+"""
+Streaming of graph runs.
+
+`astream_run` turns `graph.astream` into a flat sequence of events the UI (or the HTTP service)
+can render as they arrive: LLM tokens of the user-facing generations, per-node progress,
+and the final state with the run latency metrics.
+"""
+import time
+from typing import Any, AsyncIterator, Dict, Literal, Optional, Sequence
+from pydantic import BaseModel
+from langchain_core.messages import AIMessageChunk
+from agent_hub.telemetry import telemetry
+
+# Nodes whose LLM generations are shown to the user (the others call LLMs for planning/tool selection)
+TOKEN_NODES = ("front_llm", "WebSearcher")
+
+
+class StreamMetrics(BaseModel):
+    time_to_first_token: Optional[float] = None
+    total_time: float = 0.0
+    token_chunks: int = 0
+
+
+class StreamEvent(BaseModel):
+    """
+    - "token": a chunk of text generated by `node`
+    - "node": `node` finished, `update` holds its state update
+    - "done": the run finished, `state` holds the final state and `metrics` the run metrics
+    """
+    type: Literal["token", "node", "done"]
+    node: Optional[str] = None
+    content: Optional[str] = None
+    update: Optional[Any] = None
+    state: Optional[Dict[str, Any]] = None
+    metrics: Optional[StreamMetrics] = None
+
+
+async def astream_run(graph, input: Optional[Dict[str, Any]], config: Optional[Dict[str, Any]] = None,
+                      token_nodes: Sequence[str] = TOKEN_NODES) -> AsyncIterator[StreamEvent]:
+    """
+    Run the graph and stream its events.
+    The time to first token (first text the user sees, streamed or not) is recorded in telemetry
+    as `graph.time_to_first_token`, the full run as `graph.total_time`.
+    """
+    metrics = StreamMetrics()
+    start_time = time.perf_counter()
+    state: Dict[str, Any] = {}
+
+    def first_output():
+        if metrics.time_to_first_token is None:
+            metrics.time_to_first_token = time.perf_counter() - start_time
+            telemetry.observe("graph.time_to_first_token", metrics.time_to_first_token)
+
+    async for mode, payload in graph.astream(input, config, stream_mode=["updates", "messages", "values"]):
+        if mode == "messages":
+            chunk, metadata = payload
+            node = metadata.get("langgraph_node")
+            if node in token_nodes and isinstance(chunk, AIMessageChunk) and isinstance(chunk.content, str) and chunk.content:
+                first_output()
+                metrics.token_chunks += 1
+                yield StreamEvent(type="token", node=node, content=chunk.content)
+        elif mode == "updates":
+            for node, update in payload.items():
+                if node == "front_llm" and update and update.get("messages"):
+                    # answers generated through structured output arrive in one piece
+                    first_output()
+                yield StreamEvent(type="node", node=node, update=update)
+        else:
+            state = payload
+
+    metrics.total_time = time.perf_counter() - start_time
+    telemetry.observe("graph.total_time", metrics.total_time)
+    yield StreamEvent(type="done", state=state, metrics=metrics)
@@ -0,0 +1,88 @@
+"""
+In-process counters and latency/size observations.
+
+Components record what they do (cache hits, tokens, waits...) under dotted names,
+and `telemetry.snapshot()` exposes everything at once (logs, evaluation, HTTP service).
+"""
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+
+class Observation:
+    """
+    Running count/sum/max of a metric plus a bounded window of recent samples for quantiles.
+    """
+    def __init__(self, max_samples: int):
+        self.count = 0
+        self.total = 0.0
+        self.max = float("-inf")
+        self.samples: Deque[float] = deque(maxlen=max_samples)
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "max": self.max if self.count else None,
+        }
+
+
+class Telemetry:
+    def __init__(self, max_samples: int = 1024):
+        self.max_samples = max_samples
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._observations: Dict[str, Observation] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1.0):
+        with self._lock:
+            self._counters[name] += value
+
+    def observe(self, name: str, value: float):
+        with self._lock:
+            if name not in self._observations:
+                self._observations[name] = Observation(self.max_samples)
+            self._observations[name].add(value)
+
+    def counter(self, name: str) -> float:
+        with self._lock:
+            return self._counters.get(name, 0.0)
+
+    def count(self, name: str) -> int:
+        with self._lock:
+            observation = self._observations.get(name)
+            return observation.count if observation else 0
+
+    def quantile(self, name: str, q: float) -> Optional[float]:
+        with self._lock:
+            observation = self._observations.get(name)
+            return observation.quantile(q) if observation else None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "observations": {name: observation.summary() for name, observation in self._observations.items()},
+            }
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._observations.clear()
+
+
+telemetry = Telemetry()
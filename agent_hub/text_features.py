@@ -0,0 +1,51 @@
+"""
+Hashed n-gram features of short texts (user queries), computed locally and offline.
+
+Features are hashed with crc32 rather than `hash()` so vectors are stable across processes,
+which keeps persisted indexes and trained models valid after a restart.
+"""
+import re
+import zlib
+from typing import List, Sequence
+import numpy as np
+
+_WORD_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def words(text: str) -> List[str]:
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def ngram_features(text: str, word_ngrams: Sequence[int] = (1, 2), char_ngrams: Sequence[int] = (3, 4)) -> List[str]:
+    """
+    Word n-grams and character n-grams (inside word boundaries) of a text.
+    """
+    tokens = words(text)
+    features = []
+    for n in word_ngrams:
+        features.extend("w:" + " ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+    for token in tokens:
+        padded = f"<{token}>"
+        for n in char_ngrams:
+            features.extend("c:" + padded[i:i + n] for i in range(len(padded) - n + 1))
+    return features
+
+
+def hashed_counts(features: Sequence[str], n_features: int) -> np.ndarray:
+    """
+    Count vector of the features, hashed into `n_features` buckets.
+    """
+    counts = np.zeros(n_features, dtype=np.float32)
+    if features:
+        indices = [zlib.crc32(feature.encode("utf-8")) % n_features for feature in features]
+        np.add.at(counts, indices, 1.0)
+    return counts
+
+
+def hash_text(text: str, n_features: int = 2 ** 14) -> np.ndarray:
+    return hashed_counts(ngram_features(text), n_features)
+
+
+def l2_normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
@@ -0,0 +1,60 @@
+"""
+Token counting used for prompt budgets.
+
+Uses tiktoken's `cl100k_base` encoding when it is available (it is a close enough proxy
+for the Llama/Mistral tokenizers to size prompts), and a ~4 characters per token estimate otherwise.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # tiktoken missing, or its encoding file cannot be downloaded
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Approximate number of tokens of a text.
+    """
+    if not text:
+        return 0
+    encoding = _encoding()
+    if encoding is None:
+        return max(1, len(text) // 4)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    Keep the beginning of a text that fits in `max_tokens`.
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _encoding()
+    if encoding is None:
+        head = text[:max_tokens * 4]
+    else:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    return head + " [...]"
+
+
+def message_text(message) -> str:
+    """
+    Text of a chat message (the text parts of multimodal contents).
+    """
+    content = message.content
+    if isinstance(content, str):
+        return content
+    return " ".join(part if isinstance(part, str) else part.get("text", "") for part in content)
+
+
+def count_message_tokens(messages) -> int:
+    """
+    Approximate number of prompt tokens of chat messages (with a few tokens of per-message overhead).
+    """
+    return sum(count_tokens(message_text(message)) + 4 for message in messages)
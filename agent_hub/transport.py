@@ -0,0 +1,108 @@
+"""
+Shared HTTP clients.
+
+Every upstream service (LLM provider or API) gets one pooled `httpx.Client` and one
+`httpx.AsyncClient`, created on first use and reused by all agents, so connection
+and TLS setup is paid once per process instead of once per call. Their transport applies the
+retry, deadline and circuit breaker policy (see `agent_hub.resilience`) and the process-wide rate
+limits (see `agent_hub.rate_limit`) of the service. Both come from the process config (`rate_limit` and
+`resilience` of `agent_hub.config.get_config()`), not from the config of the agent using the client.
+"""
+import importlib.util
+import threading
+from typing import Dict, Optional, Tuple
+import httpx
+from agent_hub.config import HTTPConfig, get_config
+from agent_hub.rate_limit import AsyncRateLimitedTransport, RateLimitedTransport, get_rate_limiter
+from agent_hub.resilience import AsyncResilientTransport, ResilientTransport
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_clients: Dict[Tuple[str, HTTPConfig], httpx.Client] = {}
+_async_clients: Dict[Tuple[str, HTTPConfig], httpx.AsyncClient] = {}
+_lock = threading.Lock()
+
+
+def _client_options(name: str, http_config: HTTPConfig, client_kwargs: dict, asynchronous: bool) -> dict:
+    limits = httpx.Limits(
+        max_connections=http_config.max_connections,
+        max_keepalive_connections=http_config.max_keepalive_connections,
+        keepalive_expiry=http_config.keepalive_expiry,
+    )
+    http2 = http_config.http2 and HTTP2_AVAILABLE
+    options = {"timeout": httpx.Timeout(http_config.read_timeout, connect=http_config.connect_timeout)}
+    if "transport" not in client_kwargs:
+        # the pool settings go to the innermost transport, httpx ignores them when a transport is given.
+        # Outermost first: retries/deadline/circuit breaker, then rate limits (each attempt waits for them)
+        config = get_config()
+        if asynchronous:
+            transport = httpx.AsyncHTTPTransport(limits=limits, http2=http2)
+            if config.rate_limit.enabled:
+                transport = AsyncRateLimitedTransport(name, transport, get_rate_limiter(config.rate_limit))
+            if config.resilience.enabled:
+                transport = AsyncResilientTransport(name, transport, config.resilience)
+        else:
+            transport = httpx.HTTPTransport(limits=limits, http2=http2)
+            if config.rate_limit.enabled:
+                transport = RateLimitedTransport(name, transport, get_rate_limiter(config.rate_limit))
+            if config.resilience.enabled:
+                transport = ResilientTransport(name, transport, config.resilience)
+        options["transport"] = transport
+    options.update(client_kwargs)
+    return options
+
+
+def get_http_client(name: str, http_config: Optional[HTTPConfig] = None, **client_kwargs) -> httpx.Client:
+    """
+    Get the shared synchronous client for an upstream service.
+
+    Args:
+        name: The upstream service name (e.g. "groq", "serper")
+        http_config: Pool and timeout settings, defaults to the process config's `http`
+        **client_kwargs: Extra `httpx.Client` options, only used when the client is first created
+
+    Returns:
+        The pooled client for this service
+    """
+    http_config = http_config or get_config().http
+    with _lock:
+        if (name, http_config) not in _clients:
+            _clients[name, http_config] = httpx.Client(**_client_options(name, http_config, client_kwargs, asynchronous=False))
+        return _clients[name, http_config]
+
+
+def get_async_http_client(name: str, http_config: Optional[HTTPConfig] = None, **client_kwargs) -> httpx.AsyncClient:
+    """
+    Get the shared asynchronous client for an upstream service.
+    Like the graph itself, it is meant to be used from a single long-lived event loop.
+    """
+    http_config = http_config or get_config().http
+    with _lock:
+        if (name, http_config) not in _async_clients:
+            _async_clients[name, http_config] = new_async_http_client(name, http_config, **client_kwargs)
+        return _async_clients[name, http_config]
+
+
+def new_async_http_client(name: str, http_config: Optional[HTTPConfig] = None, **client_kwargs) -> httpx.AsyncClient:
+    """
+    A dedicated (not shared) asynchronous client for an upstream service, with the same retry and rate limit
+    policy, for code running on another event loop than the graph's (an httpx connection pool can't be
+    shared between loops). The caller closes it.
+    """
+    http_config = http_config or get_config().http
+    return httpx.AsyncClient(**_client_options(name, http_config, client_kwargs, asynchronous=True))
+
+
+async def aclose_http_clients():
+    """
+    Close every shared client (e.g. on application shutdown).
+    """
+    with _lock:
+        clients = list(_clients.values())
+        async_clients = list(_async_clients.values())
+        _clients.clear()
+        _async_clients.clear()
+    for client in clients:
+        client.close()
+    for async_client in async_clients:
+        await async_client.aclose()
@@ -0,0 +1,92 @@
+"""
+Packs ranked search results into a compact, token-budgeted context for the synthesis prompt.
+"""
+import json
+from typing import Dict, List, Sequence, Set, Tuple
+from pydantic import BaseModel
+from agent_hub.telemetry import telemetry
+from agent_hub.tokens import count_tokens
+from agent_hub.web_searcher.reranker import tokenize
+
+
+class PackingStats(BaseModel):
+    """
+    What the packer did to the ranked results of one query.
+    """
+    tokens_in: int
+    tokens_out: int
+    tokens_saved: int
+    documents_in: int
+    documents_kept: int
+    duplicates_dropped: int
+
+
+def shingles(text: str, size: int = 3) -> Set[Tuple[str, ...]]:
+    tokens = tokenize(text)
+    if len(tokens) < size:
+        return {tuple(tokens)} if tokens else set()
+    return {tuple(tokens[index:index + size]) for index in range(len(tokens) - size + 1)}
+
+
+def jaccard(first: Set, second: Set) -> float:
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+
+class ContextPacker:
+    """
+    Keeps only the useful fields of each result, drops near-duplicate snippets (word shingle
+    Jaccard similarity) and fills the token budget in rank order with compact JSON lines.
+
+    Args:
+        token_budget: Maximum number of tokens of the packed context
+        similarity_threshold: Snippets at least this similar to an already kept one are dropped
+        fields: Result fields kept in the context
+        shingle_size: Number of words per shingle
+    """
+    def __init__(self, token_budget: int = 2000, similarity_threshold: float = 0.8,
+                 fields: Sequence[str] = ("title", "snippet", "url", "date"), shingle_size: int = 3):
+        self.token_budget = token_budget
+        self.similarity_threshold = similarity_threshold
+        self.fields = fields
+        self.shingle_size = shingle_size
+
+    def pack(self, ranked_results: List[Dict]) -> Tuple[str, PackingStats]:
+        """
+        Returns:
+            The packed context (one JSON object per line, best result first) and the packing stats
+        """
+        # what the synthesis prompt used to embed
+        tokens_in = count_tokens(json.dumps(ranked_results, indent=2))
+        lines: List[str] = []
+        kept_shingles: List[Set] = []
+        duplicates = 0
+        tokens_out = 0
+        for result in ranked_results:
+            document_shingles = shingles(f"{result.get('title', '')} {result.get('snippet', '')}", self.shingle_size)
+            if any(jaccard(document_shingles, kept) >= self.similarity_threshold for kept in kept_shingles):
+                duplicates += 1
+                continue
+            compact = {field: result[field] for field in self.fields if result.get(field)}
+            line = json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+            line_tokens = count_tokens(line) + 1  # + the newline
+            if tokens_out + line_tokens > self.token_budget:
+                # a lower ranked but shorter result may still fit
+                continue
+            lines.append(line)
+            kept_shingles.append(document_shingles)
+            tokens_out += line_tokens
+
+        stats = PackingStats(
+            tokens_in=tokens_in,
+            tokens_out=tokens_out,
+            tokens_saved=max(0, tokens_in - tokens_out),
+            documents_in=len(ranked_results),
+            documents_kept=len(lines),
+            duplicates_dropped=duplicates,
+        )
+        telemetry.observe("web_searcher.context.tokens_in", stats.tokens_in)
+        telemetry.observe("web_searcher.context.tokens_out", stats.tokens_out)
+        telemetry.increment("web_searcher.context.tokens_saved", stats.tokens_saved)
+        return "\n".join(lines), stats
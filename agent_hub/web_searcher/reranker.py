@@ -0,0 +1,204 @@
+"""
+Rerankers used by the WebSearcher to order search snippets by relevance.
+
+A reranker returns the indices of the `top_n` most relevant documents, best first.
+"""
+import os
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+import numpy as np
+from agent_hub.cache import TieredCache, make_key
+from agent_hub.config import AgentHubConfig
+from agent_hub.resilience import request_deadline
+from agent_hub.telemetry import telemetry
+from agent_hub.transport import get_http_client, get_async_http_client
+
+JINA_RERANK_URL = os.getenv("JINA_RERANK_URL", "https://api.jina.ai/v1/rerank")
+JINA_API_KEY = os.getenv("JINA_API_KEY", "")
+LOCAL_RERANKERS = ("bm25", "local")
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+class Reranker(ABC):
+    """
+    Orders documents by relevance to a query.
+    """
+    model: str
+
+    @abstractmethod
+    def rerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        pass
+
+    async def arerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        return self.rerank(query, docs, top_n)
+
+
+class BM25Reranker(Reranker):
+    """
+    Local BM25 scorer over the title and snippet of each document.
+    All documents are scored in one vectorized NumPy pass; ties keep the search engine order.
+
+    Args:
+        k1: Term frequency saturation
+        b: Document length normalization
+        title_weight: How many times a title term counts compared to a snippet term
+    """
+    model = "bm25"
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, title_weight: float = 2.0):
+        self.k1 = k1
+        self.b = b
+        self.title_weight = title_weight
+
+    def scores(self, query: str, docs: List[Dict]) -> np.ndarray:
+        query_terms = {term: index for index, term in enumerate(dict.fromkeys(tokenize(query)))}
+        if not docs or not query_terms:
+            return np.zeros(len(docs))
+
+        # Flatten every (document, token) pair, weighting title tokens
+        doc_ids, term_ids, weights = [], [], []
+        for doc_id, doc in enumerate(docs):
+            for text, weight in ((doc.get("title", ""), self.title_weight), (doc.get("snippet", ""), 1.0)):
+                for token in tokenize(text):
+                    doc_ids.append(doc_id)
+                    term_ids.append(query_terms.get(token, -1))
+                    weights.append(weight)
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float64)
+
+        doc_lengths = np.bincount(doc_ids, weights=weights, minlength=len(docs))
+        term_frequencies = np.zeros((len(docs), len(query_terms)))
+        matched = term_ids >= 0
+        np.add.at(term_frequencies, (doc_ids[matched], term_ids[matched]), weights[matched])
+
+        document_frequencies = (term_frequencies > 0).sum(axis=0)
+        idf = np.log1p((len(docs) - document_frequencies + 0.5) / (document_frequencies + 0.5))
+        average_length = doc_lengths.mean() or 1.0
+        length_norm = self.k1 * (1 - self.b + self.b * doc_lengths / average_length)
+        saturated = term_frequencies * (self.k1 + 1) / (term_frequencies + length_norm[:, None])
+        return saturated @ idf
+
+    def rerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        order = np.argsort(-self.scores(query, docs), kind="stable")
+        return order[:top_n].tolist()
+
+
+class JinaReranker(Reranker):
+    """
+    Remote reranking through the Jina API, over the document snippets.
+    The whole call, retries included, is bounded by `rerank_timeout` so the fallback kicks in on time.
+    """
+    def __init__(self, model: str, config: AgentHubConfig):
+        self.model = model
+        self.config = config
+
+    def _request(self, query: str, docs: List[Dict], top_n: int):
+        headers = {
+            "Content-Type": "application/json", 
+            "Authorization": f"Bearer {JINA_API_KEY}",
+        }
+        payload = {
+            "model": self.model,
+            "query": query,
+            "top_n": top_n,
+            "documents": [doc["snippet"] for doc in docs],
+        }
+        return headers, payload
+
+    @staticmethod
+    def _parse_indices(response) -> List[int]:
+        if response.status_code == 200:
+            results = response.json()["results"]
+            return [result["index"] for result in results]
+        else:
+            raise Exception(f"Error: {response.status_code}, {response.text}")
+
+    def rerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        headers, payload = self._request(query, docs, top_n)
+        client = get_http_client("jina", self.config.http)
+        with request_deadline(self.config.web_search.rerank_timeout):
+            response = client.post(JINA_RERANK_URL, headers=headers, json=payload, timeout=self.config.web_search.rerank_timeout)
+        return self._parse_indices(response)
+
+    async def arerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        headers, payload = self._request(query, docs, top_n)
+        client = get_async_http_client("jina", self.config.http)
+        with request_deadline(self.config.web_search.rerank_timeout):
+            response = await client.post(JINA_RERANK_URL, headers=headers, json=payload, timeout=self.config.web_search.rerank_timeout)
+        return self._parse_indices(response)
+
+
+class CachedReranker(Reranker):
+    """
+    Caches the orders of another reranker, keyed by query, model, top_n and document hashes.
+    """
+    def __init__(self, reranker: Reranker, cache: TieredCache):
+        self.reranker = reranker
+        self.model = reranker.model
+        self.cache = cache
+
+    def _key(self, query: str, docs: List[Dict], top_n: int) -> str:
+        document_hashes = [make_key(doc["snippet"]) for doc in docs]
+        return make_key(query, self.model, top_n, document_hashes)
+
+    def rerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        return self.cache.get_or_compute(self._key(query, docs, top_n), lambda: self.reranker.rerank(query, docs, top_n))
+
+    async def arerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        return await self.cache.aget_or_compute(self._key(query, docs, top_n), lambda: self.reranker.arerank(query, docs, top_n))
+
+
+class FallbackReranker(Reranker):
+    """
+    Uses the primary reranker, and the fallback one when it fails or times out.
+    """
+    def __init__(self, primary: Reranker, fallback: Reranker):
+        self.primary = primary
+        self.fallback = fallback
+        self.model = primary.model
+
+    def _on_failure(self, error: Exception):
+        print(f"Reranker {self.primary.model} failed, falling back to {self.fallback.model}. Error: {error}")
+        telemetry.increment("reranker.fallback")
+
+    def rerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        try:
+            return self.primary.rerank(query, docs, top_n)
+        except Exception as e:
+            self._on_failure(e)
+            return self.fallback.rerank(query, docs, top_n)
+
+    async def arerank(self, query: str, docs: List[Dict], top_n: int) -> List[int]:
+        try:
+            return await self.primary.arerank(query, docs, top_n)
+        except Exception as e:
+            self._on_failure(e)
+            return await self.fallback.arerank(query, docs, top_n)
+
+
+def build_reranker(model: str, config: AgentHubConfig, cache: Optional[TieredCache] = None) -> Reranker:
+    """
+    Build the reranker for a `WebSearcher` model name.
+
+    Args:
+        model: "bm25" (or "local") for the local scorer, otherwise a Jina reranker model name
+        config: The agent config (HTTP client and rerank timeout)
+        cache: Cache of the remote reranker orders
+
+    Returns:
+        The local BM25 reranker, or the (cached) Jina reranker falling back to BM25 on errors
+    """
+    local_reranker = BM25Reranker()
+    if model in LOCAL_RERANKERS:
+        return local_reranker
+    remote_reranker: Reranker = JinaReranker(model, config)
+    if cache is not None:
+        remote_reranker = CachedReranker(remote_reranker, cache)
+    return FallbackReranker(remote_reranker, local_reranker)
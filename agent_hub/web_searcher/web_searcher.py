@@ -1,16 +1,22 @@
 from agent_hub.agent import Agent, AgentTask, AgentInput
 from pydantic import Field
-import requests
-import json
 from agent_hub.state import State
 from agent_hub.plan import TaskStatus
-from typing import List, Dict
-from agent_hub.llms import groq_llm
+from typing import List, Dict, Optional
+from agent_hub.llms import get_llm, DEFAULT_LLMS
+from agent_hub.config import AgentHubConfig
+from agent_hub.transport import get_http_client, get_async_http_client
+from agent_hub.cache import build_cache, make_key
+from agent_hub.web_searcher.reranker import build_reranker
+from agent_hub.web_searcher.context_packer import ContextPacker
+from agent_hub.memory import record_prompt_tokens
+from langchain_core.messages import HumanMessage
 import os
 
 
-SERPER_API_KEY = os.getenv("SERPER_API_KEY")
-JINA_API_KEY = os.getenv("JINA_API_KEY")
+SYNTHESIS_LLM = DEFAULT_LLMS["groq_llm"]
+SERPER_URL = os.getenv("SERPER_BASE_URL", "https://google.serper.dev")
+SERPER_API_KEY = os.getenv("SERPER_API_KEY", "")
 # Test Pipline
 class WebSearcherInput(AgentInput):
     """
@@ -23,7 +29,13 @@ class WebSearcherInput(AgentInput):
 class WebSearcher(Agent):
    
     
-    def __init__(self, model="jina-reranker-v2-base-multilingual", top_n=10):
+    def __init__(self, model="jina-reranker-v2-base-multilingual", top_n=10, config: Optional[AgentHubConfig] = None):
+        """
+        Args:
+            model: Reranker model, a Jina reranker name (falling back to local BM25 on errors) or "bm25"/"local"
+            top_n: Number of search results kept after reranking
+            config: Agent config (HTTP clients, caches, timeouts)
+        """
         description =  """
     An intelligent agent specialized in efficient information retrieval from the web.
     
@@ -47,59 +59,80 @@ class WebSearcher(Agent):
     """
         name = "WebSearcher"
         task = AgentTask.WEB_SEARCH
-        super().__init__(name, description, task)
+        super().__init__(name, description, task, config)
         self.reranker_model = model
         self.top_n = top_n
+        cache_config = self.config.cache
+        self.search_cache = build_cache("web_search", cache_config.search, cache_config)
+        self.rerank_cache = build_cache("web_rerank", cache_config.rerank, cache_config)
+        self.reranker = build_reranker(model, self.config, self.rerank_cache)
+        self.context_packer = ContextPacker(
+            token_budget=self.config.web_search.context_token_budget,
+            similarity_threshold=self.config.web_search.duplicate_similarity,
+        )
+        self.answer_cache = build_cache("web_answer", cache_config.answer, cache_config)
 
     def define_input_schema(self) -> type[WebSearcherInput]:
         return WebSearcherInput
 
-    def search_web(self, query: str, type: str = "search", **params) -> List[Dict]:
-        """Get raw search results from Serper API"""
-        url = f"https://google.serper.dev/{type}"
+    def _search_request(self, query: str, type: str = "search", **params):
+        """Build the Serper API request"""
+        url = f"{SERPER_URL}/{type}"
         headers = {
             "X-API-KEY": SERPER_API_KEY,
             "Content-Type": "application/json",
         }
         payload_data = {"q": query}
         payload_data.update(params)
-        payload = json.dumps(payload_data)
-        response = requests.request("POST", url, headers=headers, data=payload)
-        results = response.json()
+        return url, headers, payload_data
+
+    @staticmethod
+    def _parse_search_results(results: Dict) -> List[Dict]:
         results = results["organic"]
         # rename "link" key to "url"
         for result in results:
             result["url"] = result.pop("link")
         return results
 
+    def _fetch_search_results(self, query: str, type: str = "search", **params) -> List[Dict]:
+        url, headers, payload_data = self._search_request(query, type, **params)
+        response = get_http_client("serper", self.config.http).post(url, headers=headers, json=payload_data)
+        response.raise_for_status()
+        return self._parse_search_results(response.json())
+
+    async def _afetch_search_results(self, query: str, type: str = "search", **params) -> List[Dict]:
+        url, headers, payload_data = self._search_request(query, type, **params)
+        response = await get_async_http_client("serper", self.config.http).post(url, headers=headers, json=payload_data)
+        response.raise_for_status()
+        return self._parse_search_results(response.json())
+
+    def search_web(self, query: str, type: str = "search", **params) -> List[Dict]:
+        """Get raw search results from Serper API (cached by query, type and params)"""
+        key = make_key(query, type, params)
+        return self.search_cache.get_or_compute(key, lambda: self._fetch_search_results(query, type, **params))
+
+    async def asearch_web(self, query: str, type: str = "search", **params) -> List[Dict]:
+        """Async version of `search_web`"""
+        key = make_key(query, type, params)
+        return await self.search_cache.aget_or_compute(key, lambda: self._afetch_search_results(query, type, **params))
+
     def rerank_documents(self, query: str, docs: List[Dict]) -> List[Dict]:
-        """Rerank search results using Jina API"""
-        url = "https://api.jina.ai/v1/rerank"
-        headers = {
-            "Content-Type": "application/json", 
-            "Authorization": "Bearer " + JINA_API_KEY,
-        }
-        documents = [doc["snippet"] for doc in docs]
-        payload = {
-            "model": self.reranker_model,
-            "query": query,
-            "top_n": self.top_n,
-            "documents": documents,
-        }
-        response = requests.post(url, headers=headers, json=payload)
-        if response.status_code == 200:
-            results = response.json()["results"]
-            indices = [result["index"] for result in results]
-            return [docs[index] for index in indices]
-        else:
-            raise Exception(f"Error: {response.status_code}, {response.text}")
+        """Rerank search results (Jina API falling back to local BM25, or local BM25 only)"""
+        indices = self.reranker.rerank(query, docs, self.top_n)
+        return [docs[index] for index in indices]
 
-    def synthesize_response(self, query: str, ranked_results: List[Dict]) -> str:
-        """Use LLM to synthesize final response from ranked results"""
-        # Prepare prompt for LLM synthesis
-        prompt = f"""Given the search query: "{query}"
-        And the following search results:
-        {json.dumps(ranked_results, indent=2)}
+    async def arerank_documents(self, query: str, docs: List[Dict]) -> List[Dict]:
+        """Async version of `rerank_documents`"""
+        indices = await self.reranker.arerank(query, docs, self.top_n)
+        return [docs[index] for index in indices]
+
+    def _synthesis_prompt(self, query: str, ranked_results: List[Dict]) -> str:
+        context, stats = self.context_packer.pack(ranked_results)
+        print(f"WebSearcher context: {stats.tokens_out} tokens ({stats.tokens_saved} saved, "
+              f"{stats.documents_kept}/{stats.documents_in} results kept, {stats.duplicates_dropped} duplicates dropped)")
+        return f"""Given the search query: "{query}"
+        And the following search results (one per line, most relevant first):
+        {context}
         
         Please synthesize a comprehensive response that:
         1. Directly answers the query
@@ -108,8 +141,37 @@ class WebSearcher(Agent):
         
         Response:"""
 
-        # Call LLM to synthesize response
-        return groq_llm.invoke(prompt)
+    def _synthesis_messages(self, query: str, ranked_results: List[Dict]) -> list:
+        messages = [HumanMessage(content=self._synthesis_prompt(query, ranked_results))]
+        record_prompt_tokens(self.name, messages)
+        return messages
+
+    def synthesize_response(self, query: str, ranked_results: List[Dict]) -> str:
+        """Use LLM to synthesize final response from ranked results"""
+        return get_llm(*SYNTHESIS_LLM).invoke(self._synthesis_messages(query, ranked_results))
+
+    async def asynthesize_response(self, query: str, ranked_results: List[Dict]) -> str:
+        """Async version of `synthesize_response`"""
+        return await get_llm(*SYNTHESIS_LLM).ainvoke(self._synthesis_messages(query, ranked_results))
+
+    @staticmethod
+    def _task_output(answer: str) -> Dict:
+        return {
+            "last_task_status": TaskStatus.SUCCESS,
+            "last_task_output": answer,
+            "previous_outputs": ["\n\n**Web Searcher has finished the task with the following output**:\n" + answer]
+        }
+
+    def _answer(self, query: str) -> str:
+        raw_results = self.search_web(query)
+        ranked_results = self.rerank_documents(query, raw_results)
+        return self.synthesize_response(query, ranked_results).content
+
+    async def _aanswer(self, query: str) -> str:
+        raw_results = await self.asearch_web(query)
+        ranked_results = await self.arerank_documents(query, raw_results)
+        final_response = await self.asynthesize_response(query, ranked_results)
+        return final_response.content
 
     async def __acall__(self, state: State, **kwargs) -> Dict:
         """
@@ -121,31 +183,19 @@ class WebSearcher(Agent):
         web_input = WebSearcherInput(**state["next_agent_input"])
         query = web_input.query
         
-        # Execute search pipeline
-        raw_results = self.search_web(query)
-        ranked_results = self.rerank_documents(query, raw_results)
-        final_response = self.synthesize_response(query, ranked_results)
+        # Execute search pipeline (the whole answer is cached too when `cache.answer` is enabled)
+        answer = await self.answer_cache.aget_or_compute(make_key(query, SYNTHESIS_LLM), lambda: self._aanswer(query))
 
-        return {
-            "last_task_status": TaskStatus.SUCCESS,
-            "last_task_output": final_response.content,
-            "previous_outputs": ["\n\n**Web Searcher has finished the task with the following output**:\n" + final_response.content]
-        }
+        return self._task_output(answer)
 
     def __call__(self, state: State) -> Dict:
         """Synchronous version of the call method"""
         web_input = WebSearcherInput(**state["next_agent_input"])
         query = web_input.query
         
-        raw_results = self.search_web(query)
-        ranked_results = self.rerank_documents(query, raw_results)
-        final_response = self.synthesize_response(query, ranked_results)
+        answer = self.answer_cache.get_or_compute(make_key(query, SYNTHESIS_LLM), lambda: self._answer(query))
 
-        return {
-            "last_task_status": TaskStatus.SUCCESS,
-            "last_task_output": final_response.content,
-            "previous_outputs": ["\n\n**Web Searcher has finished the task with the following output**:\n" + final_response.content]
-        }
+        return self._task_output(answer)
 
     async def setup(self):
         """Setup the web searcher agent"""
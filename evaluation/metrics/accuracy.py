@@ -1,17 +1,15 @@
-from agent_hub.llms import groq_llm
+from agent_hub.llms import get_structured_llm, DEFAULT_LLMS
 from pydantic import BaseModel, Field
 
 
 class RewardMetric(BaseModel):
     score: float = Field(description="The score of the quality of the search results given the input, output and expected output. it should range between 0 and 1")
     reason: str = Field(description="The reason for the score")
-    
-    
-llm = groq_llm.with_structured_output(RewardMetric)
 
 
-def search_result_quality_metric(input, output, expected_output):
-    prompt = f"""You are evaluating the quality of web search results.
+
+def _search_result_quality_prompt(input, output, expected_output):
+    return f"""You are evaluating the quality of web search results.
             
         Given a search query and the actual vs expected search results, evaluate how well the output matches what was expected.
 
@@ -26,5 +24,13 @@ def search_result_quality_metric(input, output, expected_output):
 
         Provide your score and detailed reasoning for the evaluation."""
 
-    response = llm.invoke(prompt)
-    return response
\ No newline at end of file
+
+def search_result_quality_metric(input, output, expected_output):
+    llm = get_structured_llm(RewardMetric, *DEFAULT_LLMS["groq_llm"])
+    response = llm.invoke(_search_result_quality_prompt(input, output, expected_output))
+    return response
+
+
+async def asearch_result_quality_metric(input, output, expected_output):
+    llm = get_structured_llm(RewardMetric, *DEFAULT_LLMS["groq_llm"])
+    return await llm.ainvoke(_search_result_quality_prompt(input, output, expected_output))
\ No newline at end of file
@@ -1,6 +1,6 @@
 import functools
 import time
-from typing import Callable, Any, Tuple
+from typing import Callable, Any, Optional, Tuple
 
 
 def measure_latency(func: Callable) -> Callable:
@@ -31,3 +31,28 @@ def measure_latency(func: Callable) -> Callable:
         
     return wrapper
 
+
+
+def measure_time_to_first_token(func: Callable) -> Callable:
+    """
+    A decorator that measures how fast an async generator (e.g. `agent_hub.streaming.astream_run`)
+    produces its first item, and how long it takes to complete.
+    
+    Args:
+        func: An async generator function
+        
+    Returns:
+        A wrapped coroutine function that returns (items, time_to_first_token, total_time)
+    """
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs) -> Tuple[list, Optional[float], float]:
+        start_time = time.perf_counter()
+        time_to_first_token = None
+        items = []
+        async for item in func(*args, **kwargs):
+            if time_to_first_token is None:
+                time_to_first_token = time.perf_counter() - start_time
+            items.append(item)
+        return items, time_to_first_token, time.perf_counter() - start_time
+        
+    return wrapper
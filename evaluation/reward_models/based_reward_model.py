@@ -1,3 +1,4 @@
+import asyncio
 
 from abc import ABC, abstractmethod
 
@@ -9,3 +10,9 @@ class BaseRewardModel(ABC):
     def get_reward(self, input, output, expected_output):
         pass
 
+    async def aget_reward(self, input, output, expected_output):
+        """
+        Async version of `get_reward`, runs it in a thread unless overridden.
+        """
+        return await asyncio.to_thread(self.get_reward, input, output, expected_output)
+
@@ -1,5 +1,5 @@
 from evaluation.reward_models.based_reward_model import BaseRewardModel
-from evaluation.metrics.accuracy import search_result_quality_metric
+from evaluation.metrics.accuracy import asearch_result_quality_metric, search_result_quality_metric
 
 class WebSearchRewardModel(BaseRewardModel):
     def __init__(self):
@@ -9,6 +9,10 @@ class WebSearchRewardModel(BaseRewardModel):
         reward = search_result_quality_metric(input, output, expected_output)
         return reward.score, reward.reason
 
+    async def aget_reward(self, input, output, expected_output):
+        reward = await asearch_result_quality_metric(input, output, expected_output)
+        return reward.score, reward.reason
+
     def get_aggregate_reward(self, inputs, outputs, expected_outputs, agg="mean"):
         scores = []
         for input, output, expected_output in zip(inputs, outputs, expected_outputs):
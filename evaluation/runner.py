@@ -0,0 +1,223 @@
+"""
+Evaluation runner.
+
+Runs an agent on every item of a benchmark once, and collects from that single run its latency, its memory
+usage and the judge's quality score. Items run concurrently (at most `concurrency` at a time), the provider
+rate limits being handled by the shared HTTP clients (see `agent_hub.rate_limit`). The per-item results are
+written as JSON lines, and a summary is printed.
+
+Memory is traced with `tracemalloc`, which sees the whole process: per-item memory is only measured when
+items run one at a time, concurrent runs report the peak of the whole run.
+
+    python -m evaluation.runner --agent agent_hub.web_searcher.web_searcher:WebSearcher \\
+        --dataset evaluation/benchmarks_datasets/web_search_benchmark.json --slice 0:10 --concurrency 8
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from pydantic import BaseModel
+from agent_hub.telemetry import telemetry
+from evaluation.reward_models.based_reward_model import BaseRewardModel
+
+
+class ItemResult(BaseModel):
+    id: Any = None
+    query: str
+    complexity: Optional[str] = None
+    output: Optional[str] = None
+    latency: Optional[float] = None
+    current_memory_mb: Optional[float] = None
+    peak_memory_mb: Optional[float] = None
+    score: Optional[float] = None
+    reason: Optional[str] = None
+    error: Optional[str] = None
+
+
+def load_dataset(path: str, data_slice: Optional[slice] = None) -> List[Dict]:
+    """
+    Benchmark items of a dataset file (`{"benchmark_data": [...]}` or a plain list).
+    """
+    with open(path) as file:
+        data = json.load(file)
+    items = data["benchmark_data"] if isinstance(data, dict) else data
+    return items[data_slice] if data_slice is not None else items
+
+
+def parse_slice(value: str) -> slice:
+    """
+    "start:stop" (either can be omitted, ":" for all the items) or a single item count.
+    """
+    if ":" not in value:
+        return slice(0, int(value))
+    start, stop = value.split(":", 1)
+    return slice(int(start) if start else None, int(stop) if stop else None)
+
+
+def _quantile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class EvaluationRunner:
+    """
+    Args:
+        agent: Agent evaluated, called with `{"next_agent_input": {input_key: item[input_key]}}`
+        reward_model: Judge scoring the agent's output against the item's `expected_answer`, None to skip quality
+        concurrency: Items evaluated at the same time
+        input_key: Item field given to the agent
+    """
+    def __init__(self, agent, reward_model: Optional[BaseRewardModel] = None, concurrency: int = 4, input_key: str = "query"):
+        self.agent = agent
+        self.reward_model = reward_model
+        self.concurrency = max(1, concurrency)
+        self.input_key = input_key
+
+    @property
+    def measures_item_memory(self) -> bool:
+        return self.concurrency == 1
+
+    async def _evaluate(self, item: Dict, slots: asyncio.Semaphore) -> ItemResult:
+        result = ItemResult(id=item.get("id"), query=item[self.input_key], complexity=item.get("complexity"))
+        async with slots:
+            try:
+                if self.measures_item_memory:
+                    start_memory, _ = tracemalloc.get_traced_memory()
+                    tracemalloc.reset_peak()
+                start_time = time.perf_counter()
+                update = await self.agent.__acall__({"next_agent_input": {self.input_key: item[self.input_key]}})
+                result.latency = time.perf_counter() - start_time
+                if self.measures_item_memory:
+                    current, peak = tracemalloc.get_traced_memory()
+                    result.current_memory_mb = (current - start_memory) / 10**6
+                    result.peak_memory_mb = (peak - start_memory) / 10**6
+                result.output = str(update.get("last_task_output", update))
+            except Exception as e:
+                print(f"Evaluation of item {result.id} failed. Error: {e}")
+                result.error = f"agent: {e}"
+                return result
+        if self.reward_model is not None and "expected_answer" in item:
+            # the judge doesn't hold an agent slot
+            try:
+                result.score, result.reason = await self.reward_model.aget_reward(result.query, result.output, item["expected_answer"])
+            except Exception as e:
+                print(f"Judging item {result.id} failed. Error: {e}")
+                result.error = f"judge: {e}"
+        return result
+
+    async def arun(self, items: Sequence[Dict], on_result: Optional[Callable[[ItemResult], None]] = None) -> List[ItemResult]:
+        """
+        Evaluate the items, in the order of the items (`on_result` is called as they finish).
+        """
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def evaluate(item: Dict) -> ItemResult:
+            result = await self._evaluate(item, slots)
+            if on_result is not None:
+                on_result(result)
+            return result
+
+        return list(await asyncio.gather(*(evaluate(item) for item in items)))
+
+    def run(self, items: Sequence[Dict], on_result: Optional[Callable[[ItemResult], None]] = None) -> List[ItemResult]:
+        return asyncio.run(self.arun(items, on_result))
+
+
+def summarize(results: Sequence[ItemResult], wall_time: float, peak_memory_mb: Optional[float] = None) -> Dict[str, Any]:
+    latencies = [result.latency for result in results if result.latency is not None]
+    scores = [result.score for result in results if result.score is not None]
+    peaks = [result.peak_memory_mb for result in results if result.peak_memory_mb is not None]
+    return {
+        "items": len(results),
+        "errors": sum(result.error is not None for result in results),
+        "wall_time": wall_time,
+        "latency_mean": sum(latencies) / len(latencies) if latencies else None,
+        "latency_p50": _quantile(latencies, 0.5),
+        "latency_p95": _quantile(latencies, 0.95),
+        "quality_mean": sum(scores) / len(scores) if scores else None,
+        "item_peak_memory_mb_mean": sum(peaks) / len(peaks) if peaks else None,
+        "run_peak_memory_mb": peak_memory_mb,
+    }
+
+
+def evaluate(runner: EvaluationRunner, items: Sequence[Dict], output_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Run the evaluation, write the per-item results to `output_path` (JSON lines) and return the summary.
+    """
+    output = None
+    if output_path:
+        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        output = open(output_path, "w")
+
+    def write(result: ItemResult):
+        if output is not None:
+            output.write(result.model_dump_json() + "\n")
+            output.flush()
+
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    try:
+        results = runner.run(items, on_result=write)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        if output is not None:
+            output.close()
+    summary = summarize(results, time.perf_counter() - start_time, peak / 10**6)
+    summary["counters"] = telemetry.snapshot()["counters"]
+    return summary
+
+
+def load_object(path: str):
+    """
+    Object from a "module:attribute" path.
+    """
+    module_path, name = path.split(":")
+    return getattr(importlib.import_module(module_path), name)
+
+
+def main(argv: Optional[Sequence[str]] = None, agent_factory: Optional[Callable[[], Any]] = None,
+         reward_model: Optional[BaseRewardModel] = None, default_dataset: Optional[str] = None,
+         default_output: str = "evaluation/results/results.jsonl", default_slice: Optional[str] = None):
+    """
+    Command line entry point, also used by the pipelines with their own agent, judge and dataset
+    (and a `default_slice` when a full run is costly enough to be opt-in).
+    """
+    parser = argparse.ArgumentParser(description="Evaluate an agent on a benchmark in a single concurrent pass")
+    parser.add_argument("--agent", help="Agent class as module:Class (when not given by the pipeline)")
+    parser.add_argument("--reward-model", help="Reward model class as module:Class (when not given by the pipeline)")
+    parser.add_argument("--dataset", default=default_dataset, required=default_dataset is None, help="Benchmark JSON file")
+    parser.add_argument("--slice", type=parse_slice, default=parse_slice(default_slice) if default_slice else None,
+                        help=f"Items to evaluate, 'start:stop' or a count, ':' for all (default: {default_slice or 'all'})")
+    parser.add_argument("--concurrency", type=int, default=4, help="Items evaluated at the same time (1 also measures per-item memory)")
+    parser.add_argument("--output", default=default_output, help="Per-item results file (JSON lines)")
+    parser.add_argument("--no-judge", action="store_true", help="Skip the quality scoring")
+    args = parser.parse_args(argv)
+
+    if agent_factory is None:
+        if not args.agent:
+            parser.error("--agent is required")
+        agent_factory = load_object(args.agent)
+    if reward_model is None and args.reward_model:
+        reward_model = load_object(args.reward_model)()
+    agent = agent_factory()
+    asyncio.run(agent.setup())
+
+    items = load_dataset(args.dataset, args.slice)
+    runner = EvaluationRunner(agent, None if args.no_judge else reward_model, args.concurrency)
+    print(f"Evaluating {len(items)} items, {runner.concurrency} at a time...")
+    summary = evaluate(runner, items, args.output)
+    print("--------------------------------")
+    print(json.dumps({key: value for key, value in summary.items() if key != "counters"}, indent=2))
+    print(f"Per-item results written to {args.output}")
+    return summary
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Load test of the HTTP service (`agent_hub.server`) against local stand-in LLM and search backends.
+
+Each simulated user runs a session of several messages, half of them needing a web search (FrontLLM,
+planner, WebSearcher and final answer), the others answered directly. Reports the status codes
+(200 served, 429 rejected, 503 timed out in the queue), the latency percentiles and the throughput.
+
+Usage:
+    python -m scripts.load_test --users 200 --turns 2 --max-concurrent-runs 32 --llm-latency 0.5
+"""
+import argparse
+import asyncio
+import random
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from pathlib import Path
+import httpx
+import numpy as np
+import uvicorn
+from scripts.stand_in_backends import configure_environment, create_backend
+
+
+def serve_in_thread(app, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def run_user(client: httpx.AsyncClient, turns: int, stream: bool, statuses: Counter, latencies: list):
+    session_id = None
+    for turn in range(turns):
+        subject = uuid.uuid4().hex[:8]
+        message = f"search the latest news about {subject}" if random.random() < 0.5 else f"hello, I am {subject}"
+        start_time = time.perf_counter()
+        try:
+            if stream:
+                async with client.stream("POST", "/chat/stream", json={"message": message, "session_id": session_id}) as response:
+                    async for line in response.aiter_lines():
+                        if line.startswith('data: {"session_id"'):
+                            session_id = session_id or line.split('"')[3]
+                status = response.status_code
+            else:
+                response = await client.post("/chat", json={"message": message, "session_id": session_id})
+                status = response.status_code
+                if status == 200:
+                    session_id = response.json()["session_id"]
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        statuses[status] += 1
+        if status == 200:
+            latencies.append(time.perf_counter() - start_time)
+
+
+async def load_test(base_url: str, users: int, turns: int, stream: bool):
+    statuses, latencies = Counter(), []
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=base_url, timeout=600.0, limits=limits) as client:
+        start_time = time.perf_counter()
+        await asyncio.gather(*(run_user(client, turns, stream, statuses, latencies) for _ in range(users)))
+        total_time = time.perf_counter() - start_time
+        server_metrics = (await client.get("/metrics")).json()
+    return statuses, latencies, total_time, server_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the agent service against stand-in backends")
+    parser.add_argument("--users", type=int, default=100, help="Number of concurrent users (sessions)")
+    parser.add_argument("--turns", type=int, default=2, help="Messages sent by each user, one after the other")
+    parser.add_argument("--stream", action="store_true", help="Use the streaming endpoint")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Mean latency of the stand-in LLM calls (seconds)")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="Mean latency of the stand-in search calls (seconds)")
+    parser.add_argument("--max-concurrent-runs", type=int, default=32)
+    parser.add_argument("--max-queued-runs", type=int, default=64)
+    parser.add_argument("--queue-timeout", type=float, default=30.0)
+    parser.add_argument("--backend-rpm", type=float, default=None, help="Rate limit of each stand-in API (requests per minute, 429 above it)")
+    parser.add_argument("--client-rpm", type=float, default=None, help="Client-side rate limit of each provider (requests per minute)")
+    parser.add_argument("--no-rate-limit", action="store_true", help="Disable the client-side rate limiter")
+    parser.add_argument("--backend-port", type=int, default=8765)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    backend_url = f"http://127.0.0.1:{args.backend_port}"
+    configure_environment(backend_url)
+    backend = create_backend(args.llm_latency, args.search_latency, requests_per_minute=args.backend_rpm)
+    serve_in_thread(backend, args.backend_port)
+
+    # imported after the environment points the clients to the stand-ins
+    from agent_hub.config import (AgentHubConfig, CacheConfig, CheckpointConfig, OrchestratorConfig, PlanCacheConfig,
+                                  ProviderLimits, RateLimitConfig, RouterConfig, ServerConfig, set_config)
+    from agent_hub.graph import abuild_graph
+    from agent_hub.server import create_app
+
+    checkpoint_path = str(Path(tempfile.mkdtemp()) / "checkpoints.sqlite")
+    config = AgentHubConfig(
+        cache=CacheConfig(path=None),
+        orchestrator=OrchestratorConfig(plan_cache=PlanCacheConfig(enabled=False)),
+        router=RouterConfig(enabled=False),
+        checkpoint=CheckpointConfig(enabled=True, path=checkpoint_path),
+        server=ServerConfig(max_concurrent_runs=args.max_concurrent_runs, max_queued_runs=args.max_queued_runs,
+                            queue_timeout=args.queue_timeout),
+        rate_limit=RateLimitConfig(enabled=not args.no_rate_limit, limits={},
+                                   default_limits=ProviderLimits(requests_per_minute=args.client_rpm, max_concurrency=64)),
+    )
+    # the shared HTTP clients (and their rate limiter) use the process config
+    set_config(config)
+    app = create_app(lambda: abuild_graph(["WebSearcher"], config), config)
+    serve_in_thread(app, args.port)
+
+    statuses, latencies, total_time, server_metrics = asyncio.run(
+        load_test(f"http://127.0.0.1:{args.port}", args.users, args.turns, args.stream)
+    )
+    print(f"{sum(statuses.values())} requests in {total_time:.1f}s: {dict(statuses)}")
+    print(f"Upstream calls rejected by the stand-in backends (429): {backend.state.rejected}")
+    if latencies:
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        print(f"Latency of the served requests: p50 {p50:.2f}s, p95 {p95:.2f}s, p99 {p99:.2f}s")
+        print(f"Throughput: {len(latencies) / total_time:.1f} requests/s")
+    queue_wait = server_metrics.get("observations", {}).get("server.queue_wait")
+    if queue_wait:
+        print(f"Queue wait: p50 {queue_wait['p50']:.2f}s, max {queue_wait['max']:.2f}s")
+    for name, value in sorted(server_metrics.get("counters", {}).items()):
+        if name.startswith("rate_limit.throttled"):
+            print(f"{name}: {value:.0f}")
+    for name, summary in sorted(server_metrics.get("observations", {}).items()):
+        if name.startswith("rate_limit.wait"):
+            print(f"{name}: p50 {summary['p50']:.2f}s, p95 {summary['p95']:.2f}s ({summary['count']} calls)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Render the agent graph diagram.
+
+Usage:
+    python -m scripts.render_graph [--output docs/mermaid_graph.png] [--method pyppeteer|api]
+
+Writing to a `.mmd` file only dumps the Mermaid source and needs neither a browser nor the network.
+The `pyppeteer` method renders the PNG locally, `api` uses the remote mermaid.ink service.
+"""
+import argparse
+from pathlib import Path
+from langchain_core.runnables.graph import MermaidDrawMethod
+from agent_hub.config import AgentHubConfig
+from agent_hub.graph import build_graph, DEFAULT_AGENTS
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the agent graph diagram")
+    parser.add_argument("--output", default="docs/mermaid_graph.png", help="Output file (.png or .mmd)")
+    parser.add_argument("--method", choices=["pyppeteer", "api"], default="pyppeteer", help="PNG rendering method")
+    parser.add_argument("--agents", nargs="+", default=list(DEFAULT_AGENTS), help="Agents to include in the graph")
+    args = parser.parse_args()
+
+    # Drawing only needs the graph topology, so skip the agents' setup
+    graph = build_graph(agents=tuple(args.agents), config=AgentHubConfig(setup_agents=False))
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+
+    if output_path.suffix == ".mmd":
+        output_path.write_text(graph.get_graph().draw_mermaid())
+    else:
+        png_data = graph.get_graph().draw_mermaid_png(
+            draw_method=MermaidDrawMethod.PYPPETEER if args.method == "pyppeteer" else MermaidDrawMethod.API,
+            background_color="white",
+            padding=10
+        )
+        output_path.write_bytes(png_data)
+    print(f"Graph diagram written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
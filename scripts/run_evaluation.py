@@ -57,7 +57,7 @@ def main():
         return
 
     logging.info("\n=== Running Evaluation Pipeline ===")
-    if not run_command("python -m evaluation.pipelines.web_searcher_pipeline"):
+    if not run_command("python -m evaluation.pipelines.web_searcher_pipeline --slice 0:1"):
         logging.error("\nEvaluation failed!")
         sys.exit(1)
 
@@ -0,0 +1,174 @@
+"""
+Local stand-ins of the LLM and search APIs, to load test the service without calling (and paying) the real ones.
+
+Serves the chat completion APIs of Groq (`/openai/v1/chat/completions`), Mistral and Together (`/v1/chat/completions`),
+Serper search (`/search`) and Jina reranking (`/v1/rerank`) with a configurable latency and rate limit. Structured outputs
+(tool calls) are filled from the requested tool schema: the FrontLLM asks for computer interaction when the
+message contains "search", and the planner answers with a single WebSearcher task.
+Point the clients to it with `configure_environment(base_url)` before importing `agent_hub`.
+"""
+import asyncio
+import json
+import os
+import random
+import time
+import uuid
+from collections import defaultdict, deque
+from typing import Any, Dict, Optional
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def configure_environment(base_url: str):
+    """
+    Route the LLM and search clients to the stand-ins (must run before `agent_hub` is imported).
+    """
+    os.environ.update({
+        "GROQ_API_BASE": base_url,
+        "GROQ_API_KEY": "stand-in",
+        "MISTRAL_BASE_URL": f"{base_url}/v1",
+        "MISTRAL_API_KEY": "stand-in",
+        "TOGETHER_API_BASE": f"{base_url}/v1/",
+        "TOGETHER_API_KEY": "stand-in",
+        "SERPER_BASE_URL": base_url,
+        "SERPER_API_KEY": "stand-in",
+        "JINA_RERANK_URL": f"{base_url}/v1/rerank",
+        "JINA_API_KEY": "stand-in",
+    })
+
+
+def _fill_schema(schema: Dict[str, Any], definitions: Dict[str, Any]) -> Any:
+    """
+    Minimal valid value of a JSON schema.
+    """
+    if "$ref" in schema:
+        return _fill_schema(definitions[schema["$ref"].split("/")[-1]], definitions)
+    if "anyOf" in schema:
+        options = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return _fill_schema(options[0], definitions) if options else None
+    if "enum" in schema:
+        return schema["enum"][0]
+    if "default" in schema:
+        return schema["default"]
+    schema_type = schema.get("type", "string")
+    if schema_type == "object":
+        return {name: _fill_schema(field, definitions) for name, field in schema.get("properties", {}).items()
+                if name in schema.get("required", [])}
+    return {"string": "stand-in", "boolean": False, "integer": 0, "number": 0.0, "array": []}.get(schema_type)
+
+
+def _last_user_message(messages: list) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            return content if isinstance(content, str) else json.dumps(content)
+    return ""
+
+
+def _tool_arguments(tool: Dict[str, Any], query: str) -> Dict[str, Any]:
+    name, parameters = tool["name"], tool.get("parameters", {})
+    if name == "FrontLLMOutput":
+        return {"is_computer_interaction_required": "search" in query.lower(), "llm_response": "Hello from the stand-in!"}
+    if name == "OrchestratorPlan":
+        return {"goal": "Answer the user query", "tasks": [{
+            "name": "web search", "description": "Search the web for the user query", "execution_agent_name": "WebSearcher",
+            "dependencies": [], "agent_input": {"query": query[-200:]},
+        }]}
+    arguments = _fill_schema(parameters, parameters.get("$defs", {}))
+    if name == "WebSearcherInput":
+        arguments["query"] = query[-200:]
+    return arguments
+
+
+def _completion_message(body: Dict[str, Any]) -> Dict[str, Any]:
+    tools = body.get("tools") or []
+    if not tools:
+        return {"role": "assistant", "content": "This is a stand-in answer. " * 8}
+    tool = tools[0]["function"]
+    if isinstance(body.get("tool_choice"), dict):
+        tool = next(t["function"] for t in tools if t["function"]["name"] == body["tool_choice"]["function"]["name"])
+    arguments = _tool_arguments(tool, _last_user_message(body.get("messages", [])))
+    return {"role": "assistant", "content": "", "tool_calls": [{
+        "id": uuid.uuid4().hex[:9], "type": "function", "function": {"name": tool["name"], "arguments": json.dumps(arguments)},
+    }]}
+
+
+def create_backend(llm_latency: float = 0.5, search_latency: float = 0.2, jitter: float = 0.2,
+                   requests_per_minute: Optional[float] = None) -> FastAPI:
+    """
+    Args:
+        llm_latency: Mean latency (in seconds) of a chat completion
+        search_latency: Mean latency (in seconds) of a search or rerank call
+        jitter: Relative random variation of the latencies
+        requests_per_minute: Rate limit of each API (sliding minute window), the requests above it get a 429
+    """
+    app = FastAPI(title="Stand-in backends")
+    usage = {"prompt_tokens": 100, "completion_tokens": 50, "total_tokens": 150}
+    request_times: Dict[str, deque] = defaultdict(deque)
+    app.state.rejected = 0
+
+    @app.middleware("http")
+    async def rate_limit(request: Request, call_next):
+        if requests_per_minute:
+            now, window = time.monotonic(), request_times[request.url.path]
+            while window and now - window[0] > 60.0:
+                window.popleft()
+            if len(window) >= requests_per_minute:
+                app.state.rejected += 1
+                retry_after = 60.0 - (now - window[0])
+                return JSONResponse({"error": "rate limit exceeded"}, status_code=429, headers={"Retry-After": f"{retry_after:.1f}"})
+            window.append(now)
+        return await call_next(request)
+
+    async def wait(latency: float):
+        await asyncio.sleep(latency * random.uniform(1 - jitter, 1 + jitter))
+
+    async def chat_completions(request: Request):
+        body = await request.json()
+        await wait(llm_latency)
+        message = _completion_message(body)
+        completion_id, created, model = f"chatcmpl-{uuid.uuid4().hex}", int(time.time()), body.get("model", "stand-in")
+        if not body.get("stream"):
+            return {"id": completion_id, "object": "chat.completion", "created": created, "model": model, "usage": usage,
+                    "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if message.get("tool_calls") else "stop"}]}
+
+        def chunk(delta, finish_reason=None):
+            payload = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                       "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            if finish_reason:
+                payload["usage"] = usage
+            return f"data: {json.dumps(payload)}\n\n"
+
+        async def stream():
+            if message.get("tool_calls"):
+                yield chunk({"role": "assistant", "tool_calls": [{"index": 0, **message["tool_calls"][0]}]})
+            else:
+                for word in message["content"].split(" "):
+                    yield chunk({"role": "assistant", "content": word + " "})
+                    await asyncio.sleep(0.005)
+            yield chunk({}, "tool_calls" if message.get("tool_calls") else "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(stream(), media_type="text/event-stream")
+
+    app.add_api_route("/openai/v1/chat/completions", chat_completions, methods=["POST"])
+    app.add_api_route("/v1/chat/completions", chat_completions, methods=["POST"])
+
+    @app.post("/search")
+    async def search(request: Request):
+        body = await request.json()
+        await wait(search_latency)
+        return {"organic": [
+            {"title": f"Result {i} for {body.get('q')}", "link": f"https://example.com/{i}",
+             "snippet": f"Stand-in snippet number {i} about {body.get('q')}.", "position": i}
+            for i in range(1, 11)
+        ]}
+
+    @app.post("/v1/rerank")
+    async def rerank(request: Request):
+        body = await request.json()
+        await wait(search_latency)
+        documents = body.get("documents", [])
+        return {"results": [{"index": i, "relevance_score": 1.0 / (i + 1)} for i in range(min(len(documents), body.get("top_n", 10)))]}
+
+    return app
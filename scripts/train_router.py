@@ -0,0 +1,49 @@
+"""
+Train the FrontLLM local router from the logged LLM decisions.
+
+Usage:
+    python -m scripts.train_router [--decisions .cache/router_decisions.jsonl] [--output .cache/router.npz]
+
+The decisions are only logged when `RouterConfig.decisions_path` is set (it stores the users' messages).
+
+A held-out share of the decisions is used to report, at the configured confidence, the precision and
+recall of the short-circuited decisions of each class and the share of the messages short-circuited.
+The model is then trained on all the decisions and saved where the FrontLLM loads it from.
+"""
+import argparse
+import numpy as np
+from agent_hub.config import get_config
+from agent_hub.router import RouterModel, evaluate, load_decisions
+
+
+def main():
+    router_config = get_config().router
+    parser = argparse.ArgumentParser(description="Train the FrontLLM local router")
+    parser.add_argument("--decisions", default=router_config.decisions_path or ".cache/router_decisions.jsonl", help="JSON lines log of the LLM decisions")
+    parser.add_argument("--output", default=router_config.model_path, help="Trained model file (.npz)")
+    parser.add_argument("--confidence", type=float, default=router_config.confidence, help="Minimum probability to skip the LLM")
+    parser.add_argument("--test-size", type=float, default=0.2, help="Share of the decisions held out for evaluation")
+    parser.add_argument("--epochs", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    texts, labels = load_decisions(args.decisions)
+    print(f"Loaded {len(texts)} decisions ({sum(labels)} requiring computer interaction)")
+    order = np.random.default_rng(args.seed).permutation(len(texts))
+    test_count = int(len(texts) * args.test_size)
+    test, train = order[:test_count], order[test_count:]
+
+    if test_count:
+        model = RouterModel().fit([texts[i] for i in train], [labels[i] for i in train], epochs=args.epochs)
+        report = evaluate(model, [texts[i] for i in test], [labels[i] for i in test], args.confidence)
+        print(f"Held-out evaluation ({test_count} messages, confidence {args.confidence}):")
+        for name, value in report.items():
+            print(f"  {name}: {value:.3f}")
+
+    model = RouterModel().fit(texts, labels, epochs=args.epochs)
+    model.save(args.output)
+    print(f"Router written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,28 +1,42 @@
 import streamlit as st
 from langchain_core.messages import HumanMessage
-from agent_hub.graph import graph
+from agent_hub.graph import build_graph
+from agent_hub.streaming import astream_run
 from PIL import Image
+from pathlib import Path
 import asyncio
+import queue
 import sys
-import nest_asyncio
-from asyncio import WindowsProactorEventLoopPolicy
+import threading
 
-# Configure event loop policy for Windows
+# Configure event loop policy for Windows (subprocesses need the Proactor loop)
 if sys.platform == "win32":
-    asyncio.set_event_loop_policy(WindowsProactorEventLoopPolicy())
-nest_asyncio.apply()
+    asyncio.set_event_loop_policy(asyncio.WindowsProactorEventLoopPolicy())
 
-def run_with_proactor(func, *args, **kwargs):
-    """Run a function with ProactorEventLoop"""
-    async def _run():
-        return func(*args, **kwargs)
-    
+@st.cache_resource
+def get_event_loop():
+    """One long-lived event loop shared by every Streamlit session"""
     loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-    try:
-        return loop.run_until_complete(_run())
-    finally:
-        loop.close()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    return loop
+
+graph = build_graph()
+
+def stream_graph(input_data):
+    """Stream the graph events produced on the shared event loop"""
+    events = queue.Queue()
+
+    async def produce():
+        try:
+            async for event in astream_run(graph, input_data):
+                events.put(event)
+        finally:
+            events.put(None)
+
+    future = asyncio.run_coroutine_threadsafe(produce(), get_event_loop())
+    while (event := events.get()) is not None:
+        yield event
+    future.result()  # re-raise the run errors, if any
 
 st.set_page_config(layout="wide")
 col1, col2 = st.columns([1, 1])
@@ -31,8 +45,10 @@ col1, col2 = st.columns([1, 1])
 with col1:
     st.title("Agent Hub Demo")
     
-    mermaid_image = Image.open("docs/mermaid_graph.png")
-    st.image(mermaid_image, caption="Agent Hub Graph Visualization", use_container_width=True)
+    # Rendered offline with `python -m scripts.render_graph`
+    if Path("docs/mermaid_graph.png").exists():
+        mermaid_image = Image.open("docs/mermaid_graph.png")
+        st.image(mermaid_image, caption="Agent Hub Graph Visualization", use_container_width=True)
     
     user_input = st.text_area("Enter your query:", 
                              "Can you check the weather in Paris (use the web search agent) and then write the results to a file called weather.txt?",
@@ -40,16 +56,31 @@ with col1:
                              max_chars=500)
     
     if st.button("Run"):
-        with st.spinner("Processing..."):
-            input_data = {
-                "messages": [HumanMessage(content=user_input)], 
-                "user_input": user_input
-            }
-            # Run with ProactorEventLoop
-            result = run_with_proactor(graph.invoke, input_data)
-            st.session_state.result = result
-            st.header("Final Output")
-            st.write(result["messages"][-1].content)
+        input_data = {
+            "messages": [HumanMessage(content=user_input)], 
+            "user_input": user_input
+        }
+        progress = st.status("Processing...", expanded=False)
+        st.header("Final Output")
+        output = st.empty()
+        streamed_node, streamed_text = None, ""
+        for event in stream_graph(input_data):
+            if event.type == "token":
+                # show the generation in progress (web search synthesis, then the final answer)
+                if event.node != streamed_node:
+                    streamed_node, streamed_text = event.node, ""
+                streamed_text += event.content
+                output.markdown(streamed_text)
+            elif event.type == "node":
+                progress.update(label=f"{event.node} finished")
+                progress.write(f"{event.node} finished")
+            else:
+                result = event.state
+                metrics = event.metrics
+        st.session_state.result = result
+        output.markdown(result["messages"][-1].content)
+        time_to_first_token = f"{metrics.time_to_first_token:.2f}s" if metrics.time_to_first_token is not None else "n/a"
+        progress.update(label=f"Done in {metrics.total_time:.2f}s (time to first token: {time_to_first_token})", state="complete")
 
 # Side panel for logs
 with col2:
@@ -58,9 +89,10 @@ with col2:
     with st.expander("Full Execution Details", expanded=True):
         if "result" in st.session_state:
             result = st.session_state.result
-            plan = result["plan"]
+            plan = result.get("plan")
             st.write("### Plan")
-            st.json(plan.model_dump())
+            if plan is not None:
+                st.json(plan.model_dump())
             st.markdown("--------------------------------")
             st.write("### Previous Outputs")
             previous_outputs = result.get("previous_outputs", [])
@@ -0,0 +1,102 @@
+import asyncio
+from agent_hub.browser import pool as pool_module
+from agent_hub.browser.pool import BrowserPool
+from agent_hub.config import BrowserPoolConfig
+
+
+class FakePlaywrightBrowser:
+    def __init__(self):
+        self.connected = True
+
+    def is_connected(self):
+        return self.connected
+
+
+class FakeBrowser:
+    launched = []
+
+    def __init__(self):
+        self.playwright_browser = None
+        self.closed = False
+
+    async def get_playwright_browser(self):
+        await asyncio.sleep(0.01)
+        self.playwright_browser = FakePlaywrightBrowser()
+        FakeBrowser.launched.append(self)
+        return self.playwright_browser
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+def make_pool(**config) -> BrowserPool:
+    FakeBrowser.launched = []
+    return BrowserPool(BrowserPoolConfig(**config), FakeBrowser, FakeContext)
+
+
+async def browse(pool: BrowserPool, crash: bool = False):
+    async with pool.lease() as context:
+        if crash:
+            context.browser.playwright_browser.connected = False
+        return context
+
+
+def test_tasks_reuse_warm_browsers_with_fresh_contexts():
+    pool = make_pool(size=2, max_memory_mb=None)
+    pool.submit(pool.start()).result()
+    assert len(FakeBrowser.launched) == 2
+
+    contexts = [pool.submit(browse(pool)).result() for _ in range(3)]
+    assert len(FakeBrowser.launched) == 2
+    assert len({id(context) for context in contexts}) == 3 and all(context.closed for context in contexts)
+
+    async def parallel():
+        return await asyncio.gather(*(asyncio.wrap_future(pool.submit(browse(pool))) for _ in range(4)))
+
+    contexts = asyncio.run(parallel())
+    assert {context.browser for context in contexts} <= set(FakeBrowser.launched)
+    closed = []
+
+    async def close_client():
+        closed.append(asyncio.get_running_loop())
+
+    pool.on_close(close_client)
+    pool_loop = pool.loop_thread.loop
+    pool.close()
+    # on the pool's loop, where the resource lives
+    assert closed == [pool_loop] and all(browser.closed for browser in FakeBrowser.launched)
+
+
+def test_browsers_are_replaced(monkeypatch):
+    pool = make_pool(size=1, max_uses=2, max_memory_mb=100)
+    memory = {"mb": 50}
+
+    async def browser_memory_mb(playwright_browser):
+        return memory["mb"]
+
+    monkeypatch.setattr(pool_module, "browser_memory_mb", browser_memory_mb)
+
+    def run(crash: bool = False):
+        context = pool.submit(browse(pool, crash)).result()
+        # replacements launch in the background, wait for the next lease
+        pool.submit(asyncio.sleep(0.05)).result()
+        return context.browser
+
+    first = run()
+    assert run() is first and first.closed  # max uses
+    second = run(crash=True)
+    assert second is not first and second.closed
+    memory["mb"] = 200
+    third = run()
+    assert third.closed and len(FakeBrowser.launched) == 4
+    assert pool._browsers == 1
+    pool.close()
@@ -0,0 +1,50 @@
+import asyncio
+from agent_hub.cache import build_cache
+from agent_hub.cli import cli_generator
+from agent_hub.cli.cli_generator import CLICommand, agenerate_cli_command, generate_cli_command, normalize_operation, record_cli_command
+from agent_hub.config import CacheConfig, CacheLayerConfig
+
+
+class FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return CLICommand(command="ls", description="list files")
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+def test_operations_are_normalized():
+    assert normalize_operation("  List the files in current directory. ") == "list the files in current directory"
+    assert normalize_operation("please list the files in current   directory") == "list the files in current directory"
+    assert normalize_operation("Could you kindly list the files in current directory?") == "list the files in current directory"
+    # articles and fillers are arguments too: different operations never share a command
+    assert normalize_operation("create directory a") != normalize_operation("create directory an")
+    assert normalize_operation("create directory a") != normalize_operation("create directory")
+    assert normalize_operation("echo you can") != normalize_operation("echo just")
+    assert normalize_operation("echo please") == "echo please"
+    # other words keep their case, they can be names
+    assert normalize_operation("create a directory called Projects") != normalize_operation("create a directory called projects")
+
+
+def test_only_successful_commands_are_reused(monkeypatch):
+    llm = FakeLLM()
+    monkeypatch.setattr(cli_generator, "_command_llm_and_prompt", lambda user_input, model, platform: (llm, user_input))
+    cache = build_cache("test_cli_command", CacheLayerConfig(), CacheConfig(path=None))
+
+    command = generate_cli_command("list files in current directory", cache=cache)
+    assert generate_cli_command("list files in current directory", cache=cache) == command
+    assert llm.calls == 2  # not cached before it ran
+
+    record_cli_command(cache, "list files in current directory", command, succeeded=True)
+    assert asyncio.run(agenerate_cli_command("Please list files in current directory.", cache=cache)) == "ls"
+    assert generate_cli_command("list files in current directory", platform="linux", cache=cache) == "ls"
+    assert llm.calls == 3  # other platforms have their own commands
+    assert cache.stats()["hits"] == 1 and cache.stats()["saved_seconds"] >= 0
+
+    record_cli_command(cache, "list files in current directory", command, succeeded=False)
+    generate_cli_command("list files in current directory", cache=cache)
+    assert llm.calls == 4
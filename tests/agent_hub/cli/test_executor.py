@@ -0,0 +1,67 @@
+import asyncio
+import os
+import time
+import pytest
+from agent_hub.cli.cli_agent import CLIAgent
+from agent_hub.cli.executor import arun_command, run_command
+from agent_hub.config import CLIConfig
+
+
+def is_running(pid: int) -> bool:
+    # killed processes can stay zombies until their (re)parent reaps them
+    try:
+        with open(f"/proc/{pid}/stat") as stat:
+            return stat.read().rsplit(")", 1)[1].split()[0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_output_and_exit_code_are_captured():
+    result = run_command("echo hello; echo oops >&2; exit 3")
+    assert result.exit_code == 3 and not result.succeeded
+    assert "hello" in result.output and "oops" in result.output
+    assert "(exit code 3)" in result.to_prompt()
+
+
+def test_output_reaches_the_next_agents():
+    # the orchestrator's memory is built from previous_outputs
+    update = CLIAgent._operation_succeeded("print a greeting", run_command("echo hello"))
+    assert "hello" in update["previous_outputs"][0] and "(exit code 0)" in update["previous_outputs"][0]
+
+
+def test_large_output_is_spilled_to_a_file(tmp_path):
+    config = CLIConfig(output_tail_bytes=100, spill_dir=str(tmp_path))
+    result = run_command("seq 1 10000", config)
+    assert result.succeeded and result.truncated
+    assert len(result.output) == 100 and result.output.endswith("10000\n")
+    with open(result.output_path) as output:
+        assert output.read().splitlines() == [str(i) for i in range(1, 10001)]
+
+
+def test_only_the_newest_spill_files_are_kept(tmp_path):
+    config = CLIConfig(output_tail_bytes=10, spill_dir=str(tmp_path), spill_retention=2)
+    paths = [run_command(f"seq 1 {100 + i}", config).output_path for i in range(4)]
+    kept = {path.name for path in tmp_path.iterdir()}
+    assert len(kept) == 2 and os.path.basename(paths[-1]) in kept
+
+
+def test_commands_are_killed_on_timeout_and_cancel():
+    async def scenario():
+        start_time = time.perf_counter()
+        # commands run concurrently, without blocking the event loop
+        timed_out, _ = await asyncio.gather(arun_command("sleep 5", timeout=0.3), asyncio.sleep(0.1))
+        assert timed_out.timed_out and timed_out.exit_code is None
+        assert time.perf_counter() - start_time < 2
+
+        pids = []
+        task = asyncio.create_task(arun_command("sh -c 'echo $$; sleep 5'", on_output=lambda text: pids.append(int(text.split()[0]))))
+        while not pids:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return pids[0]
+
+    pid = asyncio.run(scenario())
+    time.sleep(0.1)
+    assert not is_running(pid)
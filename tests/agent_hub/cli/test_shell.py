@@ -0,0 +1,74 @@
+import asyncio
+import time
+from agent_hub.cli.executor import arun_command
+from agent_hub.cli.shell import ShellSessions
+from agent_hub.config import CLIConfig
+from agent_hub.telemetry import telemetry
+
+
+def test_sessions_keep_their_state(tmp_path):
+    shells = ShellSessions(CLIConfig(), cwd=str(tmp_path))
+    try:
+        assert shells.run("a", "cd /tmp && export GREETING=hi").succeeded
+        assert shells.run("a", "pwd; echo $GREETING").output == "/tmp\nhi\n"
+        assert shells.run("b", "pwd").output.strip() == str(tmp_path)
+
+        failed = shells.run("a", "echo partial; false")
+        assert failed.exit_code == 1 and failed.output == "partial\n"
+        # output without a trailing newline, and a command trying to read the session's input
+        assert shells.run("a", "printf abc; cat").output == "abc"
+    finally:
+        shells.close()
+
+
+def test_hung_and_exited_shells_are_restarted():
+    shells = ShellSessions(CLIConfig())
+    try:
+        started = telemetry.counter("cli.shell.started")
+        assert shells.run("s", "echo 'unclosed", timeout=0.3).timed_out
+        assert shells.run("s", "exit 4").exit_code == 4
+        assert shells.run("s", "echo back").output == "back\n"
+        assert telemetry.counter("cli.shell.started") == started + 3
+    finally:
+        shells.close()
+
+
+def test_busy_sessions_are_not_evicted():
+    shells = ShellSessions(CLIConfig(max_shell_sessions=1))
+
+    async def scenario():
+        long_command = asyncio.ensure_future(shells.arun("a", "sleep 0.3; echo done"))
+        await asyncio.sleep(0.1)
+        assert (await shells.arun("b", "echo hi")).output == "hi\n"
+        # evicting it would close its shell under the running command
+        assert list(shells._sessions) == ["a", "b"]
+        return await long_command
+
+    try:
+        assert asyncio.run(scenario()).output == "done\n"
+        # "a" is idle again: the next new session evicts it
+        shells.run("c", "true")
+        assert list(shells._sessions) == ["c"]
+    finally:
+        shells.close()
+
+
+def test_persistent_shell_is_faster_than_spawning():
+    shells = ShellSessions(CLIConfig())
+
+    async def scenario():
+        await shells.arun("s", "true")
+        start_time = time.perf_counter()
+        for _ in range(20):
+            await shells.arun("s", "true")
+        persistent_time = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        for _ in range(20):
+            await arun_command("true")
+        return persistent_time, time.perf_counter() - start_time
+
+    try:
+        persistent_time, spawn_time = asyncio.run(scenario())
+    finally:
+        shells.close()
+    assert persistent_time < spawn_time
@@ -0,0 +1,75 @@
+from agent_hub.orchestrator.plan_cache import PlanCache, query_substitutions
+from agent_hub.plan import OrchestratorPlan, Task, TaskStatus
+
+QUERY = "Can you check the weather in Paris (use the web search agent) and then write the results to a file called weather.txt?"
+
+
+def weather_plan():
+    return OrchestratorPlan(goal=QUERY, is_completed=True, tasks=[
+        Task(name="search Paris weather", description="Search the weather in Paris",
+             execution_agent_name="WebSearcher", task_status=TaskStatus.SUCCESS),
+        Task(name="write weather.txt", description="Write the results to weather.txt",
+             execution_agent_name="CLIAgent", dependencies=["search Paris weather"], task_status=TaskStatus.SUCCESS),
+    ])
+
+
+def test_similar_query_reuses_parameterized_plan():
+    cache = PlanCache()
+    cache.add(QUERY, weather_plan())
+
+    plan = cache.lookup(QUERY.replace("Paris", "London").replace("weather.txt", "london.txt"))
+
+    assert plan is not None and not plan.is_completed
+    assert [task.description for task in plan.tasks] == ["Search the weather in London", "Write the results to london.txt"]
+    assert plan.tasks[1].dependencies == ["search London weather"]
+    assert all(task.task_status == TaskStatus.PENDING for task in plan.tasks)
+    assert plan.template_query == QUERY
+    assert cache.lookup("open chrome and log into my gmail account") is None
+
+
+def test_different_action_falls_back_to_planner():
+    cache = PlanCache()
+    cache.add(QUERY, weather_plan())
+    assert cache.lookup(QUERY.replace("write the results to a", "delete the file")) is None
+    assert cache.lookup(QUERY.replace("and then write", "and then don't write")) is None
+
+
+def test_short_entity_swap_reuses_plan():
+    cache = PlanCache()
+    cache.add("Can you check the weather in Paris today?", weather_plan())
+    plan = cache.lookup("Can you check the weather in London today?")
+    assert plan is not None and plan.tasks[0].description == "Search the weather in London"
+
+    cache.add("Create a folder named reports", OrchestratorPlan(goal="Create a folder named reports", is_completed=True, tasks=[
+        Task(name="create reports", description="Create the folder reports", execution_agent_name="CLIAgent",
+             agent_input={"operation": "Create a folder named reports"}, task_status=TaskStatus.SUCCESS),
+    ]))
+    plan = cache.lookup("Create a folder named invoices")
+    assert plan is not None and plan.tasks[0].agent_input == {"operation": "Create a folder named invoices"}
+
+
+def test_stale_agent_input_is_not_reused():
+    plan = weather_plan()
+    plan.tasks[0].agent_input = {"query": "weather forecast"}
+    cache = PlanCache()
+    cache.add(QUERY, plan)
+    assert cache.lookup(QUERY.replace("Paris", "London")) is None
+
+
+def test_query_substitutions():
+    assert query_substitutions("write it to notes.md", "write it to ideas.md") == {"notes.md": "ideas.md"}
+    assert query_substitutions("write it to notes.md", "Write it to notes.md!") == {"write": "Write"}
+    assert query_substitutions("write it to notes.md", "never write it to notes.md") is None
+
+
+def test_lru_eviction_and_persistence(tmp_path):
+    path = tmp_path / "plans.json"
+    cache = PlanCache(path=str(path), max_entries=1)
+    cache.add("list the files of my downloads folder", weather_plan())
+    cache.add(QUERY, weather_plan())
+    assert len(cache) == 1
+
+    reloaded = PlanCache(path=str(path), max_entries=1)
+    assert reloaded.lookup(QUERY) is not None
+    reloaded.invalidate(QUERY)
+    assert PlanCache(path=str(path)).lookup(QUERY) is None
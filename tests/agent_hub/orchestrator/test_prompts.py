@@ -0,0 +1,50 @@
+from pydantic import Field
+from agent_hub.agent import Agent, AgentInput
+from agent_hub.config import AgentHubConfig, OrchestratorConfig, PlanCacheConfig
+from agent_hub.orchestrator.orchestrator import Orchestrator
+from agent_hub.orchestrator.prompts import compile_prompts, prefix_reuse_rate
+from agent_hub.plan import AgentTask, OrchestratorPlan, Task
+
+
+class NoteInput(AgentInput):
+    text: str = Field(description="Text of the note")
+
+
+class NoteAgent(Agent):
+    def __init__(self):
+        super().__init__("NoteTaker", "Writes notes", AgentTask.FILE_MANIPULATION)
+
+    def define_input_schema(self):
+        return NoteInput
+
+    async def setup(self):
+        pass
+
+    async def __acall__(self, state, **kwargs):
+        return {}
+
+    def __call__(self, state):
+        return {}
+
+
+def test_prompts_are_compiled_once_per_agent_set():
+    assert compile_prompts([NoteAgent()]) is compile_prompts([NoteAgent()])
+
+
+def test_dynamic_content_comes_after_a_stable_prefix():
+    config = AgentHubConfig(setup_agents=False, orchestrator=OrchestratorConfig(plan_cache=PlanCacheConfig(path=None)))
+    orchestrator = Orchestrator(available_agents=[NoteAgent()], config=config)
+    plan = OrchestratorPlan(goal="take notes", tasks=[
+        Task(name="first", description="Write hello", execution_agent_name="NoteTaker"),
+        Task(name="second", description="Write bye", execution_agent_name="NoteTaker"),
+    ])
+
+    first = orchestrator._execution_messages(plan, "None", 0)
+    second = orchestrator._execution_messages(plan, "hello written", 1)
+
+    assert first[0] is second[0]
+    assert "NoteTaker" in first[0].content and "text" in first[0].content
+    assert "Write bye" in second[-1].content and "hello written" in second[-1].content
+    assert prefix_reuse_rate("executor") > 0
+    # the repair prompt shares the planner prefix
+    assert orchestrator._plan_messages("take notes")[0] is orchestrator._repair_messages(plan, 0, "error")[0]
@@ -0,0 +1,68 @@
+from agent_hub.cache import MISSING, MemoryCache, SQLiteCache, TieredCache, make_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_make_key_is_stable():
+    assert make_key("query", {"b": 1, "a": 2}) == make_key("query", {"a": 2, "b": 1})
+    assert make_key("query", 1) != make_key("query", 2)
+
+
+def test_memory_cache_lru_eviction():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_memory_cache_ttl():
+    clock = FakeClock()
+    cache = MemoryCache(ttl=10, clock=clock)
+    cache.set("a", 1)
+    clock.now += 5
+    assert cache.get("a") == 1
+    clock.now += 6
+    assert cache.get("a") is MISSING
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteCache(path, "search").set("a", {"results": [1, 2]})
+    assert SQLiteCache(path, "search").get("a") == {"results": [1, 2]}
+    assert SQLiteCache(path, "rerank").get("a") is MISSING
+
+
+def test_sqlite_cache_size_eviction(tmp_path):
+    clock = FakeClock()
+    cache = SQLiteCache(str(tmp_path / "cache.sqlite"), "search", max_bytes=25, clock=clock)
+    cache.set("a", "x" * 10)
+    clock.now += 1
+    cache.set("b", "y" * 10)
+    clock.now += 1
+    cache.set("c", "z" * 10)
+    assert cache.get("a") is MISSING
+    assert cache.get("c") == "z" * 10
+
+
+def test_tiered_cache_promotes_and_counts(tmp_path):
+    memory = MemoryCache()
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"), "tiered")
+    disk.set("key", "value")
+    cache = TieredCache("test_tiered", [memory, disk])
+    calls = []
+    assert cache.get_or_compute("key", lambda: calls.append(1)) == "value"
+    assert memory.get("key") == "value"
+    assert cache.get_or_compute("other", lambda: "computed") == "computed"
+    assert cache.get("other") == "computed"
+    assert calls == []
+    stats = cache.stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1
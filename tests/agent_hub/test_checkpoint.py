@@ -0,0 +1,99 @@
+import asyncio
+from langchain_core.messages import AIMessage, HumanMessage
+from agent_hub.agent import Agent, AgentInput
+from agent_hub.checkpoint import SQLiteCheckpointer, aresume, has_pending_run, thread_config
+from agent_hub.config import AgentHubConfig, OrchestratorConfig, PlanCacheConfig
+from agent_hub.front_llm import FrontLLM
+from agent_hub.orchestrator.orchestrator import Orchestrator
+from agent_hub.plan import AgentTask, OrchestratorPlan, Task, TaskStatus
+from agent_hub.state import new_turn
+from agent_hub import graph as graph_module
+
+
+class FlakyAgent(Agent):
+    """Agent counting its calls, crashing on the first `failures` ones"""
+    def __init__(self, name: str, failures: int = 0):
+        super().__init__(name, f"{name} test agent", AgentTask.CLI_COMMAND)
+        self.failures = failures
+        self.calls = 0
+
+    def define_input_schema(self):
+        return AgentInput
+
+    async def setup(self):
+        pass
+
+    async def __acall__(self, state, **kwargs):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("process killed")
+        return {"last_task_status": TaskStatus.SUCCESS, "last_task_output": self.name, "previous_outputs": [self.name]}
+
+    def __call__(self, state):
+        raise NotImplementedError
+
+
+def scripted_graph(monkeypatch, agents, checkpointer):
+    async def acreate_plan(self, query):
+        return OrchestratorPlan(goal=query, tasks=[
+            Task(name="search", description="search", execution_agent_name="Searcher", dependencies=[]),
+            Task(name="write", description="write", execution_agent_name="Writer", dependencies=["search"]),
+        ])
+
+    async def aexecute_plan(self, plan, previous_outputs, task_index=None):
+        return {}, plan.tasks[task_index].execution_agent_name
+
+    async def front_llm_call(self, state):
+        if state.get("plan") is None:
+            return {"user_input": state["messages"][-1].content, "is_computer_interaction_required": True}
+        return {"messages": [AIMessage(content="done")], "is_computer_interaction_required": False}
+
+    monkeypatch.setattr(Orchestrator, "acreate_plan", acreate_plan)
+    monkeypatch.setattr(Orchestrator, "aexecute_plan", aexecute_plan)
+    monkeypatch.setattr(FrontLLM, "__acall__", front_llm_call)
+    config = AgentHubConfig(setup_agents=False, orchestrator=OrchestratorConfig(plan_cache=PlanCacheConfig(path=None)))
+    return graph_module.compile_graph(agents, config, checkpointer)[1]
+
+
+def test_interrupted_run_resumes_after_last_completed_task(monkeypatch, tmp_path):
+    searcher, writer = FlakyAgent("Searcher"), FlakyAgent("Writer", failures=1)
+    path = str(tmp_path / "checkpoints.sqlite")
+    graph = scripted_graph(monkeypatch, [searcher, writer], SQLiteCheckpointer(path))
+
+    try:
+        asyncio.run(graph.ainvoke({"messages": [HumanMessage(content="search then write")]}, thread_config("session")))
+    except RuntimeError:
+        pass
+
+    # a new process (new checkpointer on the same file) picks the run up where it stopped
+    graph = scripted_graph(monkeypatch, [searcher, writer], SQLiteCheckpointer(path))
+    assert has_pending_run(graph, "session")
+    result = asyncio.run(aresume(graph, "session"))
+
+    assert searcher.calls == 1  # the completed task isn't run again
+    assert writer.calls == 2
+    assert result["previous_outputs"] == ["Searcher", "Writer"]
+    assert all(task.task_status == TaskStatus.SUCCESS for task in result["plan"].tasks)
+    assert not has_pending_run(graph, "session")
+
+    # the next message of the session starts a new plan on top of the saved conversation
+    result = asyncio.run(graph.ainvoke(new_turn(HumanMessage(content="again")), thread_config("session")))
+    assert searcher.calls == 2
+    assert [message.content for message in result["messages"]] == ["search then write", "done", "again", "done"]
+
+
+def test_checkpoints_are_incremental(tmp_path):
+    checkpointer = SQLiteCheckpointer(str(tmp_path / "checkpoints.sqlite"))
+    config = thread_config("session", checkpoint_ns="")
+    checkpoint = {"v": 1, "id": "1", "ts": "", "channel_values": {"messages": ["hello"], "plan": "p"},
+                  "channel_versions": {"messages": "1", "plan": "1"}, "versions_seen": {}}
+    config = checkpointer.put(config, checkpoint, {}, {"messages": "1", "plan": "1"})
+    # only the updated channel is written, the unchanged one is read from its previous version
+    checkpoint = {**checkpoint, "id": "2", "channel_values": {"messages": ["hello", "hi"], "plan": "p"},
+                  "channel_versions": {"messages": "2", "plan": "1"}}
+    checkpointer.put(config, checkpoint, {}, {"messages": "2"})
+
+    assert checkpointer._execute("SELECT COUNT(*) FROM blobs")[0][0] == 3
+    saved = checkpointer.get_tuple(thread_config("session"))
+    assert saved.checkpoint["channel_values"] == {"messages": ["hello", "hi"], "plan": "p"}
+    assert saved.parent_config["configurable"]["checkpoint_id"] == "1"
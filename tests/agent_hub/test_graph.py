@@ -0,0 +1,67 @@
+import asyncio
+import pytest
+from pydantic import Field
+from agent_hub.agent import Agent, AgentInput
+from agent_hub.config import AgentHubConfig, HedgingConfig, ignored_settings
+from agent_hub.plan import AgentTask
+from agent_hub import graph as graph_module
+
+
+class EchoInput(AgentInput):
+    text: str = Field(description="Text to echo")
+
+
+class SlowSetupAgent(Agent):
+    """Agent whose setup takes a while, to check setups run concurrently"""
+    def __init__(self, name: str, events: list):
+        super().__init__(name, f"{name} test agent", AgentTask.CLI_COMMAND)
+        self.events = events
+
+    def define_input_schema(self):
+        return EchoInput
+
+    async def setup(self):
+        self.events.append(("start", self.name))
+        await asyncio.sleep(0.05)
+        self.events.append(("end", self.name))
+
+    async def __acall__(self, state, **kwargs):
+        return {}
+
+    def __call__(self, state):
+        return {}
+
+
+@pytest.fixture(autouse=True)
+def llm_env(monkeypatch):
+    for key in ("GROQ_API_KEY", "MISTRAL_API_KEY", "TOGETHER_API_KEY"):
+        monkeypatch.setenv(key, "test-key")
+
+
+def test_build_graph_is_memoized():
+    events = []
+    agents = (SlowSetupAgent("First", events), SlowSetupAgent("Second", events))
+    graph = graph_module.build_graph(agents=agents)
+    assert graph_module.build_graph(agents=agents) is graph
+    # Each agent is set up exactly once, and both setups overlap
+    assert [event for event, _ in events] == ["start", "start", "end", "end"]
+
+
+def test_build_graph_without_setup():
+    events = []
+    agents = (SlowSetupAgent("Lonely", events),)
+    graph = graph_module.build_graph(agents=agents, config=AgentHubConfig(setup_agents=False))
+    assert events == []
+    assert "Lonely" in graph.get_graph().nodes
+
+
+def test_unknown_agent_name():
+    with pytest.raises(ValueError):
+        graph_module.load_agent("NotAnAgent")
+
+
+def test_process_wide_settings_of_a_graph_config_are_reported(capsys):
+    config = AgentHubConfig(setup_agents=False, hedging=HedgingConfig(enabled=False))
+    assert ignored_settings(config) == ["hedging"]
+    graph_module.build_graph(agents=(SlowSetupAgent("Hedgeless", []),), config=config)
+    assert "hedging settings of this config are ignored" in capsys.readouterr().out
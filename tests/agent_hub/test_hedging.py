@@ -0,0 +1,129 @@
+import asyncio
+import time
+import pytest
+from pydantic import BaseModel
+from langchain_core.callbacks import AsyncCallbackManager, BaseCallbackHandler
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda
+from agent_hub.config import HedgingConfig
+from agent_hub.hedging import HedgedRunnable
+from agent_hub.telemetry import telemetry
+
+CONFIG = HedgingConfig(initial_delay=0.05)
+
+
+class Answer(BaseModel):
+    text: str
+
+
+def fake_llm(delay: float, answer, calls: list, name: str):
+    async def call(input):
+        calls.append(name)
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            calls.append(f"{name} cancelled")
+            raise
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def sync_call(input):
+        calls.append(name)
+        time.sleep(delay)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    return RunnableLambda(sync_call, afunc=call)
+
+
+def hedged(primary, backup, name: str, schema=None) -> HedgedRunnable:
+    return HedgedRunnable(primary, lambda: backup, f"{name}/primary", f"{name}/backup", CONFIG, schema)
+
+
+def test_slow_primary_is_hedged_and_cancelled():
+    calls = []
+    llm = hedged(fake_llm(1.0, AIMessage(content="slow"), calls, "primary"), fake_llm(0.01, AIMessage(content="fast"), calls, "backup"), "slow")
+    start_time = time.perf_counter()
+    assert asyncio.run(llm.ainvoke("hi")).content == "fast"
+    assert time.perf_counter() - start_time < 0.5
+    assert calls == ["primary", "backup", "primary cancelled"]
+    assert telemetry.counter("llm.hedge.fired.slow/primary") == 1
+    assert telemetry.counter("llm.hedge.won.slow/backup") == 1
+
+    # fast calls aren't hedged
+    calls.clear()
+    llm = hedged(fake_llm(0.0, AIMessage(content="fast"), calls, "primary"), fake_llm(0.0, AIMessage(content="backup"), calls, "backup"), "fast")
+    assert llm.invoke("hi").content == "fast"
+    assert calls == ["primary"]
+    assert telemetry.count("llm.latency.fast/primary") == 1
+
+
+def test_failures_and_invalid_answers_fail_over():
+    calls = []
+    llm = hedged(fake_llm(0.0, ValueError("down"), calls, "primary"), fake_llm(0.0, Answer(text="ok"), calls, "backup"), "failing", Answer)
+    assert llm.invoke("hi") == Answer(text="ok")
+    assert calls == ["primary", "backup"]
+
+    # an invalid backup answer doesn't win over the (slow) primary
+    calls.clear()
+    llm = hedged(fake_llm(0.2, Answer(text="slow"), calls, "primary"), fake_llm(0.0, None, calls, "backup"), "invalid", Answer)
+    assert asyncio.run(llm.ainvoke("hi")) == Answer(text="slow")
+    assert calls == ["primary", "backup"]
+
+
+def test_cold_start_only_fails_over_until_latencies_are_recorded():
+    calls = []
+    config = HedgingConfig(min_samples=2, min_delay=0.05)
+    llm = HedgedRunnable(fake_llm(0.1, AIMessage(content="primary"), calls, "primary"),
+                         lambda: fake_llm(0.0, AIMessage(content="backup"), calls, "backup"), "cold/primary", "cold/backup", config)
+    assert llm.hedge_delay() is None
+    assert asyncio.run(llm.ainvoke("hi")).content == "primary"
+    assert llm.invoke("hi").content == "primary"
+    assert calls == ["primary", "primary"]
+
+    # once `min_samples` latencies are recorded, calls slower than the quantile are hedged
+    assert llm.hedge_delay() == pytest.approx(0.1, abs=0.05)
+    llm.primary = fake_llm(1.0, AIMessage(content="slow"), calls, "primary")
+    assert asyncio.run(llm.ainvoke("hi")).content == "backup"
+
+    # a failing call fails over on a cold start
+    calls.clear()
+    llm = HedgedRunnable(fake_llm(0.0, ValueError("down"), calls, "primary"),
+                         lambda: fake_llm(0.0, AIMessage(content="backup"), calls, "backup"), "cold-failing/primary", "cold-failing/backup", config)
+    assert llm.invoke("hi").content == "backup"
+    assert calls == ["primary", "backup"]
+
+
+class Tracer(BaseCallbackHandler):
+    def __init__(self):
+        self.runs = []
+
+    def on_chain_start(self, serialized, inputs, **kwargs):
+        self.runs.append(kwargs.get("name"))
+
+
+class Streamer(Tracer):
+    def tap_output_aiter(self, run_id, output):
+        return output
+
+    def tap_output_iter(self, run_id, output):
+        return output
+
+
+def test_backup_keeps_the_parent_callbacks_but_not_the_streaming_ones():
+    calls = []
+    primary = fake_llm(1.0, AIMessage(content="slow"), calls, "primary").with_config(run_name="primary")
+    backup = fake_llm(0.0, AIMessage(content="fast"), calls, "backup").with_config(run_name="backup")
+    tracer, streamer = Tracer(), Streamer()
+    llm = hedged(primary, backup, "traced")
+    manager = AsyncCallbackManager.configure(inheritable_callbacks=[tracer, streamer])
+    assert asyncio.run(llm.ainvoke("hi", {"callbacks": manager})).content == "fast"
+    assert sorted(tracer.runs) == ["backup", "primary"]
+    assert streamer.runs == ["primary"]
+
+    tracer, streamer = Tracer(), Streamer()
+    assert llm.invoke("hi", {"callbacks": [tracer, streamer]}).content == "fast"
+    assert sorted(tracer.runs) == ["backup", "primary"]
+    assert streamer.runs == ["primary"]
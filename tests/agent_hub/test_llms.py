@@ -0,0 +1,54 @@
+import pytest
+from pydantic import BaseModel
+from agent_hub import llms
+
+
+class Answer(BaseModel):
+    text: str
+
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    for key in ("GROQ_API_KEY", "MISTRAL_API_KEY", "TOGETHER_API_KEY"):
+        monkeypatch.setenv(key, "test-key")
+    llms.registry.clear()
+    yield
+    llms.registry.clear()
+
+
+def test_clients_are_built_lazily_and_cached():
+    assert ("groq", "llama3-70b-8192", None) not in llms.registry
+    llm = llms.get_llm()
+    assert ("groq", "llama3-70b-8192", None) in llms.registry
+    assert llms.get_llm() is llm
+
+
+def test_structured_output_is_wrapped_once():
+    structured = llms.get_structured_llm(Answer, "mistral", "pixtral-large-latest")
+    assert llms.get_structured_llm(Answer, "mistral", "pixtral-large-latest") is structured
+
+
+def test_tool_binding_is_cached_per_tool_set():
+    bound = llms.get_tool_llm([Answer], "mistral", "pixtral-large-latest", tool_choice="any")
+    assert llms.get_tool_llm([Answer], "mistral", "pixtral-large-latest", tool_choice="any") is bound
+    assert llms.get_tool_llm([Answer], "mistral", "pixtral-large-latest") is not bound
+
+
+def test_models_of_a_provider_share_the_transport():
+    first = llms.get_llm("mistral", "pixtral-large-latest")
+    second = llms.get_llm("mistral", "mistral-small-latest")
+    assert first is not second
+    assert first.client is second.client
+    assert first.async_client is second.async_client
+
+
+def test_new_llm_has_its_own_async_client():
+    shared = llms.get_llm("mistral", "pixtral-large-latest")
+    llm, async_client = llms.new_llm("mistral", "pixtral-large-latest")
+    assert llm.async_client is async_client and async_client is not shared.async_client
+    assert async_client.base_url == shared.async_client.base_url
+
+
+def test_unsupported_provider():
+    with pytest.raises(ValueError):
+        llms.get_llm("unknown", "model")
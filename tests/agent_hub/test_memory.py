@@ -0,0 +1,47 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from agent_hub import memory as memory_module
+from agent_hub.config import MemoryConfig
+from agent_hub.memory import OutputMemory, window_messages
+from agent_hub.tokens import count_message_tokens
+
+
+def test_recent_outputs_are_kept_verbatim():
+    memory = OutputMemory(MemoryConfig(recent_outputs=2, output_token_budget=1000))
+    outputs = ["first output", "second output", "third output"]
+
+    to_summarize, recent = memory.window(outputs, summarized=0)
+    assert to_summarize == ["first output"]
+    assert recent == ["second output", "third output"]
+    # outputs already rolled into the summary are never summarized again
+    assert memory.window(outputs, summarized=1) == ([], ["second output", "third output"])
+
+
+def test_outputs_above_the_budget_are_summarized():
+    memory = OutputMemory(MemoryConfig(recent_outputs=5, output_token_budget=30))
+    outputs = ["older " * 20, "latest " * 20]
+
+    to_summarize, recent = memory.window(outputs, summarized=0)
+    assert to_summarize == [outputs[0]]
+    assert len(recent) == 1 and recent[0].startswith("latest")
+
+
+def test_summary_falls_back_to_truncation(monkeypatch):
+    def failing_llm():
+        raise RuntimeError("no API key")
+
+    monkeypatch.setattr(memory_module, "get_llm", failing_llm)
+    memory = OutputMemory(MemoryConfig(summary_token_budget=10))
+    summary = memory.summarize("Searched the weather in Paris.", ["word " * 100])
+    assert summary.startswith("Searched the weather in Paris.")
+    assert memory.render(summary, ["latest output"]).endswith("latest output")
+
+
+def test_message_history_is_windowed():
+    messages = []
+    for turn in range(20):
+        messages += [HumanMessage(content=f"question {turn} " * 10), AIMessage(content=f"answer {turn} " * 10)]
+
+    windowed = window_messages(messages, max_tokens=100)
+    assert count_message_tokens(windowed) <= 100
+    assert isinstance(windowed[0], HumanMessage)
+    assert windowed[-1] is messages[-1]
@@ -0,0 +1,167 @@
+import asyncio
+import pytest
+from pydantic import Field, ValidationError
+from langchain_core.messages import AIMessage, HumanMessage
+from agent_hub.agent import Agent, AgentInput
+from agent_hub.config import AgentHubConfig, OrchestratorConfig, PlanCacheConfig
+from agent_hub.front_llm import FrontLLM
+from agent_hub.orchestrator.orchestrator import Orchestrator
+from agent_hub.plan import AgentTask, OrchestratorPlan, PlanRepair, Task, TaskStatus
+from agent_hub.state import merge_task_results
+from agent_hub import graph as graph_module
+
+
+def make_plan(*tasks):
+    return OrchestratorPlan(goal="test", tasks=[
+        Task(name=name, description=name, execution_agent_name=agent, dependencies=dependencies)
+        for name, agent, dependencies in tasks
+    ])
+
+
+def test_tasks_without_dependencies_run_sequentially():
+    plan = make_plan(("a", "X", None), ("b", "X", None))
+    assert plan.ready_tasks() == [0]
+    plan.tasks[0].task_status = TaskStatus.SUCCESS
+    assert plan.ready_tasks() == [1]
+
+
+def test_ready_tasks_follow_dependencies():
+    plan = make_plan(("a", "X", []), ("b", "Y", []), ("c", "X", ["a", "b"]))
+    assert plan.ready_tasks() == [0, 1]
+    plan.tasks[0].task_status = TaskStatus.SUCCESS
+    assert plan.ready_tasks() == [1]
+    plan.tasks[1].task_status = TaskStatus.SUCCESS
+    assert plan.ready_tasks() == [2]
+
+
+def test_parallelism_caps_must_be_positive():
+    for settings in ({"max_parallel_tasks": 0}, {"default_max_parallel_per_agent": 0}, {"max_parallel_per_agent": {"X": 0}}):
+        with pytest.raises(ValidationError):
+            OrchestratorConfig(**settings)
+    # caps set without validation can't schedule anything: the plan is completed instead of failing
+    config = AgentHubConfig(setup_agents=False, orchestrator=OrchestratorConfig(plan_cache=PlanCacheConfig(enabled=False)))
+    orchestrator = Orchestrator(available_agents=[], config=config)
+    orchestrator.config = config.model_copy(update={"orchestrator": config.orchestrator.model_copy(update={"max_parallel_tasks": 0})})
+    plan = make_plan(("a", "X", []))
+    assert orchestrator._schedule(plan) == [] and plan.is_completed
+
+
+def test_merge_task_results():
+    assert merge_task_results({0: "a"}, {1: "b"}) == {0: "a", 1: "b"}
+    assert merge_task_results({0: "a"}, None) == {}
+
+
+class EchoInput(AgentInput):
+    text: str = Field(description="Text to echo")
+
+
+class EchoAgent(Agent):
+    """Agent tracking how many of its calls overlap"""
+    def __init__(self, name: str, stats: dict):
+        super().__init__(name, f"{name} test agent", AgentTask.CLI_COMMAND)
+        self.stats = stats
+
+    def define_input_schema(self):
+        return EchoInput
+
+    async def setup(self):
+        pass
+
+    async def __acall__(self, state, **kwargs):
+        self.stats["active"] += 1
+        self.stats["max_active"] = max(self.stats["max_active"], self.stats["active"])
+        await asyncio.sleep(0.05)
+        self.stats["active"] -= 1
+        text = state["next_agent_input"]["text"]
+        return {"last_task_status": TaskStatus.SUCCESS, "last_task_output": text, "previous_outputs": [text]}
+
+    def __call__(self, state):
+        raise NotImplementedError
+
+
+@pytest.fixture
+def scripted_llms(monkeypatch):
+    plan = make_plan(
+        ("first search", "Searcher", []),
+        ("second search", "Searcher", []),
+        ("third search", "Searcher", []),
+        ("write", "Writer", ["first search", "second search", "third search"]),
+    )
+
+    async def acreate_plan(self, query):
+        return plan
+
+    async def aexecute_plan(self, plan, previous_outputs, task_index=None):
+        return {"text": plan.tasks[task_index].name}, plan.tasks[task_index].execution_agent_name
+
+    async def front_llm_call(self, state):
+        if state.get("plan") is None:
+            return {"user_input": state["messages"][-1].content, "is_computer_interaction_required": True}
+        return {"messages": [AIMessage(content="done")], "is_computer_interaction_required": False}
+
+    monkeypatch.setattr(Orchestrator, "acreate_plan", acreate_plan)
+    monkeypatch.setattr(Orchestrator, "aexecute_plan", aexecute_plan)
+    monkeypatch.setattr(FrontLLM, "__acall__", front_llm_call)
+
+
+def test_independent_tasks_run_in_parallel(scripted_llms):
+    stats = {"active": 0, "max_active": 0}
+    config = AgentHubConfig(setup_agents=False, orchestrator=OrchestratorConfig(max_parallel_per_agent={"Searcher": 2}, plan_cache=PlanCacheConfig(path=None)))
+    agents = [EchoAgent("Searcher", stats), EchoAgent("Writer", stats)]
+    _, graph = graph_module.compile_graph(agents, config)
+
+    result = asyncio.run(graph.ainvoke({"messages": [HumanMessage(content="search then write")]}))
+
+    assert stats["max_active"] == 2  # capped at 2 parallel searches
+    # outputs are merged in plan order, whatever the completion order
+    assert result["previous_outputs"] == ["first search", "second search", "third search", "write"]
+    assert all(task.task_status == TaskStatus.SUCCESS for task in result["plan"].tasks)
+    assert result["last_task_output"] == "write"
+    assert result["messages"][-1].content == "done"
+
+
+class FakeRepairLLM:
+    def __init__(self, repair):
+        self.repair = repair
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return self.repair
+
+
+def test_failed_task_is_repaired_incrementally(monkeypatch):
+    repair_llm = FakeRepairLLM(PlanRepair(tasks=[Task(name="retry", description="retry", execution_agent_name="X")]))
+    monkeypatch.setattr(Orchestrator, "repair_llm", property(lambda self: repair_llm))
+    orchestrator = Orchestrator(available_agents=[])
+    plan = make_plan(("a", "X", []), ("b", "X", []), ("c", "X", ["a", "b"]))
+    plan.tasks[0].task_status = TaskStatus.SUCCESS
+    plan.tasks[1].task_status = TaskStatus.FAILURE
+
+    repaired = orchestrator.update_plan(plan, "boom")
+
+    # the succeeded task is kept, the failed one and the rest are replaced
+    assert [task.name for task in repaired.tasks] == ["a", "retry"]
+    assert repaired.tasks[0].task_status == TaskStatus.SUCCESS
+    assert repaired.tasks[1].attempts == 1
+    assert repaired.ready_tasks() == [1]
+
+    # once the repair budget is spent the plan is given up
+    repaired.tasks[1].task_status = TaskStatus.FAILURE
+    repaired.tasks[1].attempts = orchestrator.config.orchestrator.max_task_repairs
+    given_up = orchestrator.update_plan(repaired, "boom again")
+    assert given_up.is_completed
+    assert repair_llm.calls == 1
+
+
+def test_planned_agent_input_is_dispatched_directly():
+    orchestrator = Orchestrator(available_agents=[EchoAgent("Searcher", {})], config=AgentHubConfig(setup_agents=False))
+    plan = make_plan(("a", "Searcher", []), ("b", "Searcher", []), ("c", "Writer", []))
+    plan.tasks[0].agent_input = {"text": "weather in Paris"}
+    plan.tasks[1].agent_input = {"query": "missing the text argument"}
+    plan.tasks[2].agent_input = {"text": "unknown agent"}
+
+    assert orchestrator._direct_dispatch(plan, 0) == ({"text": "weather in Paris"}, "Searcher")
+    # invalid inputs and unknown agents fall back to the tool-selection LLM
+    assert orchestrator._direct_dispatch(plan, 1) is None
+    assert orchestrator._direct_dispatch(plan, 2) is None
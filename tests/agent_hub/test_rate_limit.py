@@ -0,0 +1,63 @@
+import asyncio
+import json
+import httpx
+from agent_hub.config import ProviderLimits, RateLimitConfig
+from agent_hub.rate_limit import AsyncRateLimitedTransport, RateLimiter, RateLimitedTransport, TokenBucket
+from agent_hub.telemetry import telemetry
+
+
+def test_token_bucket_wait_time():
+    bucket = TokenBucket(per_minute=60, burst_seconds=2)
+    now = bucket.updated
+    assert bucket.wait_time(2, now) == 0
+    bucket.take(2)
+    assert abs(bucket.wait_time(1, now) - 1.0) < 1e-6
+    # amounts above the bucket size only wait for a full bucket
+    assert abs(bucket.wait_time(10, now) - 2.0) < 1e-6
+
+
+def test_concurrency_limit_adapts_to_429s():
+    responses = iter([429, 200, 200, 200, 200])
+
+    def handler(request):
+        return httpx.Response(next(responses), headers={"Retry-After": "0.2"} if request.url.path == "/slow" else {}, json={})
+
+    config = RateLimitConfig(limits={}, default_limits=ProviderLimits(initial_concurrency=4))
+    rate_limiter = RateLimiter(config)
+    client = httpx.Client(transport=RateLimitedTransport("test", httpx.MockTransport(handler), rate_limiter))
+    limiter = rate_limiter.get("test", None)
+
+    client.post("http://api/slow", json={})
+    assert limiter.limit == 2  # multiplicative decrease
+    throttled = telemetry.counter("rate_limit.throttled.test")
+    client.post("http://api/fast", json={})  # waits for the Retry-After pause
+    assert telemetry.quantile("rate_limit.wait.test", 1.0) >= 0.15
+    for _ in range(3):
+        client.post("http://api/fast", json={})
+    assert 2 < limiter.limit < 4  # additive increase
+    assert limiter.in_flight == 0 and throttled == 1
+
+
+def test_requests_and_tokens_are_limited_per_model():
+    calls = []
+
+    def handler(request):
+        calls.append(json.loads(request.content)["model"])
+        return httpx.Response(200, json={"usage": {"total_tokens": 10}})
+
+    config = RateLimitConfig(limits={"llm/small": ProviderLimits(requests_per_minute=600)}, burst_seconds=0.1)
+    rate_limiter = RateLimiter(config)
+
+    async def scenario():
+        async with httpx.AsyncClient(transport=AsyncRateLimitedTransport("llm", httpx.MockTransport(handler), rate_limiter)) as client:
+            start_time = asyncio.get_running_loop().time()
+            await asyncio.gather(*(client.post("http://api/chat", json={"model": "small", "messages": []}) for _ in range(3)))
+            small_time = asyncio.get_running_loop().time() - start_time
+            start_time = asyncio.get_running_loop().time()
+            await asyncio.gather(*(client.post("http://api/chat", json={"model": "large", "messages": []}) for _ in range(3)))
+            return small_time, asyncio.get_running_loop().time() - start_time
+
+    small_time, large_time = asyncio.run(scenario())
+    assert small_time >= 0.19  # 10 requests per second, one at a time
+    assert large_time < 0.1  # other models have their own (here unlimited) buckets
+    assert calls.count("small") == 3
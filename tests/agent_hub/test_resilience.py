@@ -0,0 +1,66 @@
+import time
+import httpx
+import pytest
+from agent_hub.config import ResilienceConfig
+from agent_hub.resilience import CircuitOpenError, DeadlineExceeded, ResilientTransport, request_deadline
+
+CONFIG = ResilienceConfig(base_delay=0.01, max_delay=0.02, failure_threshold=2, reset_timeout=0.1)
+
+
+def scripted_client(provider: str, statuses: list, seen: list = None, config: ResilienceConfig = CONFIG) -> httpx.Client:
+    statuses = iter(statuses)
+
+    def handler(request):
+        if seen is not None:
+            seen.append(request)
+        status = next(statuses)
+        if status is None:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(status, json={})
+
+    return httpx.Client(transport=ResilientTransport(provider, httpx.MockTransport(handler), config))
+
+
+def test_retryable_errors_are_retried():
+    seen = []
+    client = scripted_client("retried", [None, 503, 200], seen, CONFIG.model_copy(update={"failure_threshold": 5}))
+    assert client.get("http://api/").status_code == 200
+    assert len(seen) == 3
+
+    seen.clear()
+    client = scripted_client("not-retried", [400, 200], seen)
+    assert client.get("http://api/").status_code == 400
+    assert len(seen) == 1
+
+
+def test_circuit_opens_and_recovers():
+    seen = []
+    client = scripted_client("down", [500, 500, 500, 200, 200], seen)
+    # the circuit opens after 2 consecutive failures: no more retries, the next calls fail fast
+    assert client.get("http://api/").status_code == 500
+    with pytest.raises(CircuitOpenError):
+        client.get("http://api/")
+    assert len(seen) == 2
+
+    # after `reset_timeout` a single probe call goes through, a failed probe opens the circuit again
+    time.sleep(0.1)
+    assert client.get("http://api/").status_code == 500
+    with pytest.raises(CircuitOpenError):
+        client.get("http://api/")
+
+    # a successful probe closes it
+    time.sleep(0.1)
+    assert client.get("http://api/").status_code == 200
+    assert client.get("http://api/").status_code == 200
+
+
+def test_calls_share_the_request_deadline():
+    seen = []
+    client = scripted_client("deadline", [200, 200], seen)
+    with request_deadline(5.0):
+        client.get("http://api/", timeout=30.0)
+    assert seen[0].extensions["timeout"]["read"] <= 5.0
+
+    with request_deadline(0.0), pytest.raises(DeadlineExceeded):
+        client.get("http://api/")
+    assert len(seen) == 1
@@ -0,0 +1,79 @@
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from agent_hub.config import AgentHubConfig, RouterConfig
+from agent_hub.front_llm import FrontLLM
+from agent_hub.plan import FrontLLMOutput
+from agent_hub.router import LocalRouter, RouterModel, evaluate, load_decisions
+
+CHAT = ["hi", "hello there", "thanks a lot", "how are you?", "good morning", "tell me a joke", "thank you!", "bye"]
+COMPUTER = [
+    "search the weather in Paris and write it to weather.txt",
+    "create a file called notes.md",
+    "list the files in my downloads folder",
+    "open chrome and go to gmail.com",
+    "find the latest news about bitcoin online",
+    "install numpy with pip",
+    "delete the folder build",
+    "open github.com in the browser",
+]
+
+
+@pytest.fixture(scope="module")
+def model():
+    return RouterModel(n_features=2 ** 12).fit(CHAT + COMPUTER, [False] * len(CHAT) + [True] * len(COMPUTER))
+
+
+def test_router_short_circuits_confident_messages(model):
+    router = LocalRouter(model, confidence=0.7)
+    assert router.route("hello") is False
+    assert router.route("search the weather in Rome and write it to rome.txt") is True
+    report = evaluate(model, CHAT + COMPUTER, [False] * len(CHAT) + [True] * len(COMPUTER), confidence=0.7)
+    assert report["computer_precision"] == 1.0 and report["chat_precision"] == 1.0
+    assert report["short_circuit_rate"] > 0.5
+
+
+def test_model_round_trip(model, tmp_path):
+    path = str(tmp_path / "router.npz")
+    model.save(path)
+    assert RouterModel.load(path).predict_proba(["hi"]) == pytest.approx(model.predict_proba(["hi"]))
+
+
+class FakeLLM:
+    def __init__(self, output):
+        self.output = output
+        self.calls = 0
+
+    def invoke(self, messages):
+        self.calls += 1
+        return self.output
+
+
+def test_front_llm_uses_router_then_logs_llm_decisions(model, tmp_path, monkeypatch):
+    decisions_path = tmp_path / "decisions.jsonl"
+    config = AgentHubConfig(router=RouterConfig(model_path=None, decisions_path=str(decisions_path), confidence=0.7))
+    structured_llm = FakeLLM(FrontLLMOutput(is_computer_interaction_required=True, llm_response=""))
+    answer_llm = FakeLLM(AIMessage(content="Hello!"))
+    monkeypatch.setattr(FrontLLM, "llm", property(lambda self: structured_llm))
+    monkeypatch.setattr(FrontLLM, "answer_llm", property(lambda self: answer_llm))
+    front_llm = FrontLLM(config=config)
+
+    # without a trained model every message goes to the LLM, and its decision is logged
+    update = front_llm({"messages": [HumanMessage(content="create a file called todo.txt")]})
+    assert update["is_computer_interaction_required"] and structured_llm.calls == 1
+    assert load_decisions(str(decisions_path)) == (["create a file called todo.txt"], [True])
+
+    front_llm.router.model = model
+    update = front_llm({"messages": [HumanMessage(content="hello")]})
+    assert update == {"messages": [AIMessage(content="Hello!")], "is_computer_interaction_required": False}
+    update = front_llm({"messages": [HumanMessage(content="open chrome and go to youtube.com")]})
+    assert update["is_computer_interaction_required"] and update["user_input"] == "open chrome and go to youtube.com"
+    assert structured_llm.calls == 1
+    assert len(decisions_path.read_text().splitlines()) == 1
+
+
+def test_decisions_are_not_logged_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert RouterConfig().decisions_path is None
+    router = LocalRouter(model=None, confidence=0.7)
+    router.log_decision("create a file called todo.txt", True)
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,66 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from langchain_core.messages import AIMessage
+from agent_hub.checkpoint import SQLiteCheckpointer
+from agent_hub.config import AgentHubConfig, ServerConfig
+from agent_hub.front_llm import FrontLLM
+from agent_hub.server import AdmissionController, Overloaded, create_app
+from agent_hub import graph as graph_module
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def front_llm_call(self, state):
+        turns = sum(message.type == "human" for message in state["messages"])
+        return {"messages": [AIMessage(content=f"{state['messages'][-1].content} (turn {turns})")], "is_computer_interaction_required": False}
+
+    monkeypatch.setattr(FrontLLM, "__acall__", front_llm_call)
+    config = AgentHubConfig(setup_agents=False)
+
+    async def graph_factory():
+        return graph_module.compile_graph([], config, SQLiteCheckpointer(":memory:"))[1]
+
+    with TestClient(create_app(graph_factory, config)) as client:
+        yield client
+
+
+def test_sessions_keep_their_conversation(client):
+    first = client.post("/chat", json={"message": "hello"}).json()
+    second = client.post("/chat", json={"message": "again", "session_id": first["session_id"]}).json()
+    other = client.post("/chat", json={"message": "hi"}).json()
+
+    assert first["answer"] == "hello (turn 1)"
+    assert second["answer"] == "again (turn 2)"
+    assert other["answer"] == "hi (turn 1)" and other["session_id"] != first["session_id"]
+
+
+def test_streamed_chat(client):
+    with client.stream("POST", "/chat/stream", json={"message": "hello", "session_id": "s"}) as response:
+        events = [line.removeprefix("event: ") for line in response.iter_lines() if line.startswith("event: ")]
+        assert response.headers["content-type"].startswith("text/event-stream")
+    assert events[0] == "session" and events[-1] == "done"
+    assert client.get("/health").json()["active_runs"] == 0
+
+
+def test_requests_above_the_queue_are_rejected():
+    async def scenario():
+        admission = AdmissionController(ServerConfig(max_concurrent_runs=1, max_queued_runs=1, queue_timeout=0.1))
+        ticket = await admission.acquire()
+        waiting = asyncio.create_task(admission.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded):
+            await admission.acquire()
+        ticket.release()
+        ticket.release()  # releasing twice frees a single slot
+        (await waiting).release()
+        assert admission.active == 0 and not admission._slots.locked()
+        # a freed slot is given to the next request without waiting
+        (await admission.acquire()).release()
+
+        # a burst is bounded as well, before any request reached the semaphore
+        results = await asyncio.gather(*(admission.acquire() for _ in range(5)), return_exceptions=True)
+        assert sum(isinstance(result, Overloaded) for result in results) == 3
+
+    asyncio.run(scenario())
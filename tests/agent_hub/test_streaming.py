@@ -0,0 +1,41 @@
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import StateGraph, START, END
+from agent_hub.state import State
+from agent_hub.streaming import astream_run
+
+
+def build_test_graph():
+    llm = GenericFakeChatModel(messages=iter([AIMessage(content="It is sunny in Paris")]))
+
+    async def front_llm(state):
+        answer = await llm.ainvoke(state["messages"])
+        return {"messages": [answer]}
+
+    async def orchestrator(state):
+        return {"user_input": state["messages"][-1].content}
+
+    graph_builder = StateGraph(State)
+    graph_builder.add_node("Orchestrator", orchestrator)
+    graph_builder.add_node("front_llm", front_llm)
+    graph_builder.add_edge(START, "Orchestrator")
+    graph_builder.add_edge("Orchestrator", "front_llm")
+    graph_builder.add_edge("front_llm", END)
+    return graph_builder.compile()
+
+
+@pytest.mark.asyncio
+async def test_stream_tokens_progress_and_metrics():
+    events = [event async for event in astream_run(build_test_graph(), {"messages": [HumanMessage(content="Weather in Paris?")]})]
+
+    tokens = [event.content for event in events if event.type == "token"]
+    assert len(tokens) > 1
+    assert "".join(tokens) == "It is sunny in Paris"
+    assert [event.node for event in events if event.type == "node"] == ["Orchestrator", "front_llm"]
+
+    done = events[-1]
+    assert done.type == "done"
+    assert done.state["messages"][-1].content == "It is sunny in Paris"
+    assert done.metrics.time_to_first_token is not None
+    assert done.metrics.time_to_first_token <= done.metrics.total_time
@@ -0,0 +1,33 @@
+import json
+from agent_hub.web_searcher.context_packer import ContextPacker
+
+RESULTS = [
+    {"title": "Paris weather", "url": "https://a.example", "snippet": "Sunny in Paris today with highs of 25 degrees", "position": 1, "sitelinks": [{"title": "Radar", "link": "https://a.example/radar"}]},
+    {"title": "Paris weather", "url": "https://b.example", "snippet": "Sunny in Paris today with highs of 25 degrees!", "position": 2},
+    {"title": "Paris forecast", "url": "https://c.example", "snippet": "Rain expected in Paris later this week", "position": 3, "date": "2 hours ago"},
+]
+
+
+def test_drops_fields_and_duplicates():
+    context, stats = ContextPacker().pack(RESULTS)
+    lines = [json.loads(line) for line in context.splitlines()]
+    assert [line["url"] for line in lines] == ["https://a.example", "https://c.example"]
+    assert "position" not in lines[0] and "sitelinks" not in lines[0]
+    assert lines[1]["date"] == "2 hours ago"
+    assert stats.duplicates_dropped == 1
+    assert stats.documents_kept == 2
+    assert stats.tokens_out < stats.tokens_in
+    assert stats.tokens_saved == stats.tokens_in - stats.tokens_out
+
+
+def test_respects_token_budget_in_rank_order():
+    packer = ContextPacker(token_budget=30)
+    context, stats = packer.pack(RESULTS)
+    assert stats.tokens_out <= 30
+    assert json.loads(context.splitlines()[0])["url"] == "https://a.example"
+
+
+def test_empty_results():
+    context, stats = ContextPacker().pack([])
+    assert context == ""
+    assert stats.documents_kept == 0
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import httpx
+import pytest
+from agent_hub.config import AgentHubConfig, ResilienceConfig, WebSearchConfig
+from agent_hub.resilience import AsyncResilientTransport, ResilientTransport
+from agent_hub.web_searcher import reranker as reranker_module
+from agent_hub.web_searcher.reranker import BM25Reranker, FallbackReranker, JinaReranker, Reranker
+
+DOCS = [
+    {"title": "Stock market news", "snippet": "markets closed higher on Friday"},
+    {"title": "Weather forecast", "snippet": "rain expected in London this weekend"},
+    {"title": "Paris weather today", "snippet": "the weather in Paris is sunny and warm"},
+    {"title": "Travel guide", "snippet": "things to do in Paris"},
+]
+
+
+class FailingReranker(Reranker):
+    model = "failing"
+
+    def rerank(self, query, docs, top_n):
+        raise TimeoutError("upstream timed out")
+
+
+def test_bm25_ranks_most_relevant_first():
+    order = BM25Reranker().rerank("weather in Paris", DOCS, top_n=4)
+    assert order[0] == 2
+    assert order[-1] == 0
+    assert sorted(order) == [0, 1, 2, 3]
+
+
+def test_bm25_respects_top_n():
+    assert len(BM25Reranker().rerank("weather", DOCS, top_n=2)) == 2
+
+
+def test_bm25_ties_keep_search_order():
+    assert BM25Reranker().rerank("unrelated query", DOCS, top_n=10) == [0, 1, 2, 3]
+    assert BM25Reranker().rerank("weather", [], top_n=10) == []
+
+
+def test_fallback_reranker():
+    reranker = FallbackReranker(FailingReranker(), BM25Reranker())
+    assert reranker.rerank("weather in Paris", DOCS, top_n=1) == [2]
+
+
+@pytest.mark.asyncio
+async def test_fallback_reranker_async():
+    reranker = FallbackReranker(FailingReranker(), BM25Reranker())
+    assert await reranker.arerank("weather in Paris", DOCS, top_n=1) == [2]
+
+
+def _read_timeout(request):
+    return request.extensions["timeout"]["read"]
+
+
+def test_fallback_within_the_rerank_timeout(monkeypatch):
+    # a Jina API that never answers, behind the retrying transport of the shared clients
+    resilience = ResilienceConfig(base_delay=0.01, max_delay=0.02, failure_threshold=100)
+
+    def hang(request):
+        time.sleep(_read_timeout(request))
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    async def ahang(request):
+        await asyncio.sleep(_read_timeout(request))
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = httpx.Client(transport=ResilientTransport("jina-hanging", httpx.MockTransport(hang), resilience))
+    async_client = httpx.AsyncClient(transport=AsyncResilientTransport("jina-hanging", httpx.MockTransport(ahang), resilience))
+    monkeypatch.setattr(reranker_module, "get_http_client", lambda name, http_config: client)
+    monkeypatch.setattr(reranker_module, "get_async_http_client", lambda name, http_config: async_client)
+    config = AgentHubConfig(web_search=WebSearchConfig(rerank_timeout=0.2))
+    reranker = FallbackReranker(JinaReranker("jina-reranker-v2-base-multilingual", config), BM25Reranker())
+
+    start_time = time.perf_counter()
+    assert reranker.rerank("weather in Paris", DOCS, top_n=1) == [2]
+    # one rerank timeout, not one per retry
+    assert time.perf_counter() - start_time < 0.35
+
+    start_time = time.perf_counter()
+    assert asyncio.run(reranker.arerank("weather in Paris", DOCS, top_n=1)) == [2]
+    assert time.perf_counter() - start_time < 0.35
@@ -1,11 +1,17 @@
+import httpx
 import pytest
+from agent_hub.web_searcher import web_searcher as web_searcher_module
+from agent_hub.web_searcher import reranker as reranker_module
 from agent_hub.web_searcher.web_searcher import WebSearcher, WebSearcherInput
+from agent_hub.config import AgentHubConfig, HTTPConfig, CacheConfig
+from agent_hub.transport import get_http_client
 from agent_hub.agent import Agent, AgentInput
 from agent_hub.plan import TaskStatus, AgentTask
 
 @pytest.fixture
 def web_searcher():
-    return WebSearcher()
+    # keep the result caches in memory
+    return WebSearcher(config=AgentHubConfig(cache=CacheConfig(path=None)))
 
 def test_agent_inheritance(web_searcher):
     """Test that WebSearcher properly implements Agent interface"""
@@ -43,4 +49,72 @@ def test_basic_call(web_searcher):
 async def test_async_interface(web_searcher):
     """Test that async methods are implemented"""
     await web_searcher.setup()
-    # Just verifying the interface exists and can be called
\ No newline at end of file
+    # Just verifying the interface exists and can be called
+
+
+def _mock_api(request: httpx.Request) -> httpx.Response:
+    if request.url.host == "google.serper.dev":
+        return httpx.Response(200, json={"organic": [
+            {"title": "First", "link": "https://first.example", "snippet": "first snippet"},
+            {"title": "Second", "link": "https://second.example", "snippet": "second snippet"},
+        ]})
+    return httpx.Response(200, json={"results": [{"index": 1}, {"index": 0}]})
+
+
+def test_search_and_rerank_use_pooled_client(web_searcher, monkeypatch):
+    """Test that search and rerank go through the shared HTTP client"""
+    client = httpx.Client(transport=httpx.MockTransport(_mock_api))
+    requested = []
+    def get_client(name, http_config):
+        requested.append(name)
+        return client
+    monkeypatch.setattr(web_searcher_module, "get_http_client", get_client)
+    monkeypatch.setattr(reranker_module, "get_http_client", get_client)
+
+    results = web_searcher.search_web("test query")
+    assert [result["url"] for result in results] == ["https://first.example", "https://second.example"]
+    ranked = web_searcher.rerank_documents("test query", results)
+    assert [result["title"] for result in ranked] == ["Second", "First"]
+    assert requested == ["serper", "jina"]
+
+    # repeated queries are served from the caches
+    assert web_searcher.search_web("test query") == results
+    assert web_searcher.rerank_documents("test query", results) == ranked
+    assert requested == ["serper", "jina"]
+    assert web_searcher.search_cache.stats()["hits"] >= 1
+
+@pytest.mark.asyncio
+async def test_async_search_and_rerank_use_pooled_client(web_searcher, monkeypatch):
+    """Test that the async pipeline uses the shared async HTTP client"""
+    client = httpx.AsyncClient(transport=httpx.MockTransport(_mock_api))
+    monkeypatch.setattr(web_searcher_module, "get_async_http_client", lambda name, http_config: client)
+    monkeypatch.setattr(reranker_module, "get_async_http_client", lambda name, http_config: client)
+
+    results = await web_searcher.asearch_web("test query")
+    ranked = await web_searcher.arerank_documents("test query", results)
+    assert [result["title"] for result in ranked] == ["Second", "First"]
+
+def test_pool_settings_come_from_config():
+    """Test that the HTTP pool is sized from the agent config"""
+    config = AgentHubConfig(http=HTTPConfig(max_connections=3, read_timeout=2.0), cache=CacheConfig(path=None))
+    searcher = WebSearcher(config=config)
+    assert searcher.config.http.max_connections == 3
+    client = get_http_client("test-service", searcher.config.http)
+    assert client is get_http_client("test-service", searcher.config.http)
+    assert client.timeout.read == 2.0
+
+def test_rerank_falls_back_to_local_reranker(web_searcher, monkeypatch):
+    """Test that a failing Jina API falls back to the local BM25 reranker"""
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(503, text="unavailable")))
+    monkeypatch.setattr(reranker_module, "get_http_client", lambda name, http_config: client)
+    docs = [
+        {"title": "Cooking pasta", "snippet": "boil water and add salt"},
+        {"title": "Paris weather", "snippet": "sunny weather in Paris today"},
+    ]
+    ranked = web_searcher.rerank_documents("weather in Paris", docs)
+    assert ranked[0]["title"] == "Paris weather"
+
+def test_local_reranker_model():
+    """Test that the local reranker is selectable through the model argument"""
+    searcher = WebSearcher(model="bm25", config=AgentHubConfig(cache=CacheConfig(path=None)))
+    assert isinstance(searcher.reranker, reranker_module.BM25Reranker)
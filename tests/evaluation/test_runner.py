@@ -0,0 +1,62 @@
+import asyncio
+import json
+import time
+from evaluation.reward_models.based_reward_model import BaseRewardModel
+from evaluation.runner import EvaluationRunner, evaluate, parse_slice
+
+
+class SlowAgent:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __acall__(self, state):
+        query = state["next_agent_input"]["query"]
+        self.calls.append(query)
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(self.delay)
+        self.running -= 1
+        if query == "boom":
+            raise RuntimeError("agent failure")
+        return {"last_task_output": f"answer to {query}"}
+
+
+class ExactMatchRewardModel(BaseRewardModel):
+    def get_reward(self, input, output, expected_output):
+        return float(output == expected_output), "exact match"
+
+
+def items(*queries):
+    return [{"id": i, "query": query, "expected_answer": f"answer to {query}"} for i, query in enumerate(queries)]
+
+
+def test_each_item_runs_once_concurrently():
+    agent = SlowAgent(0.1)
+    runner = EvaluationRunner(agent, ExactMatchRewardModel(), concurrency=4)
+    start_time = time.perf_counter()
+    results = runner.run(items(*"abcdefgh"))
+    assert time.perf_counter() - start_time < 0.5
+    assert sorted(agent.calls) == list("abcdefgh") and agent.max_running == 4
+    assert [result.query for result in results] == list("abcdefgh")
+    assert all(result.score == 1.0 and result.latency >= 0.1 for result in results)
+    # memory isn't attributable to an item when items overlap
+    assert all(result.peak_memory_mb is None for result in results)
+
+
+def test_errors_are_recorded_per_item_and_written(tmp_path):
+    output_path = tmp_path / "results.jsonl"
+    summary = evaluate(EvaluationRunner(SlowAgent(0.0), ExactMatchRewardModel(), concurrency=1), items("a", "boom"), str(output_path))
+    assert summary["items"] == 2 and summary["errors"] == 1 and summary["quality_mean"] == 1.0
+    assert summary["item_peak_memory_mb_mean"] is not None
+    lines = [json.loads(line) for line in output_path.read_text().splitlines()]
+    assert {line["query"]: line["error"] for line in lines} == {"a": None, "boom": "agent: agent failure"}
+
+
+def test_parse_slice():
+    assert parse_slice("0:1") == slice(0, 1)
+    assert parse_slice("5:") == slice(5, None)
+    assert parse_slice("3") == slice(0, 3)
+    assert parse_slice(":") == slice(None, None)